@@ -2,17 +2,17 @@
 # Copyright (c) Jason Taylor.
 
 import pygame
-import importlib
 import sys
 import random
-import math
-import os.path
-import copy
+import time
+import functools
+import battlebotsargs
+import battlebotsassets
 import battlebotsconfig
-import battlebotspublic
-
-# Game configuration
-config = battlebotsconfig.Config()
+import battlebotsengine
+import battlebotsprofile
+import battlebotsreplay
+from battlebotsengine import States
 
 # COLORS
 white = (255, 255, 255)
@@ -22,428 +22,87 @@ blue = (0, 0, 200)
 red = (175, 0, 0)
 orange = (200, 100, 0)
 
+# Speeds a match can be watched at (1 is real time), UP / DOWN step through them. replay.py uses them too.
+SPEEDS = [0.25, 0.5, 1, 2, 4, 8, 16]
 
-class ObjectType:
-    none = 0
-    ship = 1
-    bullet = 2
-    powerup = 3
-
-
-class States:
-    pre = 0
-    battle = 1
-    player_1_wins = 2
-    player_2_wins = 3
-    draw = 4
-
-
-class GameObject:
-    def __init__(self, obj_type, image, health, x, y, direction, speed):
-        self.obj_type = obj_type
-        self.image = image
-        self.health = health
-        self.x = x
-        self.y = y
-        self.direction = direction
-        self._cosTheta = math.cos(math.radians(direction))
-        self._sinTheta = math.sin(math.radians(direction))
-        self.speed = speed
-        self.ticks_before_removal = -1
-
-    def set_direction(self, direction):
-        self.direction = direction
-        self._cosTheta = math.cos(math.radians(direction))
-        self._sinTheta = math.sin(math.radians(direction))
-
-    def update(self):
-        old_x = self.x
-        old_y = self.y
-        distance = self.speed / config.match.tick_rate
-        self.x = self._cosTheta * distance + self.x
-        self.y = self.y - self._sinTheta * distance
-
-        if self.obj_type == ObjectType.ship:
-            if (self.x < 0 + self.image.get_rect().width / 2 or
-                    self.x > config.arena.width - self.image.get_rect().width / 2 or
-                    self.y < 0 + self.image.get_rect().height / 2 or
-                    self.y > config.arena.height - self.image.get_rect().height / 2):
-                self.x = old_x
-                self.y = old_y
-                self.speed = 0
-        elif self.obj_type == ObjectType.bullet:
-            if self.x < -10 or self.x > config.arena.width + 10 or self.y < -10 or self.y > config.arena.height + 10:
-                return True
-
-        if self.ticks_before_removal > 0:
-            self.ticks_before_removal -= 1
-        if self.ticks_before_removal == 0:
-            return True
-        else:
-            return False
-
-    def render(self, screen):
-        width = self.image.get_rect().width
-        height = self.image.get_rect().height
-        render_x = self.x - width / 2
-        render_y = self.y - height / 2
-        screen.blit(self.image, (render_x, render_y))
-        # pygame.draw.rect(screen, (255, 0, 0), pygame.Rect(render_x, render_y, width, height), 1)
-
-    def collides_with(self, obj):
-        self_multiplier = 1.0 if self.obj_type == ObjectType.bullet else config.player.multiplier
-        obj_multiplier = 1.0 if obj.obj_type == ObjectType.bullet else config.player.multiplier
-        width1 = self.image.get_rect().width * self_multiplier
-        height1 = self.image.get_rect().height * self_multiplier
-        width2 = obj.image.get_rect().width * obj_multiplier
-        height2 = obj.image.get_rect().height * obj_multiplier
-
-        r1 = pygame.Rect(self.x - width1 / 2,
-                         self.y - height1 / 2,
-                         width1,
-                         height1)
-
-        r2 = pygame.Rect(obj.x - width2 / 2,
-                         obj.y - height2 / 2,
-                         width2,
-                         height2)
-
-        return r1.colliderect(r2)
-
-
-class PlayerObject(GameObject):
-    def __init__(self, name, image, x, y):
-        GameObject.__init__(self, ObjectType.ship, image, config.player.health, x, y, 0, 0)
-        self.name = name
-        self.torpedoes = config.player.torpedoes
-        self.phasers = config.player.phasers
-        self.fired_last_turn = False
-
-    def render(self, screen):
-        GameObject.render(self, screen)
-        font = pygame.font.Font('Eurostile.ttf', 10)
-        text = font.render(self.name, True, white, black)
-        text_rect = text.get_rect()
-        text_rect.center = (self.x, self.y + self.image.get_rect().height / 2 + 6)
-        screen.blit(text, text_rect)
-        if self.health > 0:
-            pygame.draw.line(screen, green, (self.x - 10, self.y + 27), (self.x - 10 + self.health * 2, self.y + 27), 2)
-
-
-def get_image_for_bot(image_name, bot_module_name):
-    if image_name is None:
-        return None
-
-    # Try loading the image name returned from bot.
-    if os.path.exists(image_name):
-        image = pygame.image.load(image_name)
-        if image.get_rect().width == config.player.width and image.get_rect().height == config.player.height:
-            return image
-
-    # Try seeing if it's in the directory where the bot module was loaded from.
-    mlist = bot_module_name.split(".")
-    mlist.pop()
-    if len(mlist) > 0:
-        another_path = ""
-        for e in mlist:
-            another_path += e
-            another_path += "/"
-        another_path += image_name
-        if os.path.exists(another_path):
-            image = pygame.image.load(another_path)
-            if image.get_rect().width == config.player.width or image.get_rect().height == config.player.height:
-                return image
-
-    print("Unable to find correct size image %s for bot %s, using default" % (image_name, bot_module_name))
-    return None
-
-
-# *********************
-# MAIN EXECUTION BEGINS
-# *********************
-
-if len(sys.argv) != 3:
-    print("Invalid arguments!")
-    print("Usage: battlebots.py <player1bot> <player2bot>")
-    print("Example: battlebots.py samplebot1 samplebot2")
-    exit(0)
-
-pygame.init()
-pygame.display.set_caption('Battle Bots')
-
-game_screen = pygame.display.set_mode((config.arena.width, config.arena.height))
-clock = pygame.time.Clock()
-
-# LOAD IMAGES & SOUNDS
-images = dict()
-images['p1'] = pygame.image.load('p1.png')
-images['p2'] = pygame.image.load('p2.png')
-images['b1'] = pygame.image.load('b1.png')
-images['torpedo'] = pygame.image.load('torpedo.png')
-images['e1'] = pygame.image.load('e1.png')
-images['e2'] = pygame.image.load('e2.png')
-
-config.phaser.width = images['b1'].get_rect().width
-config.phaser.height = images['b1'].get_rect().height
-config.torpedo.width = images['torpedo'].get_rect().width
-config.torpedo.height = images['torpedo'].get_rect().height
-
-sounds = dict()
-sounds['phaser'] = pygame.mixer.Sound('phaser.wav')
-sounds['torpedo'] = pygame.mixer.Sound('torpedo.wav')
-sounds['hit'] = pygame.mixer.Sound('hit.wav')
-sounds['explode'] = pygame.mixer.Sound('explode.wav')
-sounds['bell'] = pygame.mixer.Sound('bell.wav')
-sounds['horn'] = pygame.mixer.Sound('horn.wav')
-sounds['gameover'] = pygame.mixer.Sound('gameover.wav')
-
-bgmusic = "bg" + str(random.randint(1, 2)) + ".mp3"
-pygame.mixer.music.load(bgmusic)
-pygame.mixer.music.set_volume(0.8)
-pygame.mixer.music.play()
-
-# Music credits/attribution
-print("Music by Eric Matyas")
-print("www.soundimage.org")
-
-# GAME STATE & PLAYER SETUP
-player_1_bullets = []
-player_2_bullets = []
-powerups = []
-effects = []
-
-p1_lib = importlib.import_module(sys.argv[1])
-player_1_ai = p1_lib.MyBot(copy.copy(config))
-p2_lib = importlib.import_module(sys.argv[2])
-player_2_ai = p2_lib.MyBot(copy.copy(config))
-
-# Setup Player 1
-player_1_image_name = player_1_ai.get_image()
-player_1_image = get_image_for_bot(player_1_image_name, sys.argv[1])
-if player_1_image is None:
-    player_1_image = images['p1']
-player_1_ship = PlayerObject(player_1_ai.get_name(), player_1_image, config.arena.start1x, config.arena.start1y)
-
-# Setup Player 2
-player_2_image_name = player_2_ai.get_image()
-player_2_image = get_image_for_bot(player_2_image_name, sys.argv[2])
-if player_2_image is None:
-    player_2_image = images['p2']
-player_2_ship = PlayerObject(player_2_ai.get_name(), player_2_image, config.arena.start2x, config.arena.start2y)
-
-state = States.pre
-seconds_passed = 0
-quarter_seconds_passed = 0
-
-
-# Utility method to remove list of elements from a list (can this be done easier with a splice?)
-def remove_elements(the_list, elements_to_remove):
-    for element in elements_to_remove:
-        try:
-            the_list.remove(element)
-        except ValueError:
-            pass
-
-
-# CREATE EXPLOSION OBJECT
-def make_explosion(obj):
-    image = images['e1'] if obj is not player_1_ship and obj is not player_2_ship else images['e2']
-    exp = GameObject(ObjectType.none, image, 0, obj.x, obj.y, 0, 0)
-    exp.ticks_before_removal = 10
-    return exp
-
-
-# GIVE PLAYER A TURN
-def player_turn(player, player_ai, other_player):
-    # Gather turn info
-    info = battlebotspublic.TurnInfo(enemy_x=other_player.x, enemy_y=other_player.y,
-                                     enemy_direction=other_player.direction, enemy_speed=other_player.speed,
-                                     enemy_health=other_player.health, enemy_muzzle_flash=other_player.fired_last_turn,
-                                     my_torpedoes=player.torpedoes, my_phasers=player.phasers, my_x=player.x,
-                                     my_y=player.y, my_direction=player.direction, my_speed=player.speed,
-                                     my_health=player.health, time_left=(config.match.match_secs+config.match.count_secs)-seconds_passed)
-
-    # Send info to player AI & get back turn action
-    action = player_ai.take_turn(info)
-    return action
-
-
-# PROCESS THE PLAYER'S ACTIONS
-def process_player_action(action, player, player_bullets):
-    action.speed = 0 if action.speed < 0 else action.speed
-    action.speed = config.player.max_speed if action.speed > config.player.max_speed else action.speed
-    player.set_direction(action.direction)
-    player.speed = action.speed
-    if action.fire_phaser and player.phasers >= 1:
-        bullet = GameObject(ObjectType.bullet, images['b1'], config.phaser.damage, player.x, player.y, action.fire_direction, config.phaser.speed)
-        player_bullets.append(bullet)
-        player.phasers -= 1
-        player.fired_last_turn = True
-        sounds['phaser'].play()
-    elif action.fire_torpedo and player.torpedoes > 0:
-        bullet = GameObject(ObjectType.bullet, images['torpedo'], config.torpedo.damage, player.x, player.y, action.fire_direction, config.torpedo.speed)
-        player_bullets.append(bullet)
-        player.torpedoes -= 1
-        player.fired_last_turn = True
-        sounds['torpedo'].play()
-    else:
-        player.fired_last_turn = False
-    # Player regenerates phaser energy (default is 1 per second)
-    player.phasers += config.player.phaser_charge
-
-
-# UPDATE OBJECTS, CALCULATE COLLISIONS, UPDATE GAME STATE
-def update(time_for_player_turn):
-    global state
-    # Give each player a turn if it's time
-    if state == States.battle and time_for_player_turn:
-        action1 = player_turn(player_1_ship, player_1_ai, player_2_ship)
-        action2 = player_turn(player_2_ship, player_2_ai, player_1_ship)
-        process_player_action(action1, player_1_ship, player_1_bullets)
-        process_player_action(action2, player_2_ship, player_2_bullets)
-
-    # Update all game objects
-    update_object_list(effects)
-    if state == States.battle:
-        player_1_ship.update()
-        player_2_ship.update()
-        update_object_list(powerups)
-        update_object_list(player_1_bullets)
-        update_object_list(player_2_bullets)
-
-    # Check for collisions
-    player_1_died = False
-    player_2_died = False
-    if state == States.battle:
-        # Check for ship collisions
-        if player_1_ship.collides_with(player_2_ship):
-            if player_1_ship.health > player_2_ship.health:
-                player_2_ship.health = 0
-                player_2_died = True
-                player_1_ship.health -= player_2_ship.health
-                effects.append(make_explosion(player_2_ship))
-            elif player_2_ship.health > player_1_ship.health:
-                player_1_ship.health = 0
-                player_1_died = True
-                player_2_ship.health -= player_1_ship.health
-                effects.append(make_explosion(player_1_ship))
-            else:
-                player_1_ship.health = player_2_ship.health = 0
-                player_1_died = player_2_died = True
-                effects.append(make_explosion(player_1_ship))
-                effects.append(make_explosion(player_2_ship))
-
-        objects_to_remove = []
-        # Check for bullet to ship collisions
-        for bullet in player_2_bullets:
-            if player_1_ship.collides_with(bullet):
-                player_1_ship.health -= bullet.health
-                objects_to_remove.append(bullet)
-                effects.append(make_explosion(bullet))
-                sounds['hit'].play()
-                if player_1_ship.health <= 0:
-                    player_1_ship.health = 0
-                    player_1_died = True
-                    effects.append(make_explosion(player_1_ship))
-                    break
-        remove_elements(player_2_bullets, objects_to_remove)
-        objects_to_remove.clear()
-        for bullet in player_1_bullets:
-            if player_2_ship.collides_with(bullet):
-                player_2_ship.health -= bullet.health
-                objects_to_remove.append(bullet)
-                effects.append(make_explosion(bullet))
-                sounds['hit'].play()
-                if player_2_ship.health <= 0:
-                    player_2_ship.health = 0
-                    player_2_died = True
-                    effects.append(make_explosion(player_2_ship))
-                    break
-        remove_elements(player_1_bullets, objects_to_remove)
-        objects_to_remove.clear()
-
-        # Check for bullet to bullet collisions
-        for bullet1 in player_1_bullets:
-            for bullet2 in player_2_bullets:
-                if bullet1 not in objects_to_remove and bullet2 not in objects_to_remove:
-                    if bullet1.collides_with(bullet2):
-                        objects_to_remove.append(bullet1)
-                        objects_to_remove.append(bullet2)
-                        effects.append(make_explosion(bullet1))
-                        effects.append(make_explosion(bullet2))
-                        sounds['hit'].play()
-        remove_elements(player_1_bullets, objects_to_remove)
-        remove_elements(player_2_bullets, objects_to_remove)
-        objects_to_remove.clear()
-
-        # Check for ship / powerup collisions
-        # TODO
-
-    # Did anyone die?
-    if player_1_died and player_2_died:
-        state = States.draw
-        sounds['gameover'].play()
-    elif player_1_died and not player_2_died:
-        state = States.player_2_wins
-        sounds['gameover'].play()
-    elif player_2_died and not player_1_died:
-        state = States.player_1_wins
-        sounds['gameover'].play()
-
-    # Is time up for the match?
-    if state == States.battle:
-        sec = (config.match.match_secs + config.match.count_secs) - seconds_passed
-        if sec <= 0:
-            if player_1_ship.health > player_2_ship.health:
-                state = States.player_1_wins
-                sounds['gameover'].play()
-            elif player_2_ship.health > player_1_ship.health:
-                state = States.player_2_wins
-                sounds['gameover'].play()
-            else:
-                state = States.draw
-                sounds['gameover'].play()
-
-
-def update_object_list(the_list):
-    objects_to_remove = []
-    for obj in the_list:
-        if obj.update():
-            objects_to_remove.append(obj)
-    remove_elements(the_list, objects_to_remove)
-    objects_to_remove.clear()
-
-
-def draw_text(text, size, color,  x, y):
-    font = pygame.font.Font('Eurostile.ttf', size)
-    text = font.render(text, True, color, black)
+
+def play_music():
+    if not pygame.mixer.get_init():
+        return
+    bgmusic = "bg" + str(random.randint(1, 2)) + ".mp3"
+    pygame.mixer.music.load(bgmusic)
+    pygame.mixer.music.set_volume(0.8)
+    pygame.mixer.music.play()
+
+    # Music credits/attribution
+    print("Music by Eric Matyas")
+    print("www.soundimage.org")
+
+
+# Fonts are only opened and parsed once for each size.
+@functools.lru_cache(maxsize=None)
+def get_font(size):
+    return pygame.font.Font('Eurostile.ttf', size)
+
+
+# Rendered text, so strings that don't change (bot names, countdown, outcome) are only rasterised once. Least recently
+# used surfaces are dropped once there are more than maxsize, the match clock makes a new one every second.
+@functools.lru_cache(maxsize=128)
+def get_text_surface(text, size, color):
+    return get_font(size).render(text, True, color, black)
+
+
+# The drawing functions below return the rect (or list of rects) of the screen they drew on, for dirty rect rendering.
+def render_object(screen, obj):
+    width = obj.image.get_rect().width
+    height = obj.image.get_rect().height
+    render_x = obj.x - width / 2
+    render_y = obj.y - height / 2
+    return screen.blit(obj.image, (render_x, render_y))
+    # pygame.draw.rect(screen, (255, 0, 0), pygame.Rect(render_x, render_y, width, height), 1)
+
+
+def render_player(screen, player):
+    rect = render_object(screen, player)
+    text = get_text_surface(player.name, 10, white)
+    text_rect = text.get_rect()
+    text_rect.center = (player.x, player.y + player.image.get_rect().height / 2 + 6)
+    rect.union_ip(screen.blit(text, text_rect))
+    if player.health > 0:
+        rect.union_ip(pygame.draw.line(screen, green, (player.x - 10, player.y + 27),
+                                       (player.x - 10 + player.health * 2, player.y + 27), 2))
+    return rect
+
+
+def draw_text(screen, text, size, color,  x, y):
+    text = get_text_surface(text, size, color)
     text_rect = text.get_rect()
     text_rect.center = (x, y)
-    game_screen.blit(text, text_rect)
+    return screen.blit(text, text_rect)
 
 
-def draw_start_countdown():
-    global state
-    msg = player_1_ai.get_name() + " vs " + player_2_ai.get_name()
-    countdown = config.match.count_secs - seconds_passed
+def draw_start_countdown(screen, match):
+    config = match.config
+    msg = match.player_1_ship.name + " vs " + match.player_2_ship.name
+    countdown = config.match.count_secs - match.seconds_passed
     msg_x = config.arena.width // 2
     msg_y = config.arena.height // 3
     if countdown > 0:
-        draw_text(msg, 50, red, msg_x, msg_y)
-        draw_text(str(countdown), 50, red, msg_x, msg_y + 50)
+        return [draw_text(screen, msg, 50, red, msg_x, msg_y),
+                draw_text(screen, str(countdown), 50, red, msg_x, msg_y + 50)]
     elif countdown == 0:
-        draw_text("Begin", 50, red, msg_x, msg_y)
-    else:
-        state = States.battle
+        return [draw_text(screen, "Begin", 50, red, msg_x, msg_y)]
+    return []
 
 
-def draw_outcome():
+def draw_outcome(screen, match):
+    config = match.config
     msg = "Draw"
-    if state == States.player_1_wins:
-        msg = player_1_ai.get_name() + " wins!"
-    elif state == States.player_2_wins:
-        msg = player_2_ai.get_name() + " wins!"
-    draw_text(msg, 50, blue, config.arena.width // 2, config.arena.height // 3)
+    if match.state == States.player_1_wins:
+        msg = match.player_1_ship.name + " wins!"
+    elif match.state == States.player_2_wins:
+        msg = match.player_2_ship.name + " wins!"
+    return draw_text(screen, msg, 50, blue, config.arena.width // 2, config.arena.height // 3)
 
 
 def digital_time(seconds):
@@ -452,74 +111,203 @@ def digital_time(seconds):
     return '%02d:%02d' % (mins, seconds)
 
 
-# RENDER
-def render():
-    game_screen.fill((0, 0, 0))
-    if state == States.battle:
-        seconds = (config.match.match_secs + config.match.count_secs) - seconds_passed
+# Draw the match onto the screen (without clearing it first), returns the rects drawn on.
+def draw_match(screen, match):
+    config = match.config
+    rects = []
+    if match.state == States.battle:
+        seconds = match.time_left()
         if seconds >= 10:
-            draw_text(digital_time(seconds), 16, white, config.arena.width // 2, 10)
+            rects.append(draw_text(screen, digital_time(seconds), 16, white, config.arena.width // 2, 10))
         else:
-            if quarter_seconds_passed % 2 == 0:
-                draw_text(digital_time(seconds), 16, white, config.arena.width // 2, 10)
-    if player_1_ship.health > 0:
-        player_1_ship.render(game_screen)
-    if player_2_ship.health > 0:
-        player_2_ship.render(game_screen)
-    for obj in powerups:
-        obj.render(game_screen)
-    for obj in player_1_bullets:
-        obj.render(game_screen)
-    for obj in player_2_bullets:
-        obj.render(game_screen)
-    for obj in effects:
-        obj.render(game_screen)
-    if state == States.pre:
-        draw_start_countdown()
-    elif state == States.draw or state == States.player_1_wins or state == States.player_2_wins:
-        draw_outcome()
+            if match.quarter_seconds_passed % 2 == 0:
+                rects.append(draw_text(screen, digital_time(seconds), 16, white, config.arena.width // 2, 10))
+    if match.player_1_ship.health > 0:
+        rects.append(render_player(screen, match.player_1_ship))
+    if match.player_2_ship.health > 0:
+        rects.append(render_player(screen, match.player_2_ship))
+    for obj in match.powerups:
+        rects.append(render_object(screen, obj))
+    for obj in match.player_1_bullets:
+        rects.append(render_object(screen, obj))
+    for obj in match.player_2_bullets:
+        rects.append(render_object(screen, obj))
+    for obj in match.effects:
+        rects.append(render_object(screen, obj))
+    if match.state == States.pre:
+        rects.extend(draw_start_countdown(screen, match))
+    elif match.finished():
+        rects.append(draw_outcome(screen, match))
+    return rects
+
+
+# RENDER
+def render(screen, match):
+    screen.fill((0, 0, 0))
+    draw_match(screen, match)
     pygame.display.flip()
 
 
-# GAME LOOP
-frame = 0
-exit_delay = config.match.exit_delay
-done = False
-while not done:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            done = True
-        # elif event.type == pygame.MOUSEBUTTONDOWN:
-        #     print("mouse at (%d, %d)" % event.pos)
-
-    turn = frame % config.match.ticks_per_turn == 0
-    update(turn)
-    render()
-    clock.tick(config.match.tick_rate)
-    frame += 1
-    if frame % config.match.ticks_per_turn == 0:
-        quarter_seconds_passed += 1
-    if frame == config.match.tick_rate:
-        frame = 0
-        seconds_passed += 1
-        # Play horn sound when match begins
-        if seconds_passed == config.match.count_secs:
-            sounds['horn'].play()
-        # Play ticking sounds when match is almost over
-        if state == States.battle:
-            secs = (config.match.match_secs + config.match.count_secs) - seconds_passed
-            if secs == config.match.bell_secs:
-                sounds['bell'].play()
-        elif state > States.battle:
-            exit_delay -= 1
-            if exit_delay <= 0:
-                done = True
-
-exit_value = 0
-if state == States.player_1_wins:
-    exit_value = 1
-elif state == States.player_2_wins:
-    exit_value = 2
-elif state == States.draw:
-    exit_value = 3
-sys.exit(exit_value)
+class DirtyRectRenderer:
+    """
+    Renders a match by only clearing and updating the parts of the screen that changed since the last frame (where
+    ships, bullets, effects and text were last frame and where they are now) instead of clearing and flipping the
+    whole screen. Much cheaper on slow machines and big arenas, where most of the screen is empty.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.previous_rects = None
+
+    def render(self, match):
+        screen = self.screen
+        if self.previous_rects is None:
+            screen.fill(black)
+            self.previous_rects = draw_match(screen, match)
+            pygame.display.flip()
+            return
+
+        for rect in self.previous_rects:
+            screen.fill(black, rect)
+        rects = draw_match(screen, match)
+        pygame.display.update(self.previous_rects + rects)
+        self.previous_rects = rects
+
+
+# The display's refresh rate, 60 if pygame can't tell
+def refresh_rate():
+    get_refresh_rates = getattr(pygame.display, 'get_desktop_refresh_rates', None)
+    if get_refresh_rates is not None:
+        rates = [rate for rate in get_refresh_rates() if rate > 0]
+        if len(rates) > 0:
+            return rates[0]
+    return 60
+
+
+def show_speed(speed, paused):
+    pygame.display.set_caption('Battle Bots%s' % ("" if speed == 1 and not paused else
+                                                   " - %gx%s" % (speed, " (paused)" if paused else "")))
+
+
+def main():
+    parser = battlebotsargs.ArgumentParser(description="Battle Bots")
+    parser.add_argument("player1bot")
+    parser.add_argument("player2bot")
+    parser.add_argument("--headless", action="store_true",
+                        help="no display or sound, run as fast as possible and skip the countdown and exit delay")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw the parts of the screen that changed, for slow machines and big arenas")
+    parser.add_argument("--projectile-store", action="store_true",
+                        help="keep phasers and torpedoes in NumPy arrays (needs numpy), only faster with hundreds of "
+                             "bullets in flight, several times slower in ordinary matches")
+    parser.add_argument("--tick-rate", type=int,
+                        help="game ticks per second instead of config.ini's TickRate, below it collisions are swept "
+                             "so bullets can't skip through ships (results differ from a match at the normal rate)")
+    parser.add_argument("--record", metavar="FILE", help="record the match to FILE, play it back with replay.py")
+    parser.add_argument("--bot-processes", action="store_true",
+                        help="run each bot in its own process with config.ini's TurnTimeout to take each turn")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time each phase of the game loop and the bots' turns, save the summary to FILE as JSON")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="watch the match this many times faster (or slower), it plays out the same (default 1)")
+    parser.add_argument("--fps", type=int,
+                        help="frames drawn a second (default the display's refresh rate, or 60 if it isn't known)")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be more than 0")
+    if args.fps is not None and args.fps <= 0:
+        parser.error("--fps must be more than 0")
+
+    # Game configuration
+    config = battlebotsconfig.Config()
+    # Below config.ini's rate bullets could skip through ships between ticks, so collisions are swept
+    swept_collisions = args.tick_rate is not None and args.tick_rate < config.match.tick_rate
+    if args.tick_rate is not None:
+        try:
+            battlebotsengine.set_tick_rate(config, args.tick_rate)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.headless:
+        result = battlebotsengine.run_match(args.player1bot, args.player2bot, config,
+                                            projectile_store=args.projectile_store,
+                                            swept_collisions=swept_collisions, replay_file=args.record,
+                                            bot_processes=args.bot_processes, profile_file=args.profile)
+        sys.exit(result.exit_value())
+
+    pygame.init()
+    speed = args.speed
+    paused = False
+    show_speed(speed, paused)
+    game_screen = pygame.display.set_mode((config.arena.width, config.arena.height))
+    clock = pygame.time.Clock()
+
+    # LOAD IMAGES & SOUNDS
+    images = battlebotsengine.load_images(config)
+    sounds = battlebotsassets.load_sounds()
+    play_music()
+
+    # GAME STATE & PLAYER SETUP
+    match = battlebotsengine.create_match(args.player1bot, args.player2bot, config, images, sounds,
+                                          projectile_store=args.projectile_store,
+                                          swept_collisions=swept_collisions, bot_processes=args.bot_processes)
+    recorder = None
+    if args.record is not None:
+        recorder = battlebotsreplay.MatchRecorder(match)
+    profiler = None
+    if args.profile is not None:
+        profiler = battlebotsprofile.MatchProfiler(match)
+
+    dirty_rect_renderer = None
+    if args.dirty_rects:
+        dirty_rect_renderer = DirtyRectRenderer(game_screen)
+
+    # GAME LOOP
+    # The match is drawn fps times a second and runs speed * TickRate ticks a second, so a frame can have several ticks
+    # (fast forward) or none (slow motion, low tick rates). Keys: UP / DOWN - faster / slower, SPACE - pause.
+    fps = args.fps if args.fps is not None else refresh_rate()
+    # Ticks still to run, a fraction of a tick is carried over to the next frame
+    ticks_due = 0.0
+    while not match.done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                match.done = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_UP:
+                    speed = min([s for s in SPEEDS if s > speed] or [speed])
+                elif event.key == pygame.K_DOWN:
+                    speed = max([s for s in SPEEDS if s < speed] or [speed])
+                show_speed(speed, paused)
+            # elif event.type == pygame.MOUSEBUTTONDOWN:
+            #     print("mouse at (%d, %d)" % event.pos)
+
+        # Sound effects are only played at real time or slower
+        match.sounds = sounds if speed <= 1 else None
+        if not paused:
+            # The result stays up for the usual time whatever the speed
+            ticks_due += (1 if match.finished() else speed) * config.match.tick_rate / fps
+        while ticks_due >= 1 and not match.done:
+            match.step()
+            ticks_due -= 1
+        if profiler is not None:
+            start = time.perf_counter()
+        if dirty_rect_renderer is not None:
+            dirty_rect_renderer.render(match)
+        else:
+            render(game_screen, match)
+        if profiler is not None:
+            profiler.record('render', start)
+        clock.tick(fps)
+
+    match.close()
+    if recorder is not None:
+        recorder.save(args.record)
+    if profiler is not None:
+        profiler.save(args.profile)
+    sys.exit(match.result().exit_value())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import sys
+import argparse
+
+
+# The exit code of battlebots.py is the outcome of the match (2 means player 2 won), so unlike argparse's default bad
+# arguments exit with 0. The scripts that read those exit codes use it too, so their usage errors behave the same.
+class ArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        self.print_usage()
+        print("Invalid arguments! " + message)
+        sys.exit(0)
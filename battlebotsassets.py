@@ -0,0 +1,76 @@
+import os
+import pygame
+
+# Sound effects the game plays, by the name Match.play_sound() uses
+SOUND_FILES = {
+    'phaser': 'phaser.wav',
+    'torpedo': 'torpedo.wav',
+    'hit': 'hit.wav',
+    'explode': 'explode.wav',
+    'bell': 'bell.wav',
+    'horn': 'horn.wav',
+    'gameover': 'gameover.wav',
+}
+
+# Loaded images as (modification time, image) by (absolute path, converted), so each file is only read and decoded once
+# per process. An image that changes on disk (a bot's new ship picture) is loaded again in place of the old one, so
+# the cache never holds more than one image per file and display format.
+image_cache = dict()
+
+
+def display_active():
+    return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+
+def convert_for_display(image):
+    """
+    Converts an image to the display's pixel format, so blitting it doesn't convert every pixel again on every frame.
+    Images are returned as they are when there is no display (headless matches never draw them).
+    """
+    if not display_active():
+        return image
+    return image.convert_alpha()
+
+
+def load_image(file_name):
+    """
+    Loads an image through the cache, converted to the display's pixel format when there is a display. The same
+    surface is returned every time while the file is unchanged, so don't draw on it.
+    """
+    path = os.path.abspath(file_name)
+    converted = display_active()
+    mtime = os.path.getmtime(path)
+    cached = image_cache.get((path, converted))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    image = pygame.image.load(path)
+    if converted:
+        image = image.convert_alpha()
+    image_cache[path, converted] = (mtime, image)
+    return image
+
+
+def clear_image_cache():
+    image_cache.clear()
+
+
+class Sounds(dict):
+    """
+    Sound effects loaded the first time they are played instead of all up front. A sound that's never played is never
+    read from disk.
+    """
+
+    def __missing__(self, name):
+        sound = pygame.mixer.Sound(SOUND_FILES[name])
+        self[name] = sound
+        return sound
+
+
+def load_sounds():
+    """
+    Returns the game's Sounds, or None (no sound) when the mixer couldn't be started, for example on a machine without
+    an audio device.
+    """
+    if not pygame.mixer.get_init():
+        return None
+    return Sounds()
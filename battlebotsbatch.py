@@ -0,0 +1,588 @@
+import math
+import copy
+import traceback
+import numpy
+import battlebotsconfig
+import battlebotspublic
+import battlebotsengine
+from battlebotsengine import States, ProjectileType, MatchResult, SweptCollision
+from battlebotsprojectiles import swept_times, collision_times
+
+# Config values every match in a batch has to share, the matches advance together tick by tick
+SHARED_MATCH_VALUES = ['count_secs', 'match_secs', 'tick_rate', 'ticks_per_turn']
+
+
+# pygame.Rect truncates its arguments, collision boxes are truncated the same way so batched collisions match.
+def collision_boxes(x, y, width, height):
+    return numpy.trunc(x - width / 2), numpy.trunc(y - height / 2), numpy.trunc(width), numpy.trunc(height)
+
+
+# pygame.Rect.colliderect for arrays of boxes (shapes broadcast together)
+def boxes_overlap(box1, box2):
+    left1, top1, width1, height1 = box1
+    left2, top2, width2, height2 = box2
+    return ((left1 < left2 + width2) & (top1 < top2 + height2) & (left2 < left1 + width1) & (top2 < top1 + height1) &
+            (width1 > 0) & (height1 > 0) & (width2 > 0) & (height2 > 0))
+
+
+class BatchProjectiles:
+    """
+    One player's phasers and torpedoes for every match in a batch, as NumPy arrays shaped (match, projectile). Each
+    match's projectiles are at the start of its row in the order they were fired, count says how many there are.
+    """
+
+    fields = ['x', 'y', 'prev_x', 'prev_y', 'cos', 'sin', 'speed', 'damage', 'type', 'direction']
+
+    def __init__(self, matches, capacity=16):
+        self.count = numpy.zeros(matches, dtype=numpy.int64)
+        for name in self.fields:
+            dtype = numpy.int64 if name in ('damage', 'type') else numpy.float64
+            setattr(self, name, numpy.zeros((matches, capacity), dtype=dtype))
+
+    def valid(self):
+        return numpy.arange(self.x.shape[1])[None, :] < self.count[:, None]
+
+    def _grow(self):
+        for name in self.fields:
+            old = getattr(self, name)
+            new = numpy.zeros((old.shape[0], old.shape[1] * 2), dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+
+    # Add one projectile to each of the matches in rows (an array of different match numbers). Directions are given
+    # in degrees and as cos and sin, worked out with the math module like GameObject.set_direction does.
+    def add(self, rows, projectile_types, damage, x, y, direction, cos, sin, speed):
+        while numpy.max(self.count[rows]) == self.x.shape[1]:
+            self._grow()
+        i = self.count[rows]
+        self.x[rows, i] = self.prev_x[rows, i] = x
+        self.y[rows, i] = self.prev_y[rows, i] = y
+        self.cos[rows, i] = cos
+        self.sin[rows, i] = sin
+        self.speed[rows, i] = speed
+        self.damage[rows, i] = damage
+        self.type[rows, i] = projectile_types
+        self.direction[rows, i] = direction
+        self.count[rows] += 1
+
+    # A match's projectiles as battlebotspublic.Projectiles, read-only views of its rows (nothing is copied)
+    def view(self, match):
+        n = self.count[match]
+        return battlebotspublic.Projectiles(self.x[match, :n], self.y[match, :n], self.direction[match, :n],
+                                            self.speed[match, :n], self.damage[match, :n], self.type[match, :n])
+
+    # Keep only the projectiles where keep is True, each row staying in firing order.
+    def compact(self, keep):
+        keep = keep & self.valid()
+        count = numpy.count_nonzero(keep, axis=1)
+        if numpy.array_equal(count, self.count):
+            return
+        order = numpy.argsort(~keep, axis=1, kind='stable')
+        for name in self.fields:
+            setattr(self, name, numpy.take_along_axis(getattr(self, name), order, axis=1))
+        self.count = count
+
+    # Move the projectiles of the matches in moving (bool per match) one tick, see GameObject.update.
+    def update(self, moving, tick_rate):
+        mask = self.valid() & moving[:, None]
+        self.prev_x = numpy.where(mask, self.x, self.prev_x)
+        self.prev_y = numpy.where(mask, self.y, self.prev_y)
+        distance = self.speed / tick_rate
+        self.x = numpy.where(mask, self.cos * distance + self.x, self.x)
+        self.y = numpy.where(mask, self.y - self.sin * distance, self.y)
+
+    # Drop the projectiles of the matches in removing that left their arena (see GameObject.left_arena).
+    def remove_outside_arena(self, removing, arena_width, arena_height):
+        outside = ((self.x < -10) | (self.x > arena_width[:, None] + 10) |
+                   (self.y < -10) | (self.y > arena_height[:, None] + 10))
+        self.compact(~(outside & removing[:, None]))
+
+
+class BatchMatch:
+    """
+    Plays a batch of independent matches at once, for running the same pairing many times (with different configs)
+    when tuning bots. The bots are still asked for their turns one match at a time, but ships and projectiles are kept
+    in NumPy arrays shaped (match, object) and moving them, collisions and damage are done for the whole batch in a few
+    vectorised operations, so physics costs about the same for 1000 matches as for 10. The rules are the same as
+    Match (GameObject.update, collides_with and Match.update), each match finishing exactly like it would on its own;
+    there is no display, sound or countdown, like battlebotsengine.run_match().
+    - player_1_bots, player_2_bots: a bot instance for each match and player
+    - configs: battlebotsconfig.Config for each match, only the count_secs, match_secs, tick_rate and ticks_per_turn
+      values have to be the same for every match
+    - images: images from battlebotsengine.load_images(), used for collision sizes
+    - swept_collisions: see Match
+    """
+
+    def __init__(self, player_1_bots, player_2_bots, configs, images, swept_collisions=False):
+        if not (len(player_1_bots) == len(player_2_bots) == len(configs)) or len(configs) == 0:
+            raise ValueError("A batch needs a player 1 bot, a player 2 bot and a config for each match")
+        config = configs[0]
+        for other_config in configs:
+            for name in SHARED_MATCH_VALUES:
+                if getattr(other_config.match, name) != getattr(config.match, name):
+                    raise ValueError("Every match in a batch needs the same config.match.%s" % name)
+        self.config = config
+        self.configs = configs
+        self.swept_collisions = swept_collisions
+        self.matches = matches = len(configs)
+        self.player_ais = [list(player_1_bots), list(player_2_bots)]
+        self.names = [[bot.get_name() for bot in bots] for bots in self.player_ais]
+
+        def values(get, dtype=numpy.float64):
+            return numpy.array([get(c) for c in configs], dtype=dtype)
+
+        self.arena_width = values(lambda c: c.arena.width)
+        self.arena_height = values(lambda c: c.arena.height)
+        self.max_speed = values(lambda c: c.player.max_speed)
+        self.phaser_charge = values(lambda c: c.player.phaser_charge)
+        self.phaser_damage = values(lambda c: c.phaser.damage, numpy.int64)
+        self.phaser_speed = values(lambda c: c.phaser.speed)
+        self.torpedo_damage = values(lambda c: c.torpedo.damage, numpy.int64)
+        self.torpedo_speed = values(lambda c: c.torpedo.speed)
+
+        # Ships, shaped (match, player)
+        self.x = numpy.stack([values(lambda c: c.arena.start1x), values(lambda c: c.arena.start2x)], axis=1)
+        self.y = numpy.stack([values(lambda c: c.arena.start1y), values(lambda c: c.arena.start2y)], axis=1)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self.direction = numpy.zeros((matches, 2))
+        self.cos = numpy.ones((matches, 2))
+        self.sin = numpy.zeros((matches, 2))
+        self.speed = numpy.zeros((matches, 2))
+        self.health = numpy.repeat(values(lambda c: c.player.health, numpy.int64)[:, None], 2, axis=1)
+        self.torpedoes = numpy.repeat(values(lambda c: c.player.torpedoes, numpy.int64)[:, None], 2, axis=1)
+        self.phasers = numpy.repeat(values(lambda c: c.player.phasers)[:, None], 2, axis=1)
+        self.fired_last_turn = numpy.zeros((matches, 2), dtype=bool)
+
+        # Ship image sizes (for staying in the arena) and collision sizes (scaled by config.player.multiplier)
+        self.ship_width = numpy.array([[images['p1'].get_rect().width, images['p2'].get_rect().width]] * matches,
+                                      dtype=numpy.float64)
+        self.ship_height = numpy.array([[images['p1'].get_rect().height, images['p2'].get_rect().height]] * matches,
+                                       dtype=numpy.float64)
+        multiplier = values(lambda c: c.player.multiplier)[:, None]
+        self.ship_collision_width = self.ship_width * multiplier
+        self.ship_collision_height = self.ship_height * multiplier
+        # Projectile collision sizes by ProjectileType
+        self.projectile_widths = numpy.array([images['b1'].get_rect().width, images['torpedo'].get_rect().width])
+        self.projectile_heights = numpy.array([images['b1'].get_rect().height, images['torpedo'].get_rect().height])
+
+        self.bullets = [BatchProjectiles(matches), BatchProjectiles(matches)]
+
+        self.state = numpy.full(matches, States.pre, dtype=numpy.int64)
+        self.finish_seconds = numpy.zeros(matches, dtype=numpy.int64)
+        self.frame = 0
+        # No countdown, like Match with skip_countdown
+        self.seconds_passed = config.match.count_secs + 1
+        self.quarter_seconds_passed = 0
+
+    def time_left(self):
+        return (self.config.match.match_secs + self.config.match.count_secs) - self.seconds_passed
+
+    def finished(self):
+        return bool(numpy.all(self.state > States.battle))
+
+    # TurnInfo for a player, ships being the ship arrays as lists and projectiles both players' views of the match's
+    # projectiles (see player_turns)
+    def turn_info(self, match, player, ships, projectiles):
+        x, y, direction, speed, health, fired_last_turn, torpedoes, phasers = ships
+        other = 1 - player
+        return battlebotspublic.TurnInfo(enemy_x=x[match][other], enemy_y=y[match][other],
+                                         enemy_direction=direction[match][other], enemy_speed=speed[match][other],
+                                         enemy_health=health[match][other],
+                                         enemy_muzzle_flash=fired_last_turn[match][other],
+                                         my_torpedoes=torpedoes[match][player], my_phasers=phasers[match][player],
+                                         my_x=x[match][player], my_y=y[match][player],
+                                         my_direction=direction[match][player], my_speed=speed[match][player],
+                                         my_health=health[match][player], time_left=self.time_left(),
+                                         my_projectiles=projectiles[player], enemy_projectiles=projectiles[other])
+
+    # Ask the bots of the matches being played for their turns (bots in worker processes all think at once, see
+    # Match.player_turns) and carry them out, see Match.process_player_action. The bots are called one match at a
+    # time, everything else is done with plain python values and written back to the arrays in one go. A bot that
+    # raises an exception loses its match, see Match.forfeit.
+    def player_turns(self, playing):
+        matches = numpy.flatnonzero(playing).tolist()
+        if len(matches) == 0:
+            return
+        ships = [self.x.tolist(), self.y.tolist(), self.direction.tolist(), self.speed.tolist(), self.health.tolist(),
+                 self.fired_last_turn.tolist(), self.torpedoes.tolist(), self.phasers.tolist()]
+        turns = []
+        for match in matches:
+            # Both bots of a match share one view of each player's projectiles
+            projectiles = [self.bullets[0].view(match), self.bullets[1].view(match)]
+            for player in range(2):
+                turns.append((match, player, self.player_ais[player][match],
+                              self.turn_info(match, player, ships, projectiles)))
+        # Matches each player's bot crashed in
+        crashed = [set(), set()]
+        for match, player, player_ai, info in turns:
+            if hasattr(player_ai, 'begin_turn'):
+                try:
+                    player_ai.begin_turn(info)
+                except Exception:
+                    crashed[player].add(match)
+                    traceback.print_exc()
+        actions = []
+        for match, player, player_ai, info in turns:
+            action = None
+            if match not in crashed[player]:
+                try:
+                    if hasattr(player_ai, 'end_turn'):
+                        action = player_ai.end_turn()
+                    else:
+                        action = player_ai.take_turn(info)
+                except Exception:
+                    traceback.print_exc()
+            if action is None:
+                crashed[player].add(match)
+            actions.append(action)
+        for match in crashed[0] | crashed[1]:
+            if match in crashed[0] and match in crashed[1]:
+                self.state[match] = States.draw
+            elif match in crashed[0]:
+                self.state[match] = States.player_2_wins
+            else:
+                self.state[match] = States.player_1_wins
+
+        x, y, direction, speed, health, fired_last_turn, torpedoes, phasers = ships
+        max_speed = self.max_speed.tolist()
+        phaser_charge = self.phaser_charge.tolist()
+        cos = self.cos.tolist()
+        sin = self.sin.tolist()
+        fired = [[], []]
+        for (match, player, player_ai, info), action in zip(turns, actions):
+            if match in crashed[0] or match in crashed[1]:
+                continue
+            action.speed = 0 if action.speed < 0 else action.speed
+            action.speed = max_speed[match] if action.speed > max_speed[match] else action.speed
+            direction[match][player] = action.direction
+            cos[match][player] = math.cos(math.radians(action.direction))
+            sin[match][player] = math.sin(math.radians(action.direction))
+            speed[match][player] = action.speed
+            if action.fire_phaser and phasers[match][player] >= 1:
+                fired[player].append((match, ProjectileType.phaser, action.fire_direction))
+                phasers[match][player] -= 1
+                fired_last_turn[match][player] = True
+            elif action.fire_torpedo and torpedoes[match][player] > 0:
+                fired[player].append((match, ProjectileType.torpedo, action.fire_direction))
+                torpedoes[match][player] -= 1
+                fired_last_turn[match][player] = True
+            else:
+                fired_last_turn[match][player] = False
+            phasers[match][player] += phaser_charge[match]
+
+        self.direction = numpy.array(direction, dtype=numpy.float64)
+        self.cos = numpy.array(cos, dtype=numpy.float64)
+        self.sin = numpy.array(sin, dtype=numpy.float64)
+        self.speed = numpy.array(speed, dtype=numpy.float64)
+        self.fired_last_turn = numpy.array(fired_last_turn, dtype=bool)
+        self.torpedoes = numpy.array(torpedoes, dtype=numpy.int64)
+        self.phasers = numpy.array(phasers, dtype=numpy.float64)
+        for player in range(2):
+            if len(fired[player]) > 0:
+                rows = numpy.array([match for match, projectile_type, fire_direction in fired[player]])
+                types = numpy.array([projectile_type for match, projectile_type, fire_direction in fired[player]])
+                fire_directions = [fire_direction for match, projectile_type, fire_direction in fired[player]]
+                torpedo = types == ProjectileType.torpedo
+                self.bullets[player].add(rows, types,
+                                         numpy.where(torpedo, self.torpedo_damage[rows], self.phaser_damage[rows]),
+                                         self.x[rows, player], self.y[rows, player], numpy.array(fire_directions),
+                                         numpy.array([math.cos(math.radians(d)) for d in fire_directions]),
+                                         numpy.array([math.sin(math.radians(d)) for d in fire_directions]),
+                                         numpy.where(torpedo, self.torpedo_speed[rows], self.phaser_speed[rows]))
+
+    # Move the ships of the matches being played, see GameObject.update
+    def update_ships(self, playing):
+        tick_rate = self.config.match.tick_rate
+        mask = numpy.repeat(playing[:, None], 2, axis=1)
+        old_x = self.x
+        old_y = self.y
+        distance = self.speed / tick_rate
+        x = self.cos * distance + old_x
+        y = old_y - self.sin * distance
+        outside = ((x < 0 + self.ship_width / 2) | (x > self.arena_width[:, None] - self.ship_width / 2) |
+                   (y < 0 + self.ship_height / 2) | (y > self.arena_height[:, None] - self.ship_height / 2))
+        self.prev_x = numpy.where(mask, old_x, self.prev_x)
+        self.prev_y = numpy.where(mask, old_y, self.prev_y)
+        self.x = numpy.where(mask & ~outside, x, old_x)
+        self.y = numpy.where(mask & ~outside, y, old_y)
+        self.speed = numpy.where(mask & outside, 0, self.speed)
+
+    def ship_boxes(self):
+        return collision_boxes(self.x, self.y, self.ship_collision_width, self.ship_collision_height)
+
+    # Do the ships of each match collide, see GameObject.collides_with
+    def ships_collide(self):
+        left, top, width, height = self.ship_boxes()
+        return boxes_overlap((left[:, 0], top[:, 0], width[:, 0], height[:, 0]),
+                             (left[:, 1], top[:, 1], width[:, 1], height[:, 1]))
+
+    # Damage player's ship with the enemy projectiles hitting it in the matches being played, returns which ships were
+    # destroyed. Same as Match.check_bullet_hits: projectiles hit in the order they were fired and once a ship is
+    # destroyed the rest of the projectiles miss it. Only the matches with enemy projectiles in flight are looked at.
+    def bullet_hits(self, player, playing):
+        destroyed = numpy.zeros(self.matches, dtype=bool)
+        enemy_bullets = self.bullets[1 - player]
+        rows = numpy.flatnonzero(playing & (enemy_bullets.count > 0))
+        if len(rows) == 0:
+            return destroyed
+        n = int(numpy.max(enemy_bullets.count[rows]))
+        bullet_x = enemy_bullets.x[rows, :n]
+        bullet_y = enemy_bullets.y[rows, :n]
+        types = enemy_bullets.type[rows, :n]
+        widths = self.projectile_widths[types]
+        heights = self.projectile_heights[types]
+        ship_width = self.ship_collision_width[rows, player, None]
+        ship_height = self.ship_collision_height[rows, player, None]
+        hit = boxes_overlap(collision_boxes(self.x[rows, player, None], self.y[rows, player, None], ship_width,
+                                            ship_height),
+                            collision_boxes(bullet_x, bullet_y, widths, heights))
+        hit &= numpy.arange(n)[None, :] < enemy_bullets.count[rows, None]
+        if not numpy.any(hit):
+            return destroyed
+
+        health = self.health[rows, player, None]
+        damage = numpy.where(hit, enemy_bullets.damage[rows, :n], 0)
+        total = numpy.cumsum(damage, axis=1)
+        hits_before = numpy.cumsum(hit, axis=1) - hit
+        # A projectile hits if the ship wasn't already destroyed by an earlier one
+        used = hit & ((health - (total - damage) > 0) | (hits_before == 0))
+        destroyed[rows] = numpy.any(used & (health - total <= 0), axis=1)
+        health = health[:, 0] - numpy.sum(numpy.where(used, damage, 0), axis=1)
+        self.health[rows, player] = numpy.where(destroyed[rows], 0, health)
+        keep = numpy.ones(enemy_bullets.x.shape, dtype=bool)
+        keep[rows, :n] = ~used
+        enemy_bullets.compact(keep)
+        return destroyed
+
+    # Projectiles that hit each other are both destroyed, see Match.check_bullet_collisions: each of player 1's
+    # projectiles (in firing order) takes out the first of player 2's it hits that isn't taken out already.
+    def bullet_collisions(self, playing):
+        bullets_1, bullets_2 = self.bullets
+        rows = numpy.flatnonzero(playing & (bullets_1.count > 0) & (bullets_2.count > 0))
+        if len(rows) == 0:
+            return
+        n1 = int(numpy.max(bullets_1.count[rows]))
+        n2 = int(numpy.max(bullets_2.count[rows]))
+        # (match, player 1's projectile, player 2's projectile)
+        x1, y1 = bullets_1.x[rows, :n1, None], bullets_1.y[rows, :n1, None]
+        x2, y2 = bullets_2.x[rows, None, :n2], bullets_2.y[rows, None, :n2]
+        types_1 = bullets_1.type[rows, :n1, None]
+        types_2 = bullets_2.type[rows, None, :n2]
+        widths_1, heights_1 = self.projectile_widths[types_1], self.projectile_heights[types_1]
+        widths_2, heights_2 = self.projectile_widths[types_2], self.projectile_heights[types_2]
+        hit = boxes_overlap(collision_boxes(x1, y1, widths_1, heights_1), collision_boxes(x2, y2, widths_2, heights_2))
+        hit &= ((numpy.arange(n1)[None, :, None] < bullets_1.count[rows, None, None]) &
+                (numpy.arange(n2)[None, None, :] < bullets_2.count[rows, None, None]))
+
+        removed_1 = numpy.zeros((len(rows), n1), dtype=bool)
+        removed_2 = numpy.zeros((len(rows), n2), dtype=bool)
+        batch_rows = numpy.arange(len(rows))
+        # Only player 1's projectiles that hit anything need looking at, one at a time for the whole batch
+        for i in numpy.flatnonzero(numpy.any(hit, axis=(0, 2))).tolist():
+            candidates = hit[:, i, :] & ~removed_2
+            found = numpy.any(candidates, axis=1)
+            first = numpy.argmax(candidates, axis=1)
+            removed_1[found, i] = True
+            removed_2[batch_rows[found], first[found]] = True
+        keep_1 = numpy.ones(bullets_1.x.shape, dtype=bool)
+        keep_1[rows, :n1] = ~removed_1
+        keep_2 = numpy.ones(bullets_2.x.shape, dtype=bool)
+        keep_2[rows, :n2] = ~removed_2
+        bullets_1.compact(keep_1)
+        bullets_2.compact(keep_2)
+
+    # Swept collisions of the matches being played, see Match.check_swept_collisions. When things touched is worked out
+    # for the whole batch at once, then the collisions of each match that has any are taken in order by
+    # battlebotsengine.resolve_swept_collisions. Returns which ships were destroyed.
+    def swept_collisions_tick(self, playing):
+        died = numpy.zeros((self.matches, 2), dtype=bool)
+        ship_box_width = numpy.trunc(self.ship_collision_width)
+        ship_box_height = numpy.trunc(self.ship_collision_height)
+        solid = playing[:, None] & (ship_box_width > 0) & (ship_box_height > 0)
+
+        ship_times = collision_times(
+            swept_times(self.prev_x[:, 1] - self.prev_x[:, 0], self.prev_y[:, 1] - self.prev_y[:, 0],
+                        (self.x[:, 1] - self.prev_x[:, 1]) - (self.x[:, 0] - self.prev_x[:, 0]),
+                        (self.y[:, 1] - self.prev_y[:, 1]) - (self.y[:, 0] - self.prev_y[:, 0]),
+                        (ship_box_width[:, 0] + ship_box_width[:, 1]) / 2,
+                        (ship_box_height[:, 0] + ship_box_height[:, 1]) / 2),
+            self.ships_collide())
+        ship_times = numpy.where(solid[:, 0] & solid[:, 1], ship_times, numpy.inf)
+        touched = numpy.isfinite(ship_times)
+
+        # hit_times[player] is when each enemy projectile (columns) touched player's ship in each match (rows)
+        hit_times = []
+        for player in range(2):
+            enemy_bullets = self.bullets[1 - player]
+            n = int(numpy.max(enemy_bullets.count))
+            types = enemy_bullets.type[:, :n]
+            widths = self.projectile_widths[types]
+            heights = self.projectile_heights[types]
+            hit = boxes_overlap(collision_boxes(self.x[:, player, None], self.y[:, player, None],
+                                                self.ship_collision_width[:, player, None],
+                                                self.ship_collision_height[:, player, None]),
+                                collision_boxes(enemy_bullets.x[:, :n], enemy_bullets.y[:, :n], widths, heights))
+            times = collision_times(
+                swept_times(enemy_bullets.prev_x[:, :n] - self.prev_x[:, player, None],
+                            enemy_bullets.prev_y[:, :n] - self.prev_y[:, player, None],
+                            (enemy_bullets.x[:, :n] - enemy_bullets.prev_x[:, :n]) -
+                            (self.x[:, player, None] - self.prev_x[:, player, None]),
+                            (enemy_bullets.y[:, :n] - enemy_bullets.prev_y[:, :n]) -
+                            (self.y[:, player, None] - self.prev_y[:, player, None]),
+                            (ship_box_width[:, player, None] + widths) / 2,
+                            (ship_box_height[:, player, None] + heights) / 2),
+                hit)
+            in_flight = numpy.arange(n)[None, :] < enemy_bullets.count[:, None]
+            times = numpy.where(in_flight & solid[:, player, None], times, numpy.inf)
+            touched |= numpy.any(numpy.isfinite(times), axis=1)
+            hit_times.append(times)
+
+        # When each of player 1's projectiles touched each of player 2's, for the matches with both in flight
+        bullets_1, bullets_2 = self.bullets
+        rows = numpy.flatnonzero(playing & (bullets_1.count > 0) & (bullets_2.count > 0))
+        pair_times = dict()
+        if len(rows) > 0:
+            n1 = int(numpy.max(bullets_1.count[rows]))
+            n2 = int(numpy.max(bullets_2.count[rows]))
+            x1, y1 = bullets_1.x[rows, :n1, None], bullets_1.y[rows, :n1, None]
+            x2, y2 = bullets_2.x[rows, None, :n2], bullets_2.y[rows, None, :n2]
+            prev_x1, prev_y1 = bullets_1.prev_x[rows, :n1, None], bullets_1.prev_y[rows, :n1, None]
+            prev_x2, prev_y2 = bullets_2.prev_x[rows, None, :n2], bullets_2.prev_y[rows, None, :n2]
+            types_1 = bullets_1.type[rows, :n1, None]
+            types_2 = bullets_2.type[rows, None, :n2]
+            widths_1, heights_1 = self.projectile_widths[types_1], self.projectile_heights[types_1]
+            widths_2, heights_2 = self.projectile_widths[types_2], self.projectile_heights[types_2]
+            hit = boxes_overlap(collision_boxes(x1, y1, widths_1, heights_1),
+                                collision_boxes(x2, y2, widths_2, heights_2))
+            times = collision_times(swept_times(prev_x2 - prev_x1, prev_y2 - prev_y1, (x2 - prev_x2) - (x1 - prev_x1),
+                                                (y2 - prev_y2) - (y1 - prev_y1), (widths_1 + widths_2) / 2,
+                                                (heights_1 + heights_2) / 2),
+                                    hit)
+            in_flight = ((numpy.arange(n1)[None, :, None] < bullets_1.count[rows, None, None]) &
+                         (numpy.arange(n2)[None, None, :] < bullets_2.count[rows, None, None]))
+            times = numpy.where(in_flight, times, numpy.inf)
+            for k in numpy.flatnonzero(numpy.any(numpy.isfinite(times), axis=(1, 2))).tolist():
+                pair_times[int(rows[k])] = times[k]
+                touched[rows[k]] = True
+
+        keep_1 = numpy.ones(bullets_1.x.shape, dtype=bool)
+        keep_2 = numpy.ones(bullets_2.x.shape, dtype=bool)
+        for match in numpy.flatnonzero(touched).tolist():
+            collisions = []
+            if numpy.isfinite(ship_times[match]):
+                collisions.append((float(ship_times[match]), SweptCollision.ships, 0, 0))
+            for j in numpy.flatnonzero(numpy.isfinite(hit_times[0][match])).tolist():
+                collisions.append((float(hit_times[0][match, j]), SweptCollision.hit_ship_1, 0, j))
+            for i in numpy.flatnonzero(numpy.isfinite(hit_times[1][match])).tolist():
+                collisions.append((float(hit_times[1][match, i]), SweptCollision.hit_ship_2, i, 0))
+            if match in pair_times:
+                times = pair_times[match]
+                for i, j in numpy.argwhere(numpy.isfinite(times)).tolist():
+                    collisions.append((float(times[i, j]), SweptCollision.projectiles, i, j))
+            health, died[match], happened = battlebotsengine.resolve_swept_collisions(
+                collisions, self.health[match].tolist(), bullets_1.damage[match].tolist(),
+                bullets_2.damage[match].tolist())
+            self.health[match] = health
+            for t, kind, i, j in happened:
+                if kind != SweptCollision.ships and kind != SweptCollision.hit_ship_2:
+                    keep_2[match, j] = False
+                if kind != SweptCollision.ships and kind != SweptCollision.hit_ship_1:
+                    keep_1[match, i] = False
+        bullets_1.compact(keep_1)
+        bullets_2.compact(keep_2)
+        return died
+
+    # See Match.update, without effects and sounds
+    def update(self, time_for_player_turn):
+        playing = self.state == States.battle
+        if time_for_player_turn:
+            self.player_turns(playing)
+            # Matches a bot forfeited by crashing stop here, like Match.update
+            playing = self.state == States.battle
+
+        tick_rate = self.config.match.tick_rate
+        self.update_ships(playing)
+        for bullets in self.bullets:
+            bullets.update(playing, tick_rate)
+            if not self.swept_collisions:
+                bullets.remove_outside_arena(playing, self.arena_width, self.arena_height)
+
+        if self.swept_collisions:
+            died = self.swept_collisions_tick(playing)
+            for bullets in self.bullets:
+                bullets.remove_outside_arena(playing, self.arena_width, self.arena_height)
+        else:
+            # Ship collisions, the ship with more health survives (and loses nothing, Match.update sets the other's
+            # health to 0 before taking it off)
+            died = numpy.zeros((self.matches, 2), dtype=bool)
+            collide = self.ships_collide() & playing
+            health_1 = self.health[:, 0].copy()
+            health_2 = self.health[:, 1].copy()
+            died[:, 0] = collide & (health_2 >= health_1)
+            died[:, 1] = collide & (health_1 >= health_2)
+            self.health = numpy.where(died, 0, self.health)
+
+            died[:, 0] |= self.bullet_hits(0, playing)
+            died[:, 1] |= self.bullet_hits(1, playing)
+            self.bullet_collisions(playing)
+
+        state = self.state
+        state = numpy.where(died[:, 0] & died[:, 1], States.draw, state)
+        state = numpy.where(died[:, 0] & ~died[:, 1], States.player_2_wins, state)
+        state = numpy.where(died[:, 1] & ~died[:, 0], States.player_1_wins, state)
+
+        # Is time up?
+        if self.time_left() <= 0:
+            still_playing = state == States.battle
+            health_1 = self.health[:, 0]
+            health_2 = self.health[:, 1]
+            state = numpy.where(still_playing & (health_1 > health_2), States.player_1_wins, state)
+            state = numpy.where(still_playing & (health_2 > health_1), States.player_2_wins, state)
+            state = numpy.where(still_playing & (health_1 == health_2), States.draw, state)
+        self.state = state
+
+    # Advance every match one tick, see Match.step
+    def step(self):
+        config = self.config
+        was_finished = self.state > States.battle
+        self.update(self.frame % config.match.ticks_per_turn == 0)
+        if config.match.count_secs - self.seconds_passed < 0:
+            self.state = numpy.where(self.state == States.pre, States.battle, self.state)
+
+        self.frame += 1
+        if self.frame % config.match.ticks_per_turn == 0:
+            self.quarter_seconds_passed += 1
+        if self.frame == config.match.tick_rate:
+            self.frame = 0
+            self.seconds_passed += 1
+        just_finished = (self.state > States.battle) & ~was_finished
+        self.finish_seconds[just_finished] = self.seconds_passed
+
+    # Run every match until it's decided, returns the MatchResults in match order
+    def run(self):
+        while not self.finished():
+            self.step()
+        return self.results()
+
+    def results(self):
+        results = []
+        for match in range(self.matches):
+            results.append(MatchResult(int(self.state[match]), self.names[0][match], self.names[1][match],
+                                       int(self.health[match, 0]), int(self.health[match, 1]),
+                                       int(self.finish_seconds[match])))
+        return results
+
+
+# Play player_1_module against player_2_module once for each config, as a BatchMatch. Returns the MatchResults.
+def run_batch(player_1_module, player_2_module, configs, images=None, swept_collisions=False):
+    if images is None:
+        images = battlebotsengine.load_images(battlebotsconfig.Config())
+    player_1_bots = [battlebotsengine.load_bot(player_1_module, config) for config in configs]
+    player_2_bots = [battlebotsengine.load_bot(player_2_module, config) for config in configs]
+    return BatchMatch(player_1_bots, player_2_bots, configs, images, swept_collisions=swept_collisions).run()
+
+
+# A batch of copies of config, to run a pairing many times (ex: to compare a bot's results with a tweaked config).
+def copy_configs(config, count):
+    return [copy.deepcopy(config) for i in range(count)]
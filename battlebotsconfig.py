@@ -14,10 +14,11 @@ class MatchConfig:
     - bell_secs: a bell rings when this many seconds are left in the match
     - tick_rate: number of game ticks per second
     - ticks_per_turn: number of game ticks per player turn
+    - turn_timeout: seconds a bot running in a worker process has to take its turn
     """
 
     __slots__ = ["count_secs", "match_secs", "bell_secs", "tick_rate",
-                 "ticks_per_turn", "exit_delay"]
+                 "ticks_per_turn", "exit_delay", "turn_timeout"]
 
     def __init__(self, config):
         self.count_secs = int(config['MATCH']['CountSecs'])
@@ -26,6 +27,7 @@ class MatchConfig:
         self.tick_rate = int(config['MATCH']['TickRate'])
         self.ticks_per_turn = int(config['MATCH']['TicksPerTurn'])
         self.exit_delay = int(config['MATCH']['ExitDelay'])
+        self.turn_timeout = float(config['MATCH']['TurnTimeout'])
 
 
 class ArenaConfig:
@@ -115,21 +117,43 @@ class TorpedoConfig:
 
 class Config:
     """
-    Game configuration:
+    Game configuration, read from config.ini with any overrides on top:
     - match: match-specific configuration
     - arena: arena-specific configuration
     - player: player-specific configuration
     - phaser: phaser-specific configuration
     - torpedo: torpedo-specific configuration
+    Constructor arguments:
+    - overrides: settings to use instead of config.ini's, by section and name (ex: {'PLAYER': {'PhaserCharge': 0.5}}),
+      a ValueError is raised for a setting config.ini doesn't have
+    - file_name: the configuration file to read
     """
 
     __slots__ = ["match", "arena", "player", "phaser", "torpedo"]
 
-    def __init__(self):
+    def __init__(self, overrides=None, file_name='config.ini'):
         config = configparser.ConfigParser()
-        config.read('config.ini')
+        config.read(file_name)
+        if overrides is not None:
+            for section, settings in overrides.items():
+                for name in settings:
+                    if not config.has_option(section, name):
+                        raise ValueError("Unknown setting %s.%s" % (section, name))
+            config.read_dict(overrides)
         self.match = MatchConfig(config)
         self.arena = ArenaConfig(config)
         self.player = PlayerConfig(config)
         self.phaser = PhaserConfig(config)
         self.torpedo = TorpedoConfig(config)
+
+
+# Overrides for Config from "SECTION.Name=value" strings (ex: "PLAYER.MaxSpeed=200")
+def parse_overrides(settings):
+    overrides = dict()
+    for setting in settings:
+        name, separator, value = setting.partition("=")
+        section, dot, name = name.partition(".")
+        if separator == "" or dot == "":
+            raise ValueError("Expected SECTION.Name=value, not %s" % setting)
+        overrides.setdefault(section, dict())[name] = value
+    return overrides
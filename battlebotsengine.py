@@ -0,0 +1,1063 @@
+import importlib
+import math
+import array
+import time
+import os.path
+import copy
+import traceback
+from collections import namedtuple
+import pygame
+import battlebotsassets
+import battlebotsconfig
+import battlebotspublic
+
+
+class ObjectType:
+    none = 0
+    ship = 1
+    bullet = 2
+    powerup = 3
+
+
+class ProjectileType:
+    phaser = 0
+    torpedo = 1
+
+
+class States:
+    pre = 0
+    battle = 1
+    player_1_wins = 2
+    player_2_wins = 3
+    draw = 4
+
+
+# Bullets are bucketed into a grid of cells this size (pixels) to find bullet to bullet collisions. It's larger than any
+# bullet, so a bullet only ever touches the cell it's in and its neighbours.
+COLLISION_CELL_SIZE = 32
+
+
+class MatchResult(namedtuple('MatchResult', ['outcome', 'player_1_name', 'player_2_name',
+                                             'player_1_health', 'player_2_health', 'seconds_passed'])):
+    """
+    Outcome of a finished match:
+    - outcome: one of States.player_1_wins, States.player_2_wins or States.draw
+    - player_1_name, player_2_name: names the bots gave themselves
+    - player_1_health, player_2_health: health of each ship at the end of the match
+    - seconds_passed: match clock (including the countdown) when the match was decided
+    """
+
+    # Exit code battlebots.py uses for this outcome: 1 - player 1 wins, 2 - player 2 wins, 3 - draw
+    def exit_value(self):
+        if self.outcome == States.player_1_wins:
+            return 1
+        elif self.outcome == States.player_2_wins:
+            return 2
+        elif self.outcome == States.draw:
+            return 3
+        return 0
+
+
+class GameObject:
+    """
+    A ship, bullet or explosion. The image never changes, so the collision box size and half the image size (keeping
+    ships in the arena) are worked out once here and the per tick tests don't need get_rect() or pygame.Rects.
+    """
+
+    __slots__ = ["config", "obj_type", "image", "health", "x", "y", "prev_x", "prev_y", "direction", "_cosTheta",
+                 "_sinTheta", "speed", "ticks_before_removal", "half_image_width", "half_image_height",
+                 "collision_width", "collision_height", "half_collision_width", "half_collision_height", "box_width",
+                 "box_height", "solid", "pool"]
+
+    def __init__(self, config, obj_type, image, health, x, y, direction, speed):
+        self.config = config
+        self.obj_type = obj_type
+        self.image = image
+        # The ObjectPool the object goes back to when it's out of play, None if it isn't pooled
+        self.pool = None
+        self.reset(health, x, y, direction, speed)
+
+        rect = image.get_rect()
+        self.half_image_width = rect.width / 2
+        self.half_image_height = rect.height / 2
+        # Ships use a collision box smaller than their image (config.player.multiplier)
+        multiplier = 1.0 if obj_type == ObjectType.bullet else config.player.multiplier
+        self.collision_width = rect.width * multiplier
+        self.collision_height = rect.height * multiplier
+        self.half_collision_width = self.collision_width / 2
+        self.half_collision_height = self.collision_height / 2
+        # The collision box in whole pixels like pygame.Rect has it, a box with no area never collides
+        self.box_width = int(self.collision_width)
+        self.box_height = int(self.collision_height)
+        self.solid = self.box_width > 0 and self.box_height > 0
+
+    # Put the object (back) in play, everything but its type and image is as if it had just been made
+    def reset(self, health, x, y, direction, speed):
+        self.health = health
+        self.x = x
+        self.y = y
+        # Where the object was before its last update, for swept collisions
+        self.prev_x = x
+        self.prev_y = y
+        self.direction = direction
+        self._cosTheta = math.cos(math.radians(direction))
+        self._sinTheta = math.sin(math.radians(direction))
+        self.speed = speed
+        self.ticks_before_removal = -1
+
+    def set_direction(self, direction):
+        self.direction = direction
+        self._cosTheta = math.cos(math.radians(direction))
+        self._sinTheta = math.sin(math.radians(direction))
+
+    def update(self):
+        config = self.config
+        old_x = self.prev_x = self.x
+        old_y = self.prev_y = self.y
+        distance = self.speed / config.match.tick_rate
+        self.x = self._cosTheta * distance + self.x
+        self.y = self.y - self._sinTheta * distance
+
+        if self.obj_type == ObjectType.ship:
+            if (self.x < self.half_image_width or self.x > config.arena.width - self.half_image_width or
+                    self.y < self.half_image_height or self.y > config.arena.height - self.half_image_height):
+                self.x = old_x
+                self.y = old_y
+                self.speed = 0
+        elif self.obj_type == ObjectType.bullet:
+            if self.left_arena():
+                return True
+
+        if self.ticks_before_removal > 0:
+            self.ticks_before_removal -= 1
+        if self.ticks_before_removal == 0:
+            return True
+        else:
+            return False
+
+    def left_arena(self):
+        config = self.config
+        return self.x < -10 or self.x > config.arena.width + 10 or self.y < -10 or self.y > config.arena.height + 10
+
+    # Size of the box used for collision detection, ships use a box smaller than their image (config.player.multiplier)
+    def get_collision_size(self):
+        return self.collision_width, self.collision_height
+
+    def get_collision_rect(self):
+        return pygame.Rect(self.x - self.half_collision_width,
+                           self.y - self.half_collision_height,
+                           self.collision_width,
+                           self.collision_height)
+
+    # Rect covering everywhere the object went during its last update (with a pixel to spare all round, collision
+    # rects are at whole pixel positions but swept collisions aren't)
+    def get_swept_rect(self):
+        prev_rect = pygame.Rect(self.prev_x - self.half_collision_width, self.prev_y - self.half_collision_height,
+                                self.collision_width, self.collision_height)
+        return self.get_collision_rect().union(prev_rect).inflate(4, 4)
+
+    # Grid cells (see collision_cells) the collision box covers, or with swept everywhere it went in its last update
+    def get_collision_cells(self, swept=False):
+        if swept:
+            rect = self.get_swept_rect()
+            return collision_cells(rect.left, rect.top, rect.width, rect.height)
+        return collision_cells(int(self.x - self.half_collision_width), int(self.y - self.half_collision_height),
+                               self.box_width, self.box_height)
+
+    # Same as get_collision_rect().colliderect(obj.get_collision_rect()), boxes are truncated to whole pixels the way
+    # pygame.Rect does it, without making the Rects
+    def collides_with(self, obj):
+        if not (self.solid and obj.solid):
+            return False
+        left1 = int(self.x - self.half_collision_width)
+        left2 = int(obj.x - obj.half_collision_width)
+        if left1 >= left2 + obj.box_width or left2 >= left1 + self.box_width:
+            return False
+        top1 = int(self.y - self.half_collision_height)
+        top2 = int(obj.y - obj.half_collision_height)
+        return top1 < top2 + obj.box_height and top2 < top1 + self.box_height
+
+    # When (0 to 1, the fraction of the tick) the two objects first touched while moving in straight lines from where
+    # they were before their last update to where they are now, None if they didn't. The boxes are the whole pixel
+    # ones collides_with uses, objects that collide at the end of the tick touched at 1 at the latest. Unlike
+    # collides_with this can't miss fast objects that pass through each other between ticks.
+    def swept_collision_time(self, obj):
+        if not (self.solid and obj.solid):
+            return None
+        t = swept_time(obj.prev_x - self.prev_x, obj.prev_y - self.prev_y,
+                       (obj.x - obj.prev_x) - (self.x - self.prev_x), (obj.y - obj.prev_y) - (self.y - self.prev_y),
+                       (self.box_width + obj.box_width) / 2, (self.box_height + obj.box_height) / 2)
+        if t is None and self.collides_with(obj):
+            return 1.0
+        return t
+
+
+# Swept AABB test. One box is offset (dx, dy) from the other at the start of a tick and moves (vx, vy) relative to it
+# during the tick. Returns when in the tick (0 to 1) the boxes start to overlap (centres closer than half_width and
+# half_height), None if they don't. See battlebotsprojectiles.swept_times for the NumPy version.
+def swept_time(dx, dy, vx, vy, half_width, half_height):
+    t_enter = 0.0
+    t_exit = 1.0
+    for d, v, half in ((dx, vx, half_width), (dy, vy, half_height)):
+        if v == 0:
+            if abs(d) >= half:
+                return None
+        else:
+            t0 = (-half - d) / v
+            t1 = (half - d) / v
+            t_enter = max(t_enter, min(t0, t1))
+            t_exit = min(t_exit, max(t0, t1))
+            if t_enter >= t_exit:
+                return None
+    return t_enter
+
+
+# Kinds of swept collision (see resolve_swept_collisions), collisions at the same time are taken in this order, the
+# order Match.update checks them in without swept collisions.
+class SweptCollision:
+    ships = 0
+    hit_ship_1 = 1
+    hit_ship_2 = 2
+    projectiles = 3
+
+
+# Work out a tick's swept collisions in the order they happened, so a projectile destroyed on the way can't hit
+# anything later in the tick and nothing happens after a ship is destroyed. collisions are (time, kind, i, j): the ships
+# colliding (SweptCollision.ships), player 2's projectile j hitting ship 1 (hit_ship_1), player 1's projectile i
+# hitting ship 2 (hit_ship_2) or projectiles i and j destroying each other (projectiles). Otherwise everything happens
+# as in Match.update: the ship with more health survives a ship collision and loses nothing, a hit takes the
+# projectile's damage off the ship. health is both ships' health and damage_1, damage_2 each player's projectile
+# damage. Returns the ships' health, whether each was destroyed and the collisions that happened.
+def resolve_swept_collisions(collisions, health, damage_1, damage_2):
+    health = list(health)
+    died = [False, False]
+    removed_1 = set()
+    removed_2 = set()
+    happened = []
+    death_time = None
+    for collision in sorted(collisions):
+        t, kind, i, j = collision
+        if death_time is not None and t > death_time:
+            break
+        if kind == SweptCollision.ships:
+            if died[0] or died[1]:
+                continue
+            for player in range(2):
+                if health[player] <= health[1 - player]:
+                    died[player] = True
+            for player in range(2):
+                if died[player]:
+                    health[player] = 0
+        elif kind == SweptCollision.projectiles:
+            if i in removed_1 or j in removed_2:
+                continue
+            removed_1.add(i)
+            removed_2.add(j)
+        else:
+            player = 0 if kind == SweptCollision.hit_ship_1 else 1
+            if died[player] or (i in removed_1 if player == 1 else j in removed_2):
+                continue
+            if player == 0:
+                removed_2.add(j)
+                health[0] -= damage_2[j]
+            else:
+                removed_1.add(i)
+                health[1] -= damage_1[i]
+            if health[player] <= 0:
+                health[player] = 0
+                died[player] = True
+        happened.append(collision)
+        if death_time is None and (died[0] or died[1]):
+            death_time = t
+    return health, died, happened
+
+
+# (player 1's projectile, player 2's projectile, time) for each pair of bullet GameObjects that touched during the
+# tick, see GameObject.swept_collision_time. Only bullets in the same grid cells (see collision_cells) are tested.
+def swept_bullet_collisions(player_1_bullets, player_2_bullets):
+    collisions = []
+    if len(player_1_bullets) == 0 or len(player_2_bullets) == 0:
+        return collisions
+    grid = dict()
+    for j, bullet2 in enumerate(player_2_bullets):
+        for cell in bullet2.get_collision_cells(True):
+            grid.setdefault(cell, []).append(j)
+    for i, bullet1 in enumerate(player_1_bullets):
+        candidates = set()
+        for cell in bullet1.get_collision_cells(True):
+            candidates.update(grid.get(cell, ()))
+        for j in candidates:
+            t = bullet1.swept_collision_time(player_2_bullets[j])
+            if t is not None:
+                collisions.append((i, j, t))
+    return collisions
+
+
+# Change how many ticks a second the game runs at, keeping every turn the same length of time (0.25 seconds by
+# default). Only rates that give a whole number of ticks per turn work. Below the default rate use swept collisions
+# (Match swept_collisions) or bullets can skip through ships between ticks.
+def set_tick_rate(config, tick_rate):
+    ticks_per_turn = config.match.ticks_per_turn * tick_rate / config.match.tick_rate
+    if ticks_per_turn < 1 or ticks_per_turn != int(ticks_per_turn):
+        raise ValueError("tick rate %d doesn't give a whole number of ticks per turn (%d ticks per turn at %d ticks "
+                         "a second)" % (tick_rate, config.match.ticks_per_turn, config.match.tick_rate))
+    config.match.tick_rate = tick_rate
+    config.match.ticks_per_turn = int(ticks_per_turn)
+
+
+class PlayerObject(GameObject):
+    __slots__ = ["name", "torpedoes", "phasers", "fired_last_turn"]
+
+    def __init__(self, config, name, image, x, y):
+        GameObject.__init__(self, config, ObjectType.ship, image, config.player.health, x, y, 0, 0)
+        self.name = name
+        self.torpedoes = config.player.torpedoes
+        self.phasers = config.player.phasers
+        self.fired_last_turn = False
+
+
+class ObjectPool:
+    """
+    Free list of game objects of one kind (type and image) that are out of play. Bullets and explosions are taken from
+    their pool and go back to it once removed, so a long match with constant fire stops making new objects.
+    - config: battlebotsconfig.Config for the match
+    - obj_type, image: what kind of objects the pool has
+    """
+
+    def __init__(self, config, obj_type, image):
+        self.config = config
+        self.obj_type = obj_type
+        self.image = image
+        self.free = []
+
+    def acquire(self, health, x, y, direction, speed):
+        if len(self.free) > 0:
+            obj = self.free.pop()
+            obj.reset(health, x, y, direction, speed)
+            return obj
+        obj = GameObject(self.config, self.obj_type, self.image, health, x, y, direction, speed)
+        obj.pool = self
+        return obj
+
+    def release(self, obj):
+        self.free.append(obj)
+
+
+# Load the game's images, these are needed for collision sizes even when nothing is drawn. They come from the asset
+# cache so calling this for every match doesn't load them again. Call it after setting the display mode so they are
+# converted to the display's pixel format.
+def load_images(config):
+    images = dict()
+    images['p1'] = battlebotsassets.load_image('p1.png')
+    images['p2'] = battlebotsassets.load_image('p2.png')
+    images['b1'] = battlebotsassets.load_image('b1.png')
+    images['torpedo'] = battlebotsassets.load_image('torpedo.png')
+    images['e1'] = battlebotsassets.load_image('e1.png')
+    images['e2'] = battlebotsassets.load_image('e2.png')
+
+    config.phaser.width = images['b1'].get_rect().width
+    config.phaser.height = images['b1'].get_rect().height
+    config.torpedo.width = images['torpedo'].get_rect().width
+    config.torpedo.height = images['torpedo'].get_rect().height
+    return images
+
+
+def get_image_for_bot(image_name, bot_module_name, config):
+    if image_name is None:
+        return None
+
+    # Try loading the image name returned from bot.
+    if os.path.exists(image_name):
+        image = battlebotsassets.load_image(image_name)
+        if image.get_rect().width == config.player.width and image.get_rect().height == config.player.height:
+            return image
+
+    # Try seeing if it's in the directory where the bot module was loaded from.
+    mlist = bot_module_name.split(".")
+    mlist.pop()
+    if len(mlist) > 0:
+        another_path = ""
+        for e in mlist:
+            another_path += e
+            another_path += "/"
+        another_path += image_name
+        if os.path.exists(another_path):
+            image = battlebotsassets.load_image(another_path)
+            if image.get_rect().width == config.player.width or image.get_rect().height == config.player.height:
+                return image
+
+    print("Unable to find correct size image %s for bot %s, using default" % (image_name, bot_module_name))
+    return None
+
+
+# Utility method to remove list of elements from a list (can this be done easier with a splice?)
+def remove_elements(the_list, elements_to_remove):
+    for element in elements_to_remove:
+        try:
+            the_list.remove(element)
+        except ValueError:
+            pass
+
+
+# Remove the objects for which removing(obj) is True from a list, keeping the rest in order, in one pass. Removed
+# objects go back to their pool.
+def remove_objects(the_list, removing):
+    kept = 0
+    for obj in the_list:
+        if removing(obj):
+            if obj.pool is not None:
+                obj.pool.release(obj)
+        else:
+            the_list[kept] = obj
+            kept += 1
+    del the_list[kept:]
+
+
+# Grid cells (see COLLISION_CELL_SIZE) that a box covers, two boxes can only collide if they share a cell.
+def collision_cells(left, top, width, height):
+    cells = []
+    for cell_x in range(left // COLLISION_CELL_SIZE, (left + width - 1) // COLLISION_CELL_SIZE + 1):
+        for cell_y in range(top // COLLISION_CELL_SIZE, (top + height - 1) // COLLISION_CELL_SIZE + 1):
+            cells.append((cell_x, cell_y))
+    return cells
+
+
+class GameObjectProjectiles(battlebotspublic.Projectiles):
+    """
+    battlebotspublic.Projectiles for a list of bullet GameObjects, gathered into arrays the first time one of the
+    fields is used. Bots that never look at projectiles don't pay for them.
+    - bullets: the player's list of bullets
+    - torpedo_image: images['torpedo'], how torpedoes are told from phasers
+    """
+
+    def __init__(self, bullets, torpedo_image):
+        self._bullets = bullets
+        self._torpedo_image = torpedo_image
+
+    # Only called for attributes that aren't set yet
+    def __getattr__(self, name):
+        if name not in battlebotspublic.Projectiles.fields:
+            raise AttributeError(name)
+        bullets = self._bullets
+        torpedo_image = self._torpedo_image
+        battlebotspublic.Projectiles.__init__(
+            self, array.array('d', [bullet.x for bullet in bullets]),
+            array.array('d', [bullet.y for bullet in bullets]),
+            array.array('d', [bullet.direction for bullet in bullets]),
+            array.array('d', [bullet.speed for bullet in bullets]),
+            array.array('q', [bullet.health for bullet in bullets]),
+            array.array('b', [ProjectileType.torpedo if bullet.image is torpedo_image else ProjectileType.phaser
+                              for bullet in bullets]))
+        return getattr(self, name)
+
+
+def remove_bullets_outside_arena(bullets):
+    if isinstance(bullets, list):
+        remove_objects(bullets, GameObject.left_arena)
+    else:
+        bullets.remove_outside_arena()
+
+
+def update_object_list(the_list):
+    remove_objects(the_list, GameObject.update)
+
+
+class Match:
+    """
+    A single match between two bots. All of the match state lives here, so any number of matches can be run in one
+    process. Nothing is drawn; battlebots.py renders a Match, other callers can just run() it.
+    - player_1_ai, player_2_ai: bot instances (battlebotspublic.PlayerBot)
+    - config: battlebotsconfig.Config for the match
+    - images: images from load_images(), used for collision sizes
+    - sounds: optional dict of pygame.mixer.Sound (see battlebotsassets.load_sounds), nothing is played when None
+    - player_1_image, player_2_image: optional ship images, defaults are used when None
+    - skip_countdown: start the match where the countdown would end, for matches nobody is watching
+    - projectile_store: keep each player's bullets in a battlebotsprojectiles.ProjectileStore (needs NumPy) instead of
+      a list of GameObjects, much faster when there are a lot of bullets in flight
+    - swept_collisions: test collisions along the path objects took during the tick instead of only where they ended
+      up, so nothing can pass through a ship when running at a low tick rate (see set_tick_rate), and take them in
+      the order they happened (see resolve_swept_collisions). Results differ from a match without them.
+    A battlebotsreplay.MatchRecorder can be attached as match.recorder to record every tick, and a
+    battlebotsprofile.MatchProfiler as match.profiler to time each phase of the tick and the bots' turns.
+    """
+
+    def __init__(self, player_1_ai, player_2_ai, config, images, sounds=None, player_1_image=None,
+                 player_2_image=None, skip_countdown=False, projectile_store=False, swept_collisions=False):
+        self.config = config
+        self.images = images
+        self.sounds = sounds
+        self.swept_collisions = swept_collisions
+
+        self.projectile_store = projectile_store
+        if projectile_store:
+            import battlebotsprojectiles
+            self.player_1_bullets = battlebotsprojectiles.ProjectileStore(config, images)
+            self.player_2_bullets = battlebotsprojectiles.ProjectileStore(config, images)
+        else:
+            self.player_1_bullets = []
+            self.player_2_bullets = []
+        self.powerups = []
+        self.effects = []
+        # Bullets and explosions are reused (see ObjectPool)
+        self.pools = {'b1': ObjectPool(config, ObjectType.bullet, images['b1']),
+                      'torpedo': ObjectPool(config, ObjectType.bullet, images['torpedo']),
+                      'e1': ObjectPool(config, ObjectType.none, images['e1']),
+                      'e2': ObjectPool(config, ObjectType.none, images['e2'])}
+
+        self.player_1_ai = player_1_ai
+        self.player_2_ai = player_2_ai
+        if player_1_image is None:
+            player_1_image = images['p1']
+        self.player_1_ship = PlayerObject(config, player_1_ai.get_name(), player_1_image,
+                                          config.arena.start1x, config.arena.start1y)
+        if player_2_image is None:
+            player_2_image = images['p2']
+        self.player_2_ship = PlayerObject(config, player_2_ai.get_name(), player_2_image,
+                                          config.arena.start2x, config.arena.start2y)
+
+        self.state = States.pre
+        self.seconds_passed = 0
+        self.quarter_seconds_passed = 0
+        self.frame = 0
+        self.exit_delay = config.match.exit_delay
+        self.done = False
+        self.recorder = None
+        self.profiler = None
+        if skip_countdown:
+            self.seconds_passed = config.match.count_secs + 1
+
+    def play_sound(self, name):
+        if self.sounds is not None:
+            self.sounds[name].play()
+
+    # Seconds left in the match (the countdown is included in the match clock)
+    def time_left(self):
+        return (self.config.match.match_secs + self.config.match.count_secs) - self.seconds_passed
+
+    def finished(self):
+        return self.state > States.battle
+
+    # CREATE EXPLOSION OBJECT
+    def make_explosion(self, obj):
+        image_name = 'e1' if obj is not self.player_1_ship and obj is not self.player_2_ship else 'e2'
+        return self.make_explosion_at(obj.x, obj.y, image_name)
+
+    def make_explosion_at(self, x, y, image_name):
+        exp = self.pools[image_name].acquire(0, x, y, 0, 0)
+        exp.ticks_before_removal = 10
+        return exp
+
+    # Gather turn info
+    # projectiles is what projectiles() returned this turn, so both bots share one view of each player's projectiles
+    def turn_info(self, player, other_player, projectiles=None):
+        if projectiles is None:
+            projectiles = self.projectiles()
+        mine, enemy = projectiles if player is self.player_1_ship else reversed(projectiles)
+        return battlebotspublic.TurnInfo(enemy_x=other_player.x, enemy_y=other_player.y,
+                                         enemy_direction=other_player.direction, enemy_speed=other_player.speed,
+                                         enemy_health=other_player.health,
+                                         enemy_muzzle_flash=other_player.fired_last_turn,
+                                         my_torpedoes=player.torpedoes, my_phasers=player.phasers, my_x=player.x,
+                                         my_y=player.y, my_direction=player.direction, my_speed=player.speed,
+                                         my_health=player.health, time_left=self.time_left(),
+                                         my_projectiles=mine, enemy_projectiles=enemy)
+
+    # Player 1's and player 2's projectiles as battlebotspublic.Projectiles. A ProjectileStore's arrays are handed out
+    # as read-only memoryviews of their slices (nothing copied), a list of GameObjects is only gathered into arrays if
+    # a bot looks.
+    def projectiles(self):
+        views = []
+        for bullets in (self.player_1_bullets, self.player_2_bullets):
+            if isinstance(bullets, list):
+                views.append(GameObjectProjectiles(bullets, self.images['torpedo']))
+            else:
+                n = bullets.count
+                views.append(battlebotspublic.Projectiles(bullets.x[:n], bullets.y[:n], bullets.direction[:n],
+                                                          bullets.speed[:n], bullets.damage[:n], bullets.type[:n]))
+        return views
+
+    # GIVE PLAYER A TURN
+    def player_turn(self, player, player_ai, other_player):
+        # Send info to player AI & get back turn action
+        action = player_ai.take_turn(self.turn_info(player, other_player))
+        return action
+
+    # Both players' turns. Bots running in worker processes (battlebotsworkers.BotProcess) are both handed their turn
+    # before waiting on either answer, so they think at the same time. With a profiler the time each bot took is
+    # recorded, for bots in worker processes that's the time the worker reports (turn_time). A bot that raises an
+    # exception (or whose worker reports one) gets None for its action, see forfeit().
+    def player_turns(self):
+        profiler = self.profiler
+        projectiles = self.projectiles()
+        turns = [(self.player_1_ai, self.turn_info(self.player_1_ship, self.player_2_ship, projectiles)),
+                 (self.player_2_ai, self.turn_info(self.player_2_ship, self.player_1_ship, projectiles))]
+        crashed = [False, False]
+        for player, (player_ai, info) in enumerate(turns):
+            if hasattr(player_ai, 'begin_turn'):
+                try:
+                    player_ai.begin_turn(info)
+                except Exception:
+                    crashed[player] = True
+                    traceback.print_exc()
+        actions = []
+        for player, (player_ai, info) in enumerate(turns):
+            if crashed[player]:
+                actions.append(None)
+                continue
+            try:
+                if hasattr(player_ai, 'end_turn'):
+                    actions.append(player_ai.end_turn())
+                    if profiler is not None:
+                        profiler.record_turn(player, player_ai.turn_time)
+                elif profiler is not None:
+                    start = time.perf_counter()
+                    actions.append(player_ai.take_turn(info))
+                    profiler.record_turn(player, time.perf_counter() - start)
+                else:
+                    actions.append(player_ai.take_turn(info))
+            except Exception:
+                actions.append(None)
+                traceback.print_exc()
+        return actions
+
+    # A bot that raised an exception (or didn't return a TurnAction) loses the match, it's a draw if both did
+    def forfeit(self, player_1_crashed, player_2_crashed):
+        if player_1_crashed and player_2_crashed:
+            self.state = States.draw
+        elif player_1_crashed:
+            self.state = States.player_2_wins
+        else:
+            self.state = States.player_1_wins
+        for ship, crashed in [(self.player_1_ship, player_1_crashed), (self.player_2_ship, player_2_crashed)]:
+            if crashed:
+                print("%s crashed and forfeits the match" % ship.name)
+        self.play_sound('gameover')
+
+    # PROCESS THE PLAYER'S ACTIONS
+    def process_player_action(self, action, player, player_bullets):
+        config = self.config
+        action.speed = 0 if action.speed < 0 else action.speed
+        action.speed = config.player.max_speed if action.speed > config.player.max_speed else action.speed
+        player.set_direction(action.direction)
+        player.speed = action.speed
+        if action.fire_phaser and player.phasers >= 1:
+            if self.projectile_store:
+                player_bullets.add(ProjectileType.phaser, config.phaser.damage, player.x, player.y,
+                                   action.fire_direction, config.phaser.speed)
+            else:
+                player_bullets.append(self.pools['b1'].acquire(config.phaser.damage, player.x, player.y,
+                                                               action.fire_direction, config.phaser.speed))
+            player.phasers -= 1
+            player.fired_last_turn = True
+            self.play_sound('phaser')
+        elif action.fire_torpedo and player.torpedoes > 0:
+            if self.projectile_store:
+                player_bullets.add(ProjectileType.torpedo, config.torpedo.damage, player.x, player.y,
+                                   action.fire_direction, config.torpedo.speed)
+            else:
+                player_bullets.append(self.pools['torpedo'].acquire(config.torpedo.damage, player.x, player.y,
+                                                                    action.fire_direction, config.torpedo.speed))
+            player.torpedoes -= 1
+            player.fired_last_turn = True
+            self.play_sound('torpedo')
+        else:
+            player.fired_last_turn = False
+        # Player regenerates phaser energy (default is 1 per second)
+        player.phasers += config.player.phaser_charge
+
+    # UPDATE OBJECTS, CALCULATE COLLISIONS, UPDATE GAME STATE
+    def update(self, time_for_player_turn):
+        player_1_ship = self.player_1_ship
+        player_2_ship = self.player_2_ship
+        player_1_bullets = self.player_1_bullets
+        player_2_bullets = self.player_2_bullets
+        effects = self.effects
+        # Each phase is timed from where the last one ended
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+
+        # Give each player a turn if it's time
+        if self.state == States.battle and time_for_player_turn:
+            action1, action2 = self.player_turns()
+            if action1 is None or action2 is None:
+                self.forfeit(action1 is None, action2 is None)
+            else:
+                self.process_player_action(action1, player_1_ship, player_1_bullets)
+                self.process_player_action(action2, player_2_ship, player_2_bullets)
+                if self.recorder is not None:
+                    self.recorder.record_actions(action1, action2)
+            if profiler is not None:
+                start = profiler.record('bot_turns', start)
+
+        # Update all game objects
+        update_object_list(effects)
+        if self.state == States.battle:
+            player_1_ship.update()
+            player_2_ship.update()
+            update_object_list(self.powerups)
+            # With swept collisions bullets that left the arena are only removed once collisions are done, they may
+            # have hit something on the way out.
+            if self.projectile_store:
+                player_1_bullets.update(not self.swept_collisions)
+                player_2_bullets.update(not self.swept_collisions)
+            elif self.swept_collisions:
+                for bullet in player_1_bullets + player_2_bullets:
+                    bullet.update()
+            else:
+                update_object_list(player_1_bullets)
+                update_object_list(player_2_bullets)
+        if profiler is not None:
+            start = profiler.record('update_objects', start)
+
+        # Check for collisions
+        player_1_died = False
+        player_2_died = False
+        if self.state == States.battle and self.swept_collisions:
+            player_1_died, player_2_died = self.check_swept_collisions()
+            remove_bullets_outside_arena(player_1_bullets)
+            remove_bullets_outside_arena(player_2_bullets)
+            if profiler is not None:
+                profiler.record('swept_collisions', start)
+        elif self.state == States.battle:
+            # Check for ship collisions
+            if player_1_ship.collides_with(player_2_ship):
+                if player_1_ship.health > player_2_ship.health:
+                    player_2_ship.health = 0
+                    player_2_died = True
+                    player_1_ship.health -= player_2_ship.health
+                    effects.append(self.make_explosion(player_2_ship))
+                elif player_2_ship.health > player_1_ship.health:
+                    player_1_ship.health = 0
+                    player_1_died = True
+                    player_2_ship.health -= player_1_ship.health
+                    effects.append(self.make_explosion(player_1_ship))
+                else:
+                    player_1_ship.health = player_2_ship.health = 0
+                    player_1_died = player_2_died = True
+                    effects.append(self.make_explosion(player_1_ship))
+                    effects.append(self.make_explosion(player_2_ship))
+            if profiler is not None:
+                start = profiler.record('ship_collisions', start)
+
+            # Check for bullet to ship collisions
+            if self.check_bullet_hits(player_1_ship, player_2_bullets):
+                player_1_died = True
+            if self.check_bullet_hits(player_2_ship, player_1_bullets):
+                player_2_died = True
+            if profiler is not None:
+                start = profiler.record('bullet_hits', start)
+
+            # Check for bullet to bullet collisions
+            self.check_bullet_collisions(player_1_bullets, player_2_bullets)
+            if profiler is not None:
+                profiler.record('bullet_collisions', start)
+
+            # Check for ship / powerup collisions
+            # TODO
+
+        # Did anyone die?
+        if player_1_died and player_2_died:
+            self.state = States.draw
+            self.play_sound('gameover')
+        elif player_1_died and not player_2_died:
+            self.state = States.player_2_wins
+            self.play_sound('gameover')
+        elif player_2_died and not player_1_died:
+            self.state = States.player_1_wins
+            self.play_sound('gameover')
+
+        # Is time up for the match?
+        if self.state == States.battle:
+            if self.time_left() <= 0:
+                if player_1_ship.health > player_2_ship.health:
+                    self.state = States.player_1_wins
+                    self.play_sound('gameover')
+                elif player_2_ship.health > player_1_ship.health:
+                    self.state = States.player_2_wins
+                    self.play_sound('gameover')
+                else:
+                    self.state = States.draw
+                    self.play_sound('gameover')
+
+    # With swept collisions: the ship collisions, bullet hits and bullet to bullet collisions of the tick, taken in the
+    # order they happened (see resolve_swept_collisions). Returns whether each ship was destroyed.
+    def check_swept_collisions(self):
+        ships = [self.player_1_ship, self.player_2_ship]
+        bullets = [self.player_1_bullets, self.player_2_bullets]
+        collisions = []
+        t = ships[0].swept_collision_time(ships[1])
+        if t is not None:
+            collisions.append((t, SweptCollision.ships, 0, 0))
+        if self.projectile_store:
+            for j, t in zip(*[a.tolist() for a in bullets[1].hit_times(ships[0])]):
+                collisions.append((t, SweptCollision.hit_ship_1, 0, j))
+            for i, t in zip(*[a.tolist() for a in bullets[0].hit_times(ships[1])]):
+                collisions.append((t, SweptCollision.hit_ship_2, i, 0))
+            for i, j, t in zip(*[a.tolist() for a in bullets[0].collision_times(bullets[1])]):
+                collisions.append((t, SweptCollision.projectiles, i, j))
+        else:
+            for j, bullet in enumerate(bullets[1]):
+                t = ships[0].swept_collision_time(bullet)
+                if t is not None:
+                    collisions.append((t, SweptCollision.hit_ship_1, 0, j))
+            for i, bullet in enumerate(bullets[0]):
+                t = ships[1].swept_collision_time(bullet)
+                if t is not None:
+                    collisions.append((t, SweptCollision.hit_ship_2, i, 0))
+            for i, j, t in swept_bullet_collisions(bullets[0], bullets[1]):
+                collisions.append((t, SweptCollision.projectiles, i, j))
+        if len(collisions) == 0:
+            return False, False
+
+        if self.projectile_store:
+            damage = [bullets[0].damage[:bullets[0].count].tolist(), bullets[1].damage[:bullets[1].count].tolist()]
+        else:
+            damage = [[bullet.health for bullet in bullets[0]], [bullet.health for bullet in bullets[1]]]
+        health, died, happened = resolve_swept_collisions(collisions, [ships[0].health, ships[1].health], *damage)
+        ships[0].health, ships[1].health = health
+
+        removed = [set(), set()]
+        for t, kind, i, j in happened:
+            if kind == SweptCollision.ships:
+                continue
+            if kind != SweptCollision.hit_ship_2:
+                removed[1].add(j)
+            if kind != SweptCollision.hit_ship_1:
+                removed[0].add(i)
+            self.play_sound('hit')
+        for player in range(2):
+            for i in sorted(removed[player]):
+                if self.projectile_store:
+                    self.effects.append(self.make_explosion_at(float(bullets[player].x[i]),
+                                                               float(bullets[player].y[i]), 'e1'))
+                else:
+                    self.effects.append(self.make_explosion(bullets[player][i]))
+            if self.projectile_store:
+                bullets[player].remove(sorted(removed[player]))
+            else:
+                removing = {bullets[player][i] for i in removed[player]}
+                remove_objects(bullets[player], removing.__contains__)
+            if died[player]:
+                self.effects.append(self.make_explosion(ships[player]))
+        return died[0], died[1]
+
+    # Damage a ship with the enemy bullets hitting it, returns True if the ship was destroyed
+    def check_bullet_hits(self, ship, enemy_bullets):
+        effects = self.effects
+        died = False
+        if self.projectile_store:
+            hits = []
+            for i in enemy_bullets.hits(ship).tolist():
+                ship.health -= int(enemy_bullets.damage[i])
+                hits.append(i)
+                effects.append(self.make_explosion_at(float(enemy_bullets.x[i]), float(enemy_bullets.y[i]), 'e1'))
+                self.play_sound('hit')
+                if ship.health <= 0:
+                    ship.health = 0
+                    died = True
+                    effects.append(self.make_explosion(ship))
+                    break
+            enemy_bullets.remove(hits)
+            return died
+
+        hits = set()
+        for bullet in enemy_bullets:
+            if ship.collides_with(bullet):
+                ship.health -= bullet.health
+                hits.add(bullet)
+                effects.append(self.make_explosion(bullet))
+                self.play_sound('hit')
+                if ship.health <= 0:
+                    ship.health = 0
+                    died = True
+                    effects.append(self.make_explosion(ship))
+                    break
+        if len(hits) > 0:
+            remove_objects(enemy_bullets, hits.__contains__)
+        return died
+
+    # Bullets that hit each other are both destroyed
+    def check_bullet_collisions(self, player_1_bullets, player_2_bullets):
+        effects = self.effects
+        if self.projectile_store:
+            pairs = player_1_bullets.collisions_with(player_2_bullets)
+            for i, j in pairs:
+                effects.append(self.make_explosion_at(float(player_1_bullets.x[i]), float(player_1_bullets.y[i]),
+                                                      'e1'))
+                effects.append(self.make_explosion_at(float(player_2_bullets.x[j]), float(player_2_bullets.y[j]),
+                                                      'e1'))
+                self.play_sound('hit')
+            player_1_bullets.remove([i for i, j in pairs])
+            player_2_bullets.remove([j for i, j in pairs])
+            return
+
+        if len(player_1_bullets) == 0 or len(player_2_bullets) == 0:
+            return
+
+        # Bucket player 2's bullets by grid cell so each of player 1's bullets is only tested against the bullets
+        # near it instead of all of them.
+        grid = dict()
+        for j, bullet2 in enumerate(player_2_bullets):
+            for cell in bullet2.get_collision_cells():
+                grid.setdefault(cell, []).append(j)
+
+        # Each of player 1's bullets takes out the first (in firing order) of player 2's bullets it hits that hasn't
+        # been taken out already.
+        removed_1 = set()
+        removed_2 = set()
+        for bullet1 in player_1_bullets:
+            candidates = set()
+            for cell in bullet1.get_collision_cells():
+                candidates.update(grid.get(cell, ()))
+            for j in sorted(candidates):
+                bullet2 = player_2_bullets[j]
+                if bullet2 in removed_2:
+                    continue
+                if bullet1.collides_with(bullet2):
+                    removed_1.add(bullet1)
+                    removed_2.add(bullet2)
+                    effects.append(self.make_explosion(bullet1))
+                    effects.append(self.make_explosion(bullet2))
+                    self.play_sound('hit')
+                    break
+
+        if len(removed_1) > 0:
+            remove_objects(player_1_bullets, removed_1.__contains__)
+            remove_objects(player_2_bullets, removed_2.__contains__)
+
+    # ADVANCE THE MATCH ONE TICK
+    def step(self):
+        config = self.config
+        turn = self.frame % config.match.ticks_per_turn == 0
+        self.update(turn)
+        # Countdown is over, let the bots fight
+        if self.state == States.pre and config.match.count_secs - self.seconds_passed < 0:
+            self.state = States.battle
+
+        self.frame += 1
+        if self.frame % config.match.ticks_per_turn == 0:
+            self.quarter_seconds_passed += 1
+        if self.frame == config.match.tick_rate:
+            self.frame = 0
+            self.seconds_passed += 1
+            # Play horn sound when match begins
+            if self.seconds_passed == config.match.count_secs:
+                self.play_sound('horn')
+            # Play ticking sounds when match is almost over
+            if self.state == States.battle:
+                if self.time_left() == config.match.bell_secs:
+                    self.play_sound('bell')
+            elif self.state > States.battle:
+                self.exit_delay -= 1
+                if self.exit_delay <= 0:
+                    self.done = True
+
+        if self.recorder is not None:
+            self.recorder.record_tick(self)
+        if self.profiler is not None:
+            self.profiler.record_tick(self)
+
+    # Run the match until it is decided, as fast as possible
+    def run(self):
+        while not self.finished():
+            self.step()
+        return self.result()
+
+    # Stop the bots running in worker processes, if any
+    def close(self):
+        for player_ai in [self.player_1_ai, self.player_2_ai]:
+            if hasattr(player_ai, 'close'):
+                player_ai.close()
+
+    def result(self):
+        return MatchResult(self.state, self.player_1_ship.name, self.player_2_ship.name,
+                           self.player_1_ship.health, self.player_2_ship.health, self.seconds_passed)
+
+
+# Import a bot module and create its bot. Each bot gets its own deep copy of the config, so a bot changing its config
+# (config.player.max_speed = ...) can't change the rules of its match or of later matches played in the same process.
+def load_bot(bot_module_name, config):
+    bot_lib = importlib.import_module(bot_module_name)
+    return bot_lib.MyBot(copy.deepcopy(config))
+
+
+class BrokenBot(battlebotspublic.PlayerBot):
+    """
+    Stands in for a bot that raised an exception while it was being loaded (importing its module, MyBot(),
+    get_name() or get_image()), so it loses the match on its first turn instead of stopping whoever is running it.
+    - bot_module_name: the bot's module, used as its name
+    """
+
+    def __init__(self, bot_module_name):
+        battlebotspublic.PlayerBot.__init__(self, None)
+        self.name = bot_module_name
+
+    def get_name(self):
+        return self.name
+
+    def take_turn(self, info):
+        return None
+
+
+# A bot for create_match() and its image, a BrokenBot if it can't be loaded
+def load_match_bot(bot_module_name, config, bot_processes):
+    player_ai = None
+    try:
+        if bot_processes:
+            import battlebotsworkers
+            player_ai = battlebotsworkers.BotProcess(bot_module_name, config, pool=battlebotsworkers.worker_pool)
+        else:
+            player_ai = load_bot(bot_module_name, config)
+        player_ai.get_name()
+        return player_ai, get_image_for_bot(player_ai.get_image(), bot_module_name, config)
+    except Exception:
+        traceback.print_exc()
+        if hasattr(player_ai, 'close'):
+            player_ai.close()
+        print("Unable to load bot %s" % bot_module_name)
+        return BrokenBot(bot_module_name), None
+
+
+# Create a match between two bot modules (ex: 'samplebot1' or 'bots.samplebot1'). With bot_processes each bot runs
+# in its own worker process with config.match.turn_timeout seconds for each turn, call close() on the match when done.
+# The worker processes are kept for the next match (battlebotsworkers.worker_pool), the bots themselves are new.
+# A bot that can't be loaded loses the match (see BrokenBot).
+def create_match(player_1_module, player_2_module, config, images, sounds=None, skip_countdown=False,
+                 projectile_store=False, swept_collisions=False, bot_processes=False):
+    player_1_ai, player_1_image = load_match_bot(player_1_module, config, bot_processes)
+    player_2_ai, player_2_image = load_match_bot(player_2_module, config, bot_processes)
+    return Match(player_1_ai, player_2_ai, config, images, sounds=sounds, player_1_image=player_1_image,
+                 player_2_image=player_2_image, skip_countdown=skip_countdown, projectile_store=projectile_store,
+                 swept_collisions=swept_collisions)
+
+
+# Run a match between two bot modules without a display or sound and return its MatchResult. With replay_file the
+# match is recorded and saved there for replay.py, with profile_file it's profiled and the battlebotsprofile summary
+# saved there as JSON. bot_processes is the same as for create_match().
+def run_match(player_1_module, player_2_module, config=None, images=None, projectile_store=False,
+              swept_collisions=False, replay_file=None, bot_processes=False, profile_file=None):
+    if config is None:
+        config = battlebotsconfig.Config()
+    if images is None:
+        images = load_images(config)
+    match = create_match(player_1_module, player_2_module, config, images, skip_countdown=True,
+                         projectile_store=projectile_store, swept_collisions=swept_collisions,
+                         bot_processes=bot_processes)
+    recorder = None
+    if replay_file is not None:
+        import battlebotsreplay
+        recorder = battlebotsreplay.MatchRecorder(match)
+    profiler = None
+    if profile_file is not None:
+        import battlebotsprofile
+        profiler = battlebotsprofile.MatchProfiler(match)
+    try:
+        result = match.run()
+    finally:
+        match.close()
+    if recorder is not None:
+        recorder.save(replay_file)
+    if profiler is not None:
+        profiler.save(profile_file)
+    return result
@@ -0,0 +1,253 @@
+import random
+import multiprocessing
+import numpy
+import battlebotsconfig
+import battlebotspublic
+import battlebotsengine
+from battlebotsengine import States
+
+# What's in an observation, in order: the TurnInfo the bot being trained would get for the turn
+OBSERVATION_FIELDS = ['enemy_x', 'enemy_y', 'enemy_direction', 'enemy_speed', 'enemy_health', 'enemy_muzzle_flash',
+                      'my_torpedoes', 'my_phasers', 'my_x', 'my_y', 'my_direction', 'my_speed', 'my_health',
+                      'time_left']
+
+# What's in an action, in order: the TurnAction to take
+ACTION_FIELDS = ['direction', 'speed', 'fire_direction', 'fire_phaser', 'fire_torpedo']
+
+
+def observation(info):
+    return numpy.array([float(getattr(info, name)) for name in OBSERVATION_FIELDS])
+
+
+# A TurnAction from an action array / sequence in ACTION_FIELDS order (a TurnAction is used as it is)
+def turn_action(action):
+    if isinstance(action, battlebotspublic.TurnAction):
+        return action
+    direction, speed, fire_direction, fire_phaser, fire_torpedo = action
+    return battlebotspublic.TurnAction(float(direction), float(speed), float(fire_direction), bool(fire_phaser),
+                                       bool(fire_torpedo))
+
+
+class AgentBot(battlebotspublic.PlayerBot):
+    """
+    The player being trained, it takes whatever action BattleBotsEnv.step() was given.
+    """
+
+    def __init__(self, config, name="Agent"):
+        battlebotspublic.PlayerBot.__init__(self, config)
+        self.name = name
+        self.action = None
+
+    def get_name(self):
+        return self.name
+
+    def take_turn(self, info):
+        return self.action
+
+
+class BattleBotsEnv:
+    """
+    Gym style environment for training a bot: reset() starts a match against a scripted opponent and each step(action)
+    plays one turn (config.match.ticks_per_turn ticks), as fast as possible with no display. Observations are the
+    TurnInfo for the next turn as an array (see OBSERVATION_FIELDS), actions are TurnActions or arrays in
+    ACTION_FIELDS order. Follows the gymnasium API: reset() returns (observation, info), step() returns
+    (observation, reward, terminated, truncated, info).
+    The reward for a step is the damage done to the enemy less the damage taken, plus win_reward when the match is won
+    (or minus it when lost). The info dict of the last step of a match has its battlebotsengine.MatchResult as
+    'result'.
+    - opponent: opponent's bot module (ex: 'samplebot1')
+    - config: battlebotsconfig.Config, read from config.ini when None
+    - images: images from battlebotsengine.load_images(), loaded when None
+    - agent_player: 1 or 2, which side the bot being trained plays
+    - match_options: more Match arguments (ex: dict(projectile_store=True))
+    """
+
+    def __init__(self, opponent='samplebot1', config=None, images=None, agent_player=1, win_reward=10.0,
+                 match_options=None):
+        if config is None:
+            config = battlebotsconfig.Config()
+        if images is None:
+            images = battlebotsengine.load_images(config)
+        self.opponent = opponent
+        self.config = config
+        self.images = images
+        self.agent_player = agent_player
+        self.win_reward = win_reward
+        self.match_options = match_options or dict()
+        self.match = None
+        self.agent = None
+
+    def ships(self):
+        if self.agent_player == 1:
+            return self.match.player_1_ship, self.match.player_2_ship
+        return self.match.player_2_ship, self.match.player_1_ship
+
+    # Play the match up to the next turn (or its end), returns the observation for it
+    def advance(self):
+        match = self.match
+        ticks_per_turn = self.config.match.ticks_per_turn
+        while not match.finished() and not (match.state == States.battle and match.frame % ticks_per_turn == 0):
+            match.step()
+        agent_ship, enemy_ship = self.ships()
+        return observation(match.turn_info(agent_ship, enemy_ship))
+
+    def reset(self, seed=None, options=None):
+        # Bots using the random module are seeded through it
+        if seed is not None:
+            random.seed(seed)
+        self.agent = AgentBot(self.config)
+        opponent = battlebotsengine.load_bot(self.opponent, self.config)
+        if self.agent_player == 1:
+            player_1_ai, player_2_ai = self.agent, opponent
+        else:
+            player_1_ai, player_2_ai = opponent, self.agent
+        self.match = battlebotsengine.Match(player_1_ai, player_2_ai, self.config, self.images, skip_countdown=True,
+                                            **self.match_options)
+        return self.advance(), dict()
+
+    def step(self, action):
+        match = self.match
+        agent_ship, enemy_ship = self.ships()
+        agent_health = agent_ship.health
+        enemy_health = enemy_ship.health
+        self.agent.action = turn_action(action)
+        match.step()
+        obs = self.advance()
+
+        reward = float((enemy_health - enemy_ship.health) - (agent_health - agent_ship.health))
+        info = dict()
+        terminated = match.finished()
+        if terminated:
+            result = match.result()
+            info['result'] = result
+            winner = result.exit_value()
+            if winner == self.agent_player:
+                reward += self.win_reward
+            elif winner != 3:
+                reward -= self.win_reward
+        return obs, reward, terminated, False, info
+
+    def close(self):
+        self.match = None
+
+
+class VectorEnv:
+    """
+    Many BattleBotsEnvs stepped together in this process. Observations, rewards and so on are arrays with a row for each
+    environment. An environment whose match ends is reset straight away, the info for it has the MatchResult as
+    'result' and the last observation of the match as 'final_observation'.
+    - num_envs: number of environments
+    - the rest are passed on to each BattleBotsEnv
+    """
+
+    def __init__(self, num_envs, opponent='samplebot1', config=None, images=None, agent_player=1, win_reward=10.0,
+                 match_options=None):
+        if config is None:
+            config = battlebotsconfig.Config()
+        if images is None:
+            images = battlebotsengine.load_images(config)
+        self.num_envs = num_envs
+        self.envs = [BattleBotsEnv(opponent, config, images, agent_player, win_reward, match_options)
+                     for i in range(num_envs)]
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            random.seed(seed)
+        observations = [env.reset()[0] for env in self.envs]
+        return numpy.stack(observations), [dict() for env in self.envs]
+
+    def step(self, actions):
+        observations = []
+        rewards = numpy.zeros(self.num_envs)
+        terminated = numpy.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for i, env in enumerate(self.envs):
+            obs, rewards[i], terminated[i], truncated, info = env.step(actions[i])
+            if terminated[i]:
+                info['final_observation'] = obs
+                obs = env.reset()[0]
+            observations.append(obs)
+            infos.append(info)
+        return numpy.stack(observations), rewards, terminated, numpy.zeros(self.num_envs, dtype=bool), infos
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+# Runs in a SubprocessVectorEnv worker: a VectorEnv answering commands until told to close.
+def vector_env_worker(connection, num_envs, env_options):
+    vector_env = VectorEnv(num_envs, **env_options)
+    while True:
+        try:
+            command, argument = connection.recv()
+        except EOFError:
+            break
+        if command == 'reset':
+            connection.send(vector_env.reset(seed=argument))
+        elif command == 'step':
+            connection.send(vector_env.step(argument))
+        else:
+            break
+    vector_env.close()
+    connection.close()
+
+
+class SubprocessVectorEnv:
+    """
+    Like VectorEnv, but the environments are split over worker processes which all step at the same time, to use more
+    than one core.
+    - num_envs: number of environments in all
+    - num_workers: number of worker processes, defaults to one per CPU
+    - env_options: VectorEnv arguments for the workers (opponent, agent_player, win_reward, match_options), config and
+      images are loaded by each worker
+    """
+
+    def __init__(self, num_envs, num_workers=None, **env_options):
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        num_workers = max(1, min(num_workers, num_envs))
+        self.num_envs = num_envs
+        self.sizes = [num_envs // num_workers + (1 if i < num_envs % num_workers else 0) for i in range(num_workers)]
+        self.connections = []
+        self.processes = []
+        for size in self.sizes:
+            connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=vector_env_worker, args=(child_connection, size, env_options),
+                                              daemon=True)
+            process.start()
+            child_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def reset(self, seed=None, options=None):
+        for i, connection in enumerate(self.connections):
+            # Each worker gets its own seed so their bots don't all play the same
+            connection.send(('reset', None if seed is None else seed + i))
+        results = [connection.recv() for connection in self.connections]
+        return numpy.concatenate([obs for obs, infos in results]), [info for obs, infos in results for info in infos]
+
+    def step(self, actions):
+        start = 0
+        for size, connection in zip(self.sizes, self.connections):
+            connection.send(('step', actions[start:start + size]))
+            start += size
+        results = [connection.recv() for connection in self.connections]
+        return (numpy.concatenate([result[0] for result in results]),
+                numpy.concatenate([result[1] for result in results]),
+                numpy.concatenate([result[2] for result in results]),
+                numpy.concatenate([result[3] for result in results]),
+                [info for result in results for info in result[4]])
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+        for connection in self.connections:
+            connection.close()
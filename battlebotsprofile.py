@@ -0,0 +1,182 @@
+import json
+import time
+import bisect
+
+# Upper edges (in seconds) of the bot take_turn latency histogram buckets, the last bucket is everything slower
+LATENCY_BUCKETS = [0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1]
+
+
+class Histogram:
+    """
+    Bot take_turn latencies, counted in LATENCY_BUCKETS.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # Smallest bucket edge that at least fraction of the latencies are under, None for the last bucket or when nothing
+    # has been counted (tell them apart by count)
+    def percentile(self, fraction):
+        if self.count == 0:
+            return None
+        needed = fraction * self.count
+        seen = 0
+        for edge, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= needed:
+                return edge
+        return None
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max, 'p50': self.percentile(0.5), 'p99': self.percentile(0.99),
+                'bucket_edges': LATENCY_BUCKETS, 'buckets': self.counts}
+
+    def merge(self, summary):
+        self.counts = [a + b for a, b in zip(self.counts, summary['buckets'])]
+        self.count += summary['count']
+        self.total += summary['total']
+        self.max = max(self.max, summary['max'])
+
+
+class PhaseTimes:
+    """
+    Time spent in each phase of the game loop: total, how many times and the longest single time.
+    """
+
+    def __init__(self):
+        self.phases = dict()
+
+    def add(self, phase, seconds):
+        stats = self.phases.get(phase)
+        if stats is None:
+            self.phases[phase] = [seconds, 1, seconds]
+        else:
+            stats[0] += seconds
+            stats[1] += 1
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+    def summary(self):
+        return {phase: {'total': total, 'count': count, 'mean': total / count, 'max': longest}
+                for phase, (total, count, longest) in self.phases.items()}
+
+    def merge(self, summary):
+        for phase, stats in summary.items():
+            mine = self.phases.setdefault(phase, [0.0, 0, 0.0])
+            mine[0] += stats['total']
+            mine[1] += stats['count']
+            mine[2] = max(mine[2], stats['max'])
+
+
+class MatchProfiler:
+    """
+    Times the phases of a match (bot turns, updating objects, each kind of collision check, and render when
+    battlebots.py draws it), each bot's take_turn and counts the objects in play every tick. Attaches itself to the
+    match (match.profiler), a match without a profiler only pays for an "is None" test per phase. summary() / save()
+    give the results as JSON.
+    """
+
+    def __init__(self, match):
+        self.match = match
+        self.phases = PhaseTimes()
+        self.latencies = [Histogram(), Histogram()]
+        self.bullets = []
+        self.effects = []
+        match.profiler = self
+
+    # Add the time since start to a phase, returns the time now so the next phase can start from it
+    def record(self, phase, start):
+        now = time.perf_counter()
+        self.phases.add(phase, now - start)
+        return now
+
+    # player is 0 or 1
+    def record_turn(self, player, seconds):
+        self.latencies[player].add(seconds)
+
+    def record_tick(self, match):
+        self.bullets.append(len(match.player_1_bullets) + len(match.player_2_bullets))
+        self.effects.append(len(match.effects))
+
+    def summary(self):
+        match = self.match
+        ticks = len(self.bullets)
+        return {
+            'player_1_name': match.player_1_ship.name,
+            'player_2_name': match.player_2_ship.name,
+            'outcome': match.state,
+            'ticks': ticks,
+            'phases': self.phases.summary(),
+            'take_turn': [self.latencies[0].summary(), self.latencies[1].summary()],
+            'objects': {
+                'bullets': {'mean': sum(self.bullets) / ticks if ticks else 0.0, 'max': max(self.bullets, default=0)},
+                'effects': {'mean': sum(self.effects) / ticks if ticks else 0.0, 'max': max(self.effects, default=0)},
+            },
+            'bullets_per_tick': self.bullets,
+            'effects_per_tick': self.effects,
+        }
+
+    def save(self, file_name):
+        profile_file = open(file_name, "w")
+        json.dump(self.summary(), profile_file)
+        profile_file.close()
+
+
+class LeagueProfile:
+    """
+    Match profiles (MatchProfiler summaries) added up over a league: take_turn latencies for each bot and the time
+    spent in each phase over all matches.
+    """
+
+    def __init__(self):
+        self.bots = dict()
+        self.phases = PhaseTimes()
+        self.matches = 0
+        self.ticks = 0
+
+    # player_1 and player_2 are the names the bots are known by in the league
+    def add(self, summary, player_1, player_2):
+        self.matches += 1
+        self.ticks += summary['ticks']
+        self.phases.merge(summary['phases'])
+        for bot, latencies in zip([player_1, player_2], summary['take_turn']):
+            self.bots.setdefault(bot, Histogram()).merge(latencies)
+
+    def summary(self):
+        return {'matches': self.matches, 'ticks': self.ticks, 'phases': self.phases.summary(),
+                'take_turn': {bot: histogram.summary() for bot, histogram in self.bots.items()}}
+
+    def save(self, file_name):
+        profile_file = open(file_name, "w")
+        json.dump(self.summary(), profile_file, indent=2)
+        profile_file.close()
+
+    def print_summary(self):
+        print("Bot take_turn times (slowest first):")
+        print("%-24s %8s %10s %10s %10s" % ("bot", "turns", "mean ms", "p99 ms", "max ms"))
+        for bot, histogram in sorted(self.bots.items(), key=lambda item: -item[1].summary()['mean']):
+            summary = histogram.summary()
+            p99 = summary['p99']
+            if summary['count'] == 0:
+                p99_text = "-"
+            elif p99 is None:
+                p99_text = "slower"
+            else:
+                p99_text = "%.3f" % (p99 * 1000)
+            print("%-24s %8d %10.3f %10s %10.3f" % (bot, summary['count'], summary['mean'] * 1000, p99_text,
+                                                    summary['max'] * 1000))
+        print("Engine phases over %d matches, %d ticks:" % (self.matches, self.ticks))
+        print("%-20s %10s %12s %10s" % ("phase", "total s", "mean us", "max ms"))
+        for phase, stats in sorted(self.phases.summary().items(), key=lambda item: -item[1]['total']):
+            print("%-20s %10.3f %12.2f %10.3f" % (phase, stats['total'], stats['mean'] * 1e6, stats['max'] * 1000))
@@ -20,9 +20,12 @@ class TurnInfo:
         my_speed                Speed of your bot.
         my_health               Health of your bot.
         time_left               Number of seconds left in the match.
+        my_projectiles          Projectiles your bot has in flight (see Projectiles).
+        enemy_projectiles       Projectiles the enemy bot has in flight (see Projectiles).
     """
     def __init__(self, enemy_x, enemy_y, enemy_direction, enemy_speed, enemy_health, enemy_muzzle_flash,
-                 my_torpedoes, my_phasers, my_x, my_y, my_direction, my_speed, my_health, time_left):
+                 my_torpedoes, my_phasers, my_x, my_y, my_direction, my_speed, my_health, time_left,
+                 my_projectiles=None, enemy_projectiles=None):
         self.enemy_x = enemy_x
         self.enemy_y = enemy_y
         self.enemy_direction = enemy_direction
@@ -37,6 +40,48 @@ class TurnInfo:
         self.my_speed = my_speed
         self.my_health = my_health
         self.time_left = time_left
+        self.my_projectiles = my_projectiles
+        self.enemy_projectiles = enemy_projectiles
+
+
+# A read-only view of values (an array.array or a NumPy array), nothing is copied. Unlike a NumPy array marked
+# read-only, a read-only memoryview can't be made writable again.
+def read_only(values):
+    return memoryview(values).toreadonly()
+
+
+# One player's phasers and photon torpedoes in flight, as read-only arrays with an entry for each projectile.
+class Projectiles:
+    """
+        x, y                    (x,y) coordinates of each projectile, in the order they were fired.
+        direction               Direction each projectile is heading.
+        speed                   Speed of each projectile (pps).
+        damage                  Damage each projectile does when it hits.
+        type                    0 for a phaser, 1 for a photon torpedo.
+        * Note: The arrays are read-only memoryviews, index them like lists or wrap them with numpy.asarray(), which
+          doesn't copy them. They are made for your bot's
+          current take_turn and are only valid during it: copy what you want to keep.
+    """
+    fields = ['x', 'y', 'direction', 'speed', 'damage', 'type']
+
+    def __init__(self, x, y, direction, speed, damage, projectile_type):
+        self.x = read_only(x)
+        self.y = read_only(y)
+        self.direction = read_only(direction)
+        self.speed = read_only(speed)
+        self.damage = read_only(damage)
+        self.type = read_only(projectile_type)
+
+    def __len__(self):
+        return len(self.x)
+
+    # Bots in worker processes get a copy of the arrays (memoryviews can't be pickled, the arrays under them can)
+    def __getstate__(self):
+        return {name: getattr(self, name).obj for name in self.fields}
+
+    def __setstate__(self, state):
+        for name in self.fields:
+            setattr(self, name, read_only(state[name]))
 
 
 # Class that specifies what actions a bot should take.
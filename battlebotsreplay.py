@@ -0,0 +1,281 @@
+import sys
+import json
+import zlib
+import array
+import base64
+import struct
+import pygame
+import battlebotsassets
+import battlebotsconfig
+from battlebotsengine import States, ProjectileType
+
+# Replay file layout (all little endian):
+# - MAGIC, then the length of the JSON header (uint32) and the header itself: replay format version, bot names,
+#   outcome, the config values needed to play it back and any custom ship images.
+# - One block per array in ARRAYS: the array's typecode (1 byte), the length of its zlib compressed data (uint32)
+#   and the data.
+MAGIC = b'BBREPLAY'
+VERSION = 1
+
+# Values stored for each ship on each tick
+SHIP_FIELDS = ['x', 'y', 'direction', 'speed', 'health', 'phasers', 'torpedoes']
+
+# Every array in a replay and its typecode. Per tick values have one entry per tick, bullets and effects are stored
+# one after the other with bullet_ends / effect_ends giving where each tick's run ends.
+ARRAYS = [
+    ('states', 'B'),            # match state
+    ('seconds', 'H'),           # seconds passed
+    ('quarters', 'H'),          # quarter seconds passed
+    ('ships', 'd'),             # SHIP_FIELDS for player 1 then player 2
+    ('bullet_ends', 'I'),
+    ('bullets', 'd'),           # x, y
+    ('bullet_kinds', 'B'),      # owner (0 or 1) * 2 + ProjectileType
+    ('effect_ends', 'I'),
+    ('effects', 'd'),           # x, y
+    ('effect_kinds', 'B'),      # 0 - small explosion (e1), 1 - ship explosion (e2)
+    ('action_ticks', 'I'),      # tick each turn was taken on
+    ('actions', 'f'),           # direction, speed, fire_direction, fire_phaser, fire_torpedo for player 1 then 2
+]
+
+
+def _to_little_endian(values):
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _image_to_header(image, default_image):
+    if image is default_image:
+        return None
+    width, height = image.get_size()
+    return {'width': width, 'height': height,
+            'rgba': base64.b64encode(pygame.image.tobytes(image, 'RGBA')).decode('ascii')}
+
+
+class MatchRecorder:
+    """
+    Records a Match tick by tick (ships, bullets, effects and every TurnAction) into compact arrays, which save() writes
+    to a zlib compressed binary file that battlebotsreplay.Replay / replay.py can play back without any bot code.
+    Attaches itself to the match, so just create it before running the match.
+    """
+
+    def __init__(self, match):
+        self.match = match
+        self.ticks = 0
+        self.arrays = dict()
+        for name, typecode in ARRAYS:
+            self.arrays[name] = array.array(typecode)
+        match.recorder = self
+
+    def record_actions(self, action1, action2):
+        self.arrays['action_ticks'].append(self.ticks)
+        actions = self.arrays['actions']
+        for action in [action1, action2]:
+            actions.extend([action.direction, action.speed, action.fire_direction, bool(action.fire_phaser),
+                            bool(action.fire_torpedo)])
+
+    def record_tick(self, match):
+        arrays = self.arrays
+        arrays['states'].append(match.state)
+        arrays['seconds'].append(match.seconds_passed)
+        arrays['quarters'].append(match.quarter_seconds_passed)
+        for ship in [match.player_1_ship, match.player_2_ship]:
+            arrays['ships'].extend([ship.x, ship.y, ship.direction, ship.speed, ship.health, ship.phasers,
+                                    ship.torpedoes])
+
+        torpedo_image = match.images['torpedo']
+        bullets = arrays['bullets']
+        bullet_kinds = arrays['bullet_kinds']
+        for owner, player_bullets in enumerate([match.player_1_bullets, match.player_2_bullets]):
+            for bullet in player_bullets:
+                bullets.extend([bullet.x, bullet.y])
+                bullet_type = ProjectileType.torpedo if bullet.image is torpedo_image else ProjectileType.phaser
+                bullet_kinds.append(owner * 2 + bullet_type)
+        arrays['bullet_ends'].append(len(bullet_kinds))
+
+        ship_explosion = match.images['e2']
+        effects = arrays['effects']
+        effect_kinds = arrays['effect_kinds']
+        for effect in match.effects:
+            effects.extend([effect.x, effect.y])
+            effect_kinds.append(1 if effect.image is ship_explosion else 0)
+        arrays['effect_ends'].append(len(effect_kinds))
+        self.ticks += 1
+
+    def header(self):
+        match = self.match
+        config = match.config
+        return {
+            'version': VERSION,
+            'player_1_name': match.player_1_ship.name,
+            'player_2_name': match.player_2_ship.name,
+            'outcome': match.state,
+            'ticks': self.ticks,
+            'count_secs': config.match.count_secs,
+            'match_secs': config.match.match_secs,
+            'tick_rate': config.match.tick_rate,
+            'ticks_per_turn': config.match.ticks_per_turn,
+            'width': config.arena.width,
+            'height': config.arena.height,
+            'player_1_image': _image_to_header(match.player_1_ship.image, match.images['p1']),
+            'player_2_image': _image_to_header(match.player_2_ship.image, match.images['p2']),
+        }
+
+    def save(self, file_name):
+        header = json.dumps(self.header()).encode('utf-8')
+        replay_file = open(file_name, 'wb')
+        replay_file.write(MAGIC)
+        replay_file.write(struct.pack('<I', len(header)))
+        replay_file.write(header)
+        for name, typecode in ARRAYS:
+            data = zlib.compress(_to_little_endian(self.arrays[name]).tobytes(), 9)
+            replay_file.write(typecode.encode('ascii'))
+            replay_file.write(struct.pack('<I', len(data)))
+            replay_file.write(data)
+        replay_file.close()
+
+
+class ReplayObject:
+    """
+    A ship, bullet or effect in a replay frame, with the fields the renderer uses.
+    """
+
+    def __init__(self, image, x, y, name=None, health=0):
+        self.image = image
+        self.x = x
+        self.y = y
+        self.name = name
+        self.health = health
+
+
+class ReplayFrame:
+    """
+    One recorded tick, it has the fields battlebots.draw_match() reads from a Match so it can be drawn the same way.
+    """
+
+    def __init__(self, config, state, seconds_passed, quarter_seconds_passed, player_1_ship, player_2_ship,
+                 player_1_bullets, player_2_bullets, effects):
+        self.config = config
+        self.state = state
+        self.seconds_passed = seconds_passed
+        self.quarter_seconds_passed = quarter_seconds_passed
+        self.player_1_ship = player_1_ship
+        self.player_2_ship = player_2_ship
+        self.player_1_bullets = player_1_bullets
+        self.player_2_bullets = player_2_bullets
+        self.powerups = []
+        self.effects = effects
+
+    def time_left(self):
+        return (self.config.match.match_secs + self.config.match.count_secs) - self.seconds_passed
+
+    def finished(self):
+        return self.state > States.battle
+
+
+class Replay:
+    """
+    A recorded match loaded from a file written by MatchRecorder. Any tick can be looked at directly with frame(), so
+    playback can seek and run at any speed.
+    - images: images from battlebotsengine.load_images()
+    """
+
+    def __init__(self, file_name, images):
+        replay_file = open(file_name, 'rb')
+        data = replay_file.read()
+        replay_file.close()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s is not a battle bots replay" % file_name)
+        offset = len(MAGIC)
+        header_length, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        self.header = json.loads(data[offset:offset + header_length].decode('utf-8'))
+        offset += header_length
+        if self.header['version'] != VERSION:
+            raise ValueError("%s is replay version %d, only version %d is supported" %
+                             (file_name, self.header['version'], VERSION))
+        # Playback seeks between the first and last tick, a recording needs at least one
+        if self.header['ticks'] == 0:
+            raise ValueError("%s has no recorded ticks" % file_name)
+
+        self.arrays = dict()
+        for name, typecode in ARRAYS:
+            length, = struct.unpack_from('<I', data, offset + 1)
+            offset += 5
+            values = array.array(typecode)
+            values.frombytes(zlib.decompress(data[offset:offset + length]))
+            self.arrays[name] = _to_little_endian(values)
+            offset += length
+
+        header = self.header
+        self.config = battlebotsconfig.Config()
+        self.config.match.count_secs = header['count_secs']
+        self.config.match.match_secs = header['match_secs']
+        self.config.match.tick_rate = header['tick_rate']
+        self.config.match.ticks_per_turn = header['ticks_per_turn']
+        self.config.arena.width = header['width']
+        self.config.arena.height = header['height']
+
+        self.images = images
+        self.ship_images = [self._header_image(header['player_1_image'], images['p1']),
+                            self._header_image(header['player_2_image'], images['p2'])]
+        self.bullet_images = [images['b1'], images['torpedo']]
+        self.effect_images = [images['e1'], images['e2']]
+
+    @staticmethod
+    def _header_image(image_header, default_image):
+        if image_header is None:
+            return default_image
+        image = pygame.image.frombytes(base64.b64decode(image_header['rgba']),
+                                       (image_header['width'], image_header['height']), 'RGBA')
+        return battlebotsassets.convert_for_display(image)
+
+    def __len__(self):
+        return self.header['ticks']
+
+    def ship_state(self, tick, player):
+        start = (tick * 2 + player) * len(SHIP_FIELDS)
+        return dict(zip(SHIP_FIELDS, self.arrays['ships'][start:start + len(SHIP_FIELDS)]))
+
+    # TurnActions taken on or before a tick: list of (tick, player 1 action, player 2 action), actions being dicts of
+    # direction, speed, fire_direction, fire_phaser, fire_torpedo.
+    def actions(self, last_tick=None):
+        fields = ['direction', 'speed', 'fire_direction', 'fire_phaser', 'fire_torpedo']
+        actions = self.arrays['actions']
+        result = []
+        for i, tick in enumerate(self.arrays['action_ticks']):
+            if last_tick is not None and tick > last_tick:
+                break
+            values = actions[i * 10:i * 10 + 10]
+            action1 = dict(zip(fields, values[:5]))
+            action2 = dict(zip(fields, values[5:]))
+            for action in [action1, action2]:
+                action['fire_phaser'] = bool(action['fire_phaser'])
+                action['fire_torpedo'] = bool(action['fire_torpedo'])
+            result.append((tick, action1, action2))
+        return result
+
+    def frame(self, tick):
+        arrays = self.arrays
+        ships = []
+        for player in range(2):
+            ship = self.ship_state(tick, player)
+            name = self.header['player_1_name'] if player == 0 else self.header['player_2_name']
+            ships.append(ReplayObject(self.ship_images[player], ship['x'], ship['y'], name, int(ship['health'])))
+
+        bullets = [[], []]
+        start = arrays['bullet_ends'][tick - 1] if tick > 0 else 0
+        for i in range(start, arrays['bullet_ends'][tick]):
+            kind = arrays['bullet_kinds'][i]
+            bullets[kind // 2].append(ReplayObject(self.bullet_images[kind % 2], arrays['bullets'][i * 2],
+                                                   arrays['bullets'][i * 2 + 1]))
+
+        effects = []
+        start = arrays['effect_ends'][tick - 1] if tick > 0 else 0
+        for i in range(start, arrays['effect_ends'][tick]):
+            effects.append(ReplayObject(self.effect_images[arrays['effect_kinds'][i]], arrays['effects'][i * 2],
+                                        arrays['effects'][i * 2 + 1]))
+
+        return ReplayFrame(self.config, arrays['states'][tick], arrays['seconds'][tick], arrays['quarters'][tick],
+                           ships[0], ships[1], bullets[0], bullets[1], effects)
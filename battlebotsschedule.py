@@ -0,0 +1,139 @@
+import math
+
+# Glicko rating of a bot that hasn't played yet, and how unsure of it that is (rating deviation)
+START_RATING = 1500.0
+START_DEVIATION = 350.0
+
+Q = math.log(10) / 400
+
+
+# How much a result against an opponent whose rating is unsure of by deviation counts
+def glicko_weight(deviation):
+    return 1 / math.sqrt(1 + 3 * Q * Q * deviation * deviation / (math.pi * math.pi))
+
+
+class Ratings:
+    """
+    Glicko ratings of the bots in a tournament, updated after every match. The deviation of a rating is how unsure
+    of it we still are: a bot that hasn't played has a deviation of 350, which shrinks with every match it plays.
+    - bots: names of the bots in the tournament
+    """
+
+    def __init__(self, bots):
+        self.rating = {bot: START_RATING for bot in bots}
+        self.deviation = {bot: START_DEVIATION for bot in bots}
+
+    # Expected score (1 for a win, 0.5 for a draw) of bot against opponent
+    def expected(self, bot, opponent):
+        weight = glicko_weight(self.deviation[opponent])
+        return 1 / (1 + 10 ** (-weight * (self.rating[bot] - self.rating[opponent]) / 400))
+
+    # ecode is the battlebots.py exit code (1 - player 1 wins, 2 - player 2 wins, 3 - draw)
+    def add_result(self, player1, player2, ecode):
+        score = {1: 1.0, 2: 0.0, 3: 0.5}[ecode]
+        updates = []
+        for bot, opponent, bot_score in [(player1, player2, score), (player2, player1, 1 - score)]:
+            weight = glicko_weight(self.deviation[opponent])
+            expected = self.expected(bot, opponent)
+            precision = 1 / self.deviation[bot] ** 2 + Q * Q * weight * weight * expected * (1 - expected)
+            updates.append((bot, self.rating[bot] + Q / precision * weight * (bot_score - expected),
+                            math.sqrt(1 / precision)))
+        for bot, rating, deviation in updates:
+            self.rating[bot] = rating
+            self.deviation[bot] = deviation
+
+    # Bots from best to worst rating
+    def ranking(self):
+        return sorted(self.rating, key=lambda bot: (-self.rating[bot], bot))
+
+
+# Rounds for a Swiss or adaptive tournament of number_of_bots: twice as many as it takes a knockout to find a winner,
+# so about n log n matches in all
+def default_rounds(number_of_bots):
+    return 2 * max(1, math.ceil(math.log2(max(2, number_of_bots))))
+
+
+# How many matches each bot has played, and how many of them as player 1. played has an entry for each
+# (player1, player2) match played.
+def games_played(bots, played):
+    games = {bot: 0 for bot in bots}
+    as_player_1 = {bot: 0 for bot in bots}
+    for player1, player2 in played:
+        games[player1] += 1
+        games[player2] += 1
+        as_player_1[player1] += 1
+    return games, as_player_1
+
+
+# The match bot and opponent should play: a seat they haven't played in yet, player 1 being whoever has been player 1
+# less often. None if they've already played each other both ways round.
+def seat(bot, opponent, played, as_player_1):
+    seats = [(bot, opponent), (opponent, bot)]
+    if as_player_1[opponent] < as_player_1[bot]:
+        seats.reverse()
+    for match in seats:
+        if match not in played:
+            return match
+    return None
+
+
+# Pairings for the next round of a Swiss tournament. Bots are ranked by points (then rating) and each is paired with
+# the next best bot it hasn't played yet, so bots meet others on the same score and the ranking sorts itself out in
+# a few rounds. With an odd number of bots the lowest ranked of those with the most matches sits the round out. A bot
+# that has played everyone left sits out too.
+# - points: the tournament points of each bot
+# - ratings: Ratings, to break ties on points
+# - played: (player1, player2) matches played so far
+def swiss_pairings(bots, points, ratings, played):
+    ranked = sorted(bots, key=lambda bot: (-points[bot], -ratings.rating[bot], bot))
+    games, as_player_1 = games_played(bots, played)
+    if len(ranked) % 2 == 1:
+        most = max(games.values())
+        ranked.remove([bot for bot in ranked if games[bot] == most][-1])
+
+    pairings = []
+    unpaired = ranked
+    while len(unpaired) > 1:
+        bot = unpaired[0]
+        # Rather someone it's never met, otherwise the other way round of a match already played
+        opponents = [opponent for opponent in unpaired[1:]
+                     if (bot, opponent) not in played and (opponent, bot) not in played]
+        if len(opponents) == 0:
+            opponents = [opponent for opponent in unpaired[1:] if seat(bot, opponent, played, as_player_1) is not None]
+        if len(opponents) == 0:
+            unpaired = unpaired[1:]
+            continue
+        match = seat(bot, opponents[0], played, as_player_1)
+        pairings.append(match)
+        as_player_1[match[0]] += 1
+        unpaired = [other for other in unpaired[1:] if other != opponents[0]]
+    return pairings
+
+
+# Pairings for the next round of an adaptive tournament: the matches that tell us the most about the ranking, those
+# between bots whose ratings are least certain and whose result is hardest to call, picked greedily.
+# - ratings: Ratings of the bots so far
+# - played: (player1, player2) matches played so far
+def adaptive_pairings(bots, ratings, played):
+    games, as_player_1 = games_played(bots, played)
+    candidates = []
+    for i, bot in enumerate(bots):
+        for opponent in bots[i + 1:]:
+            if (bot, opponent) in played and (opponent, bot) in played:
+                continue
+            expected = ratings.expected(bot, opponent)
+            uncertainty = ratings.deviation[bot] ** 2 + ratings.deviation[opponent] ** 2
+            candidates.append((uncertainty * expected * (1 - expected), bot, opponent))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+
+    pairings = []
+    paired = set()
+    for information, bot, opponent in candidates:
+        if bot in paired or opponent in paired:
+            continue
+        match = seat(bot, opponent, played, as_player_1)
+        pairings.append(match)
+        as_player_1[match[0]] += 1
+        paired.add(bot)
+        paired.add(opponent)
+    return pairings
@@ -0,0 +1,294 @@
+import os
+import json
+import queue
+import bisect
+import threading
+import http.server
+
+# Seconds between keep alive comments on an idle event stream, so dropped spectators are noticed
+KEEP_ALIVE_SECS = 15
+
+# Which standings column each exit code (1 - player 1 wins, 2 - player 2 wins, 3 - draw) adds to for each player
+OUTCOMES = {1: ('wins', 'losses'), 2: ('losses', 'wins'), 3: ('draws', 'draws')}
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <meta charset="utf-8">
+    <title>Battle Bots Results</title>
+    <link href="minimal-table.css" rel="stylesheet" type="text/css">
+    <style>
+      td.win { background-color: rgb(190,235,190) !important; }
+      td.loss { background-color: rgb(240,190,190) !important; }
+      td.draw { background-color: rgb(235,235,190) !important; }
+      #status { color: gray; }
+    </style>
+  </head>
+  <body>
+    <center>
+    <h1>Battle Bots Results</h1>
+    <table>
+      <caption>Points: (2 points for a win, 1 point for draw, 0 for loss)</caption>
+      <thead><tr><th>#</th><th>NAME</th><th>POINTS</th><th>WINS</th><th>DRAWS</th><th>LOSSES</th></tr></thead>
+      <tbody id="standings"></tbody>
+    </table>
+    <h2>Crosstable</h2>
+    <table>
+      <caption>Row bot's results against the column bot, as player 1 then as player 2 (W, D, L, - not played yet)
+      </caption>
+      <thead id="crosstable-head"></thead>
+      <tbody id="crosstable"></tbody>
+    </table>
+    <p id="status">connecting...</p>
+    </center>
+    <script>
+      var state = null;
+      var pending = [];
+
+      function cell(tag, text, className) {
+        var element = document.createElement(tag);
+        element.textContent = text;
+        if (className) element.className = className;
+        return element;
+      }
+
+      // W, D, L or - for how bot did in the match player_1 against player_2
+      function letter(bot, player_1, player_2) {
+        var outcome = state.results[player_1 + " " + player_2];
+        if (outcome === undefined) return "-";
+        if (outcome === 3) return "D";
+        return (outcome === 1) === (bot === player_1) ? "W" : "L";
+      }
+
+      function render() {
+        var standings = document.getElementById("standings");
+        standings.replaceChildren();
+        state.order.forEach(function (bot, i) {
+          var stats = state.bots[bot];
+          var row = document.createElement("tr");
+          [i + 1, bot, stats.points, stats.wins, stats.draws, stats.losses].forEach(function (value, j) {
+            row.appendChild(cell(j < 2 ? "th" : "td", value));
+          });
+          standings.appendChild(row);
+        });
+
+        var head = document.createElement("tr");
+        head.appendChild(cell("th", ""));
+        state.order.forEach(function (bot) { head.appendChild(cell("th", bot)); });
+        document.getElementById("crosstable-head").replaceChildren(head);
+        var crosstable = document.getElementById("crosstable");
+        crosstable.replaceChildren();
+        state.order.forEach(function (bot) {
+          var row = document.createElement("tr");
+          row.appendChild(cell("th", bot));
+          state.order.forEach(function (other) {
+            if (bot === other) {
+              row.appendChild(cell("td", ""));
+              return;
+            }
+            var text = letter(bot, bot, other) + " " + letter(bot, other, bot);
+            var wins = (text.match(/W/g) || []).length, losses = (text.match(/L/g) || []).length;
+            var className = wins > losses ? "win" : losses > wins ? "loss" : text.indexOf("D") >= 0 ? "draw" : "";
+            row.appendChild(cell("td", text, className));
+          });
+          crosstable.appendChild(row);
+        });
+      }
+
+      // Each event has the standings of the two bots that played, the match and where each of the two moved in the
+      // order (in turn, so each move is made on the order the one before it left)
+      function apply(delta) {
+        if (delta.sequence <= state.sequence) return;
+        Object.assign(state.bots, delta.bots);
+        state.results[delta.match.player1 + " " + delta.match.player2] = delta.match.outcome;
+        delta.moves.forEach(function (move) {
+          state.order.splice(move.old_rank, 1);
+          state.order.splice(move.new_rank, 0, move.bot);
+        });
+        state.sequence = delta.sequence;
+      }
+
+      function load() {
+        state = null;
+        pending = [];
+        fetch("standings").then(function (response) { return response.json(); }).then(function (snapshot) {
+          state = snapshot;
+          pending.forEach(apply);
+          pending = [];
+          render();
+        });
+      }
+
+      var events = new EventSource("events");
+      events.onopen = function () {
+        document.getElementById("status").textContent = "live";
+        load();
+      };
+      events.onerror = function () { document.getElementById("status").textContent = "reconnecting..."; };
+      events.onmessage = function (event) {
+        var delta = JSON.parse(event.data);
+        if (state === null) {
+          pending.push(delta);
+        } else {
+          apply(delta);
+          render();
+        }
+      };
+    </script>
+  </body>
+</html>
+"""
+
+
+class Standings:
+    """
+    Tournament standings, with the bots kept in order (most points, then most wins, then by name) as results come
+    in, and the result of every match for the crosstable.
+    - bots: names of the bots in the tournament
+    """
+
+    def __init__(self, bots):
+        self.bots = {bot: {'points': 0, 'wins': 0, 'draws': 0, 'losses': 0} for bot in bots}
+        self.order = sorted(self.sort_key(bot) for bot in bots)
+        # Exit code of each match played, keyed by "<player1> <player2>"
+        self.results = dict()
+
+    def sort_key(self, bot):
+        stats = self.bots[bot]
+        return -stats['points'], -stats['wins'], bot
+
+    def ranking(self):
+        return [key[2] for key in self.order]
+
+    # Add a match's result, returns what changed: the two bots' standings, the match and the moves in the order, the
+    # old and new rank (from 0) of player 1 and then of player 2. Taking each bot out of its old rank and putting it
+    # in at its new one, in turn, turns the old order into the new one.
+    def add_result(self, player1, player2, ecode):
+        moves = []
+        for bot, column in zip([player1, player2], OUTCOMES[ecode]):
+            old_rank = bisect.bisect_left(self.order, self.sort_key(bot))
+            del self.order[old_rank]
+            stats = self.bots[bot]
+            stats[column] += 1
+            stats['points'] = stats['wins'] * 2 + stats['draws']
+            new_rank = bisect.bisect_left(self.order, self.sort_key(bot))
+            self.order.insert(new_rank, self.sort_key(bot))
+            moves.append({'bot': bot, 'old_rank': old_rank, 'new_rank': new_rank})
+        self.results[player1 + " " + player2] = ecode
+        return {'bots': {player1: dict(self.bots[player1]), player2: dict(self.bots[player2])},
+                'match': {'player1': player1, 'player2': player2, 'outcome': ecode}, 'moves': moves}
+
+    def snapshot(self):
+        return {'bots': self.bots, 'order': self.ranking(), 'results': self.results}
+
+
+class StandingsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path in ("/", "/index.html"):
+            self.send_contents(PAGE.encode(), "text/html; charset=utf-8")
+        elif path == "/minimal-table.css":
+            css_file = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "minimal-table.css"), "rb")
+            self.send_contents(css_file.read(), "text/css")
+            css_file.close()
+        elif path == "/standings":
+            self.send_contents(self.server.standings_server.snapshot_json(), "application/json")
+        elif path == "/events":
+            self.stream_events()
+        else:
+            self.send_error(404)
+
+    def send_contents(self, contents, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(contents)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(contents)
+
+    # Server-sent events: a message for each match result until the server stops or the spectator goes away
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        messages = self.server.standings_server.subscribe()
+        try:
+            while True:
+                try:
+                    message = messages.get(timeout=KEEP_ALIVE_SECS)
+                except queue.Empty:
+                    message = b": keep alive\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.standings_server.unsubscribe(messages)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandingsServer:
+    """
+    Serves live tournament standings and a crosstable over HTTP, in a background thread. The page at / loads the
+    standings once (/standings, JSON) and then follows a server-sent event stream (/events) that has just the changes
+    after each match, so spectators see results as soon as they come in and nothing is reloaded.
+    - bots: names of the bots in the tournament
+    - port, host: where to listen
+    """
+
+    def __init__(self, bots, port, host="localhost"):
+        self.standings = Standings(bots)
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.subscribers = []
+        self.server = http.server.ThreadingHTTPServer((host, port), StandingsHandler)
+        self.server.daemon_threads = True
+        self.server.standings_server = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://%s:%d/" % (host, port)
+
+    def start(self):
+        self.thread.start()
+
+    def snapshot_json(self):
+        with self.lock:
+            snapshot = self.standings.snapshot()
+            snapshot['sequence'] = self.sequence
+            return json.dumps(snapshot).encode()
+
+    def subscribe(self):
+        messages = queue.Queue()
+        with self.lock:
+            self.subscribers.append(messages)
+        return messages
+
+    def unsubscribe(self, messages):
+        with self.lock:
+            if messages in self.subscribers:
+                self.subscribers.remove(messages)
+
+    # Record a match's result and push the change to everyone watching
+    def add_result(self, player1, player2, ecode):
+        with self.lock:
+            delta = self.standings.add_result(player1, player2, ecode)
+            self.sequence += 1
+            delta['sequence'] = self.sequence
+            message = ("data: %s\n\n" % json.dumps(delta)).encode()
+            for messages in self.subscribers:
+                messages.put(message)
+
+    def stop(self):
+        with self.lock:
+            for messages in self.subscribers:
+                messages.put(None)
+        if self.thread.is_alive():
+            self.server.shutdown()
+        self.server.server_close()
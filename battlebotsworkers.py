@@ -0,0 +1,281 @@
+import os
+import copy
+import time
+import traceback
+import multiprocessing
+import battlebotsconfig
+import battlebotspublic
+import battlebotsengine
+
+
+# Runs in the worker process: plays a bot for one match after another. A match starts with ('start', bot module,
+# config), which creates a new bot (the module is only imported the first time) and answers with its name and image.
+# Its turns follow as ('turn', turn, info) until ('end',), each answered with (turn, action, seconds, error), error
+# being the traceback when take_turn raised an exception. Stops when told to (None) or the match goes away.
+def bot_worker(connection):
+    bot = None
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        command = request[0]
+        if command == 'start':
+            try:
+                bot = battlebotsengine.load_bot(request[1], request[2])
+                connection.send((bot.get_name(), bot.get_image()))
+            except Exception:
+                # The match sees the worker go away and gives up on the bot
+                traceback.print_exc()
+                break
+        elif command == 'turn':
+            turn, info = request[1:]
+            start = time.perf_counter()
+            error = None
+            try:
+                action = bot.take_turn(info)
+                if action is None:
+                    error = "take_turn returned None instead of a TurnAction"
+            except Exception:
+                # The match makes the bot forfeit
+                action = None
+                error = traceback.format_exc()
+            connection.send((turn, action, time.perf_counter() - start, error))
+        else:
+            bot = None
+    connection.close()
+
+
+def stop_worker(process, connection):
+    try:
+        connection.send(None)
+    except (OSError, ValueError):
+        pass
+    process.join(0.1)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    connection.close()
+
+
+class BotWorkerPool:
+    """
+    Bot worker processes kept between matches, so a match doesn't have to wait for new processes to start and import
+    pygame, the engine and the bots. A worker is only handed back once its bot has answered every turn it was given,
+    one still busy (or hung) is stopped instead. Every match still gets new bots, but a bot module's globals last as
+    long as the worker does.
+    - max_idle: most workers kept waiting for a match, any more are stopped
+    """
+
+    def __init__(self, max_idle=2):
+        self.max_idle = max_idle
+        self.idle = []
+        self.pid = os.getpid()
+
+    # A (process, connection) worker for a match
+    def acquire(self):
+        # A forked process doesn't own its parent's workers
+        if os.getpid() != self.pid:
+            self.idle = []
+            self.pid = os.getpid()
+        while len(self.idle) > 0:
+            process, connection = self.idle.pop()
+            if process.is_alive():
+                return process, connection
+            connection.close()
+        connection, child_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=bot_worker, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        return process, connection
+
+    # Hand back a worker that isn't working on anything
+    def release(self, process, connection):
+        if len(self.idle) < self.max_idle and process.is_alive():
+            try:
+                connection.send(('end',))
+                self.idle.append((process, connection))
+                return
+            except OSError:
+                pass
+        stop_worker(process, connection)
+
+    def close(self):
+        for process, connection in self.idle:
+            stop_worker(process, connection)
+        self.idle = []
+
+
+# Workers shared by the matches played in this process (see battlebotsengine.create_match)
+worker_pool = BotWorkerPool()
+
+
+# Multiprocessing context for pools of match playing processes: where there is one, a fork server that has already
+# imported the engine (and pygame), so starting a worker is just a fork. It also keeps the workers clear of threads
+# in the process starting them (like roundrobin.py's standings server). None (the default context) elsewhere.
+def pool_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['battlebotsengine'])
+    return context
+
+
+# A process playing headless matches (roundrobin.py, bestofnmatches.py and sweep.py, with or without a pool) loads the
+# images once and each config it needs once, every match gets its own copy of its config so nothing a match changes
+# in it carries over to the next one.
+worker_configs = dict()
+worker_images = None
+
+
+# Pool initializer, loads config.ini and the images before the first match
+def init_worker():
+    worker_config()
+
+
+# The config with overrides (see battlebotsconfig.Config) on top of config.ini, loaded the first time it's needed
+def worker_config(overrides=None):
+    global worker_images
+    key = None
+    if overrides is not None:
+        key = repr(sorted((section, sorted(settings.items())) for section, settings in overrides.items()))
+    config = worker_configs.get(key)
+    if config is None:
+        config = battlebotsconfig.Config(overrides)
+        worker_images = battlebotsengine.load_images(config)
+        worker_configs[key] = config
+    return config
+
+
+# Play a match in this process, returns the battlebots.py exit code (1 - player 1 wins, 2 - player 2 wins, 3 - draw).
+# overrides are settings to use instead of config.ini's, options are passed on to battlebotsengine.run_match.
+def play_headless_match(player1, player2, overrides=None, **options):
+    config = copy.deepcopy(worker_config(overrides))
+    return battlebotsengine.run_match(player1, player2, config, worker_images, **options).exit_value()
+
+
+class BotProcess:
+    """
+    A bot running in its own worker process, used by a Match in place of the bot itself. Each turn has a time budget:
+    begin_turn() hands the bot its TurnInfo and end_turn() waits until the budget is used up at most. A bot that
+    hasn't answered in time keeps doing what it did last turn, and isn't asked again until it has caught up, so a
+    slow or hung bot never holds up the game. Both bots of a match think at the same time. A bot that raised an
+    exception, or whose worker died, makes end_turn() raise a RuntimeError, so it loses like a bot played in process.
+    After end_turn(), turn_time is how long the bot took over the turn (at least turn_timeout for a late bot).
+    - bot_module_name: module with the bot's MyBot class (ex: 'samplebot1' or 'bots.samplebot1')
+    - config: battlebotsconfig.Config, turn_timeout is config.match.turn_timeout
+    - start_timeout: seconds to wait for the bot to load before giving up with a RuntimeError
+    - pool: BotWorkerPool to take the worker from and hand it back to when closed, a new worker is started (and
+      stopped) just for this bot when None
+    """
+
+    def __init__(self, bot_module_name, config, start_timeout=10.0, pool=None):
+        self.bot_module_name = bot_module_name
+        self.turn_timeout = config.match.turn_timeout
+        if pool is None:
+            pool = BotWorkerPool(max_idle=0)
+        self.pool = pool
+        self.process, self.connection = pool.acquire()
+        # Turn the worker is still working on (None when it's waiting for one, -1 while starting or once it's dead)
+        # and whether it's been sent this turn
+        self.pending_turn = -1
+        self.sent = False
+        try:
+            self.connection.send(('start', bot_module_name, config))
+        except OSError:
+            self.close()
+            raise RuntimeError("Bot %s failed to start" % bot_module_name) from None
+        if not self.connection.poll(start_timeout):
+            self.close()
+            raise RuntimeError("Bot %s didn't start within %g seconds" % (bot_module_name, start_timeout))
+        try:
+            self.name, self.image = self.connection.recv()
+        except EOFError:
+            self.close()
+            raise RuntimeError("Bot %s failed to start" % bot_module_name) from None
+
+        self.turn = 0
+        self.started = 0.0
+        self.deadline = 0.0
+        self.pending_turn = None
+        self.last_action = None
+        self.late_turns = 0
+        # Traceback of an exception the bot raised (or why its worker went away), None while it's fine
+        self.error = None
+        self.turn_time = 0.0
+        self.answer_time = 0.0
+
+    def get_name(self):
+        return self.name
+
+    def get_image(self):
+        return self.image
+
+    # Read any answer that's arrived, waiting until the deadline for one at most. Returns the answer to the current
+    # turn, or None if there isn't one (yet).
+    def receive(self, timeout):
+        action = None
+        try:
+            while self.pending_turn is not None and self.connection.poll(timeout):
+                turn, answer, seconds, error = self.connection.recv()
+                self.pending_turn = None
+                if error is not None:
+                    self.error = error
+                elif turn == self.turn:
+                    action = answer
+                    self.answer_time = seconds
+        except (EOFError, OSError):
+            self.pending_turn = -1
+            self.error = "The bot's worker process died"
+        return action
+
+    def begin_turn(self, info):
+        self.turn += 1
+        self.started = time.perf_counter()
+        self.deadline = self.started + self.turn_timeout
+        # Stale answers are thrown away, a bot still busy with an old turn sits this one out
+        self.receive(0)
+        self.sent = False
+        if self.pending_turn is None:
+            try:
+                self.connection.send(('turn', self.turn, info))
+                self.pending_turn = self.turn
+                self.sent = True
+            except OSError:
+                self.pending_turn = -1
+                self.error = "The bot's worker process died"
+        if self.last_action is None:
+            # Nothing to fall back on yet, keep going the same way without firing
+            self.last_action = battlebotspublic.TurnAction(info.my_direction, info.my_speed, 0, False, False)
+
+    def end_turn(self):
+        action = None
+        if self.sent:
+            action = self.receive(max(0.0, self.deadline - time.perf_counter()))
+        if self.error is not None:
+            raise RuntimeError("Bot %s crashed:\n%s" % (self.bot_module_name, self.error))
+        if action is None:
+            self.late_turns += 1
+            # A bot still busy with an old turn isn't waited for, but it's been thinking for longer than the budget
+            self.turn_time = max(self.turn_timeout, time.perf_counter() - self.started)
+            return self.last_action
+        self.turn_time = self.answer_time
+        self.last_action = action
+        return action
+
+    def take_turn(self, info):
+        self.begin_turn(info)
+        return self.end_turn()
+
+    # The worker goes back to the pool if the bot isn't still thinking, otherwise it's stopped
+    def close(self):
+        if self.process is None:
+            return
+        if self.pending_turn is None:
+            self.pool.release(self.process, self.connection)
+        else:
+            stop_worker(self.process, self.connection)
+        self.process = None
+        self.connection = None
@@ -0,0 +1,80 @@
+import sys
+import time
+import random
+import argparse
+import battlebotsconfig
+import battlebotsengine
+from battlebotsengine import GameObject, ObjectType
+
+# Benchmark for the bullet to bullet collision check in Match.update(): ticks per second against the number of bullets
+# each player has in flight, for the grid broadphase the engine uses (after) and the nested loop it replaced (before).
+# Usage: benchcollisions.py [--counts 10 50 100] [--seconds 1.0]
+
+
+# The bullet to bullet check as it was before the broadphase, kept here to compare against.
+def nested_loop_bullet_collisions(match, player_1_bullets, player_2_bullets):
+    objects_to_remove = []
+    for bullet1 in player_1_bullets:
+        for bullet2 in player_2_bullets:
+            if bullet1 not in objects_to_remove and bullet2 not in objects_to_remove:
+                if bullet1.collides_with(bullet2):
+                    objects_to_remove.append(bullet1)
+                    objects_to_remove.append(bullet2)
+                    match.effects.append(match.make_explosion(bullet1))
+                    match.effects.append(match.make_explosion(bullet2))
+                    match.play_sound('hit')
+    battlebotsengine.remove_elements(player_1_bullets, objects_to_remove)
+    battlebotsengine.remove_elements(player_2_bullets, objects_to_remove)
+
+
+def random_bullets(config, images, count, rng):
+    bullets = []
+    for i in range(count):
+        if rng.random() < 0.8:
+            image, damage, speed = images['b1'], config.phaser.damage, config.phaser.speed
+        else:
+            image, damage, speed = images['torpedo'], config.torpedo.damage, config.torpedo.speed
+        bullets.append(GameObject(config, ObjectType.bullet, image, damage, rng.uniform(0, config.arena.width),
+                                  rng.uniform(0, config.arena.height), rng.uniform(0, 360), speed))
+    return bullets
+
+
+# Ticks per second of check(match, bullets_1, bullets_2), each tick starting from the same bullets
+def ticks_per_second(check, match, bullets_1, bullets_2, seconds):
+    ticks = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        check(match, list(bullets_1), list(bullets_2))
+        match.effects.clear()
+        ticks += 1
+        elapsed = time.perf_counter() - start
+    return ticks / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bullet to bullet collisions.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 50, 100, 200, 400, 800],
+                        help="bullets per player to benchmark")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time to spend on each measurement")
+    args = parser.parse_args()
+
+    config = battlebotsconfig.Config()
+    images = battlebotsengine.load_images(config)
+    match = battlebotsengine.Match(battlebotsengine.load_bot('samplebot1', config),
+                                   battlebotsengine.load_bot('samplebot2', config), config, images)
+    rng = random.Random(1)
+
+    print("%10s %14s %14s %8s" % ("per player", "before tick/s", "after tick/s", "speedup"))
+    for count in args.counts:
+        bullets_1 = random_bullets(config, images, count, rng)
+        bullets_2 = random_bullets(config, images, count, rng)
+        before = ticks_per_second(nested_loop_bullet_collisions, match, bullets_1, bullets_2, args.seconds)
+        after = ticks_per_second(battlebotsengine.Match.check_bullet_collisions, match, bullets_1, bullets_2,
+                                 args.seconds)
+        print("%10d %14.1f %14.1f %7.1fx" % (count, before, after, after / before))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
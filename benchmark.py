@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+from collections import namedtuple
+import pygame
+import battlebotsconfig
+import battlebotspublic
+import battlebotsengine
+from battlebotsengine import States
+
+# Benchmarks for the engine and renderer on a set of reference scenarios. For each scenario it measures headless
+# ticks/sec, bot turns/sec and whole matches/sec, and frames/sec for battlebots.render() and the dirty rect renderer.
+# Results are printed and can be saved as JSON (--output) and compared with an earlier run (--compare).
+# Usage: benchmark.py [--scenarios idle samplebots ...] [--seconds 2.0] [--output FILE] [--compare FILE]
+
+
+class IdleBot(battlebotspublic.PlayerBot):
+    def get_name(self):
+        return "Idle"
+
+    def take_turn(self, info):
+        return battlebotspublic.TurnAction(info.my_direction, 0, 0, False, False)
+
+
+# Circles the arena firing a phaser every turn, sweeping its aim around so there are always lots of bullets in flight
+class SpamBot(battlebotspublic.PlayerBot):
+    def __init__(self, config):
+        battlebotspublic.PlayerBot.__init__(self, config)
+        self.turns = 0
+
+    def get_name(self):
+        return "Spam"
+
+    def take_turn(self, info):
+        self.turns += 1
+        return battlebotspublic.TurnAction((self.turns * 3) % 360, 100, (self.turns * 37) % 360, True, False)
+
+
+def default_config(config):
+    return config
+
+
+def spam_config(config):
+    # A phaser every tick for each player, slow enough and with enough health to stay in the arena for a while
+    config.match.ticks_per_turn = 1
+    config.player.phaser_charge = 1
+    config.player.health = 1000000
+    config.phaser.speed = 100
+    # Shorter matches so measuring matches/sec doesn't take all day
+    config.match.match_secs = 20
+    return config
+
+
+def large_arena_config(config):
+    config.arena.width = 1920
+    config.arena.height = 1080
+    config.arena.start1x = 200
+    config.arena.start1y = 540
+    config.arena.start2x = 1720
+    config.arena.start2y = 540
+    return config
+
+
+def sample_bots(config):
+    return battlebotsengine.load_bot('samplebot1', config), battlebotsengine.load_bot('samplebot2', config)
+
+
+Scenario = namedtuple('Scenario', ['description', 'setup_config', 'make_bots'])
+
+SCENARIOS = {
+    'idle': Scenario("two ships sitting still until time runs out", default_config,
+                     lambda config: (IdleBot(config), IdleBot(config))),
+    'samplebots': Scenario("samplebot1 against samplebot2", default_config, sample_bots),
+    'phaser_spam': Scenario("both bots firing a phaser every tick, hundreds of bullets in flight", spam_config,
+                            lambda config: (SpamBot(config), SpamBot(config))),
+    'large_arena': Scenario("samplebot1 against samplebot2 in a 1920x1080 arena", large_arena_config, sample_bots),
+    'large_arena_spam': Scenario("phaser spam in a 1920x1080 arena",
+                                 lambda config: spam_config(large_arena_config(config)),
+                                 lambda config: (SpamBot(config), SpamBot(config))),
+}
+
+
+def create_match(scenario, images, match_options):
+    config = scenario.setup_config(battlebotsconfig.Config())
+    player_1_ai, player_2_ai = scenario.make_bots(config)
+    return battlebotsengine.Match(player_1_ai, player_2_ai, config, images, skip_countdown=True, **match_options)
+
+
+# Headless ticks, bot turns and bullets in flight, stepping for about seconds (new matches are started as needed)
+def measure_ticks(scenario, images, match_options, seconds):
+    ticks = 0
+    turns = 0
+    bullets = 0
+    max_bullets = 0
+    match = create_match(scenario, images, match_options)
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for i in range(100):
+            if match.finished():
+                match = create_match(scenario, images, match_options)
+            if match.state == States.battle and match.frame % match.config.match.ticks_per_turn == 0:
+                turns += 2
+            match.step()
+            ticks += 1
+            in_flight = len(match.player_1_bullets) + len(match.player_2_bullets)
+            bullets += in_flight
+            max_bullets = max(max_bullets, in_flight)
+        elapsed = time.perf_counter() - start
+    return {'ticks_per_sec': ticks / elapsed, 'turns_per_sec': turns / elapsed,
+            'average_bullets': bullets / ticks, 'max_bullets': max_bullets}
+
+
+# Whole matches played to the end, for about seconds (at least one match)
+def measure_matches(scenario, images, match_options, seconds):
+    matches = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while matches == 0 or elapsed < seconds:
+        create_match(scenario, images, match_options).run()
+        matches += 1
+        elapsed = time.perf_counter() - start
+    return {'matches_per_sec': matches / elapsed}
+
+
+# Frames a second of a renderer on the scenario part way through a match, only drawing is timed
+def measure_render(scenario, images, match_options, seconds, render):
+    import battlebots
+    match = create_match(scenario, images, match_options)
+    screen = pygame.display.set_mode((match.config.arena.width, match.config.arena.height))
+    render = render(battlebots, screen)
+    # Get some bullets in flight first
+    for i in range(match.config.match.tick_rate * 3):
+        if not match.finished():
+            match.step()
+    frames = 0
+    render_time = 0.0
+    while render_time < seconds:
+        if match.finished():
+            match = create_match(scenario, images, match_options)
+        match.step()
+        start = time.perf_counter()
+        render(match)
+        render_time += time.perf_counter() - start
+        frames += 1
+    return frames / render_time
+
+
+def full_render(battlebots, screen):
+    return lambda match: battlebots.render(screen, match)
+
+
+def dirty_rect_render(battlebots, screen):
+    return battlebots.DirtyRectRenderer(screen).render
+
+
+def run_scenario(name, images, match_options, seconds, render):
+    scenario = SCENARIOS[name]
+    random.seed(0)
+    result = {'description': scenario.description}
+    result.update(measure_ticks(scenario, images, match_options, seconds))
+    result.update(measure_matches(scenario, images, match_options, seconds))
+    if render:
+        result['render_fps'] = measure_render(scenario, images, match_options, seconds, full_render)
+        result['dirty_rect_fps'] = measure_render(scenario, images, match_options, seconds, dirty_rect_render)
+    return result
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {'python': platform.python_version(), 'pygame': pygame.version.ver, 'numpy': numpy_version,
+            'platform': platform.platform(), 'processor': platform.processor()}
+
+
+# Metrics where bigger is better, compared by --compare
+METRICS = ['ticks_per_sec', 'turns_per_sec', 'matches_per_sec', 'render_fps', 'dirty_rect_fps']
+
+
+def print_results(results, previous=None):
+    print("%-18s %12s %12s %12s %12s %12s %9s" % ("scenario", "ticks/s", "turns/s", "matches/s", "render fps",
+                                                  "dirty fps", "bullets"))
+    for name, result in results['scenarios'].items():
+        columns = []
+        for metric in METRICS:
+            value = result.get(metric)
+            if value is None:
+                columns.append("%12s" % "-")
+            elif previous is not None and metric in previous['scenarios'].get(name, dict()):
+                change = (value / previous['scenarios'][name][metric] - 1.0) * 100.0
+                columns.append("%12s" % ("%.1f %+.0f%%" % (value, change)))
+            else:
+                columns.append("%12.1f" % value)
+        print("%-18s %s %9.0f" % (name, " ".join(columns), result['average_bullets']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Battle Bots engine and renderer.")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help="scenarios to run (default all)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time to spend on each measurement")
+    parser.add_argument("--no-render", action="store_true", help="skip the render benchmarks")
+    parser.add_argument("--projectile-store", action="store_true",
+                        help="run the matches with a ProjectileStore, compare against a run without it to see where "
+                             "it pays off (only with hundreds of bullets in flight)")
+    parser.add_argument("--swept-collisions", action="store_true", help="run the matches with swept collisions")
+    parser.add_argument("--output", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="show the change from the results saved in FILE")
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare is not None:
+        previous_file = open(args.compare, "r")
+        previous = json.load(previous_file)
+        previous_file.close()
+
+    # Rendering is benchmarked off screen unless a video driver was picked
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.font.init()
+    render = not args.no_render
+    if render:
+        # A display mode is set before loading the images so they're converted like they are in a real game
+        pygame.display.set_mode((1, 1))
+    images = battlebotsengine.load_images(battlebotsconfig.Config())
+    match_options = {'projectile_store': args.projectile_store, 'swept_collisions': args.swept_collisions}
+
+    results = {'environment': environment(), 'options': dict(match_options, seconds=args.seconds),
+               'scenarios': dict()}
+    for name in args.scenarios:
+        print("Running %s..." % name)
+        sys.stdout.flush()
+        results['scenarios'][name] = run_scenario(name, images, match_options, args.seconds, render)
+
+    print_results(results, previous)
+    if args.output is not None:
+        output_file = open(args.output, "w")
+        json.dump(results, output_file, indent=2)
+        output_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,137 @@
 # Author: Jason Taylor 2019
 # Copyright (c) Jason Taylor.
 
-import sys
+import math
+import functools
 import subprocess
+import concurrent.futures
 from collections import namedtuple
+import battlebotsworkers
+from battlebotsargs import ArgumentParser
 
 Match = namedtuple('Match', ['player1', 'player2'])
 
-if len(sys.argv) != 4:
-    print("Invalid arguments!")
-    print("Usage: bestofnmatches.py <player1bot> <player2bot> number_of_matches")
-    exit(0)
-
-player1 = sys.argv[1]
-player2 = sys.argv[2]
-number_of_matches = int(sys.argv[3])
-
-matches = []
-for i in range(1, number_of_matches+1):
-    if i % 2 == 0:
-        matches.append(Match(player1, player2))
-    else:
-        matches.append(Match(player2, player1))
-
-player_1_wins = 0
-player_2_wins = 0
-draws = 0
-for match in matches:
-    ecode = subprocess.call(["python", "battlebots.py", match.player1, match.player2], stdout=subprocess.DEVNULL)
-    if ecode == 1:  # Player 1 wins
-        print(match.player1 + " wins")
-        if match.player1 == player1:
-            player_1_wins += 1
+
+# Play a match on screen by starting battlebots.py, returns its exit code
+def play_match(match, bot_processes=False):
+    command = ["python", "battlebots.py", match.player1, match.player2]
+    if bot_processes:
+        command.append("--bot-processes")
+    return subprocess.call(command, stdout=subprocess.DEVNULL)
+
+
+def sprt_winner(player_1_wins, player_2_wins, confidence, margin):
+    """
+    Sequential probability ratio test on the decisive (non draw) matches played so far. Tests "player 1 wins with
+    probability 0.5 + margin" against "player 1 wins with probability 0.5 - margin", wrongly picking a winner with
+    probability at most 1 - confidence when the real difference is at least the margin. Draws carry no information
+    and are ignored.
+    Returns 1 or 2 once that player is settled as the better bot, 0 while it's still undecided.
+    """
+    error = 1.0 - confidence
+    upper_bound = math.log((1.0 - error) / error)
+    lower_bound = math.log(error / (1.0 - error))
+    # Every win for one player moves the log likelihood ratio by the same step, so only the lead matters.
+    step = math.log((0.5 + margin) / (0.5 - margin))
+    llr = (player_1_wins - player_2_wins) * step
+    if llr >= upper_bound:
+        return 1
+    elif llr <= lower_bound:
+        return 2
+    return 0
+
+
+def main():
+    parser = ArgumentParser(description="Play two bots against each other a number of times.")
+    parser.add_argument("player1bot")
+    parser.add_argument("player2bot")
+    parser.add_argument("number_of_matches", type=int,
+                        help="matches to play, with --confidence the most matches to play")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the matches in this process without a display, as fast as possible")
+    parser.add_argument("--confidence", type=float,
+                        help="stop as soon as the winner is settled with this confidence (ex: 0.95), implies "
+                             "--headless")
+    parser.add_argument("--margin", type=float, default=0.2,
+                        help="with --confidence, smallest difference from a 50%% win rate worth detecting "
+                             "(default 0.2, a 70/30 split)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes to play matches in, implies --headless")
+    parser.add_argument("--bot-processes", action="store_true",
+                        help="run each bot in its own process with config.ini's TurnTimeout to take each turn")
+    args = parser.parse_args()
+
+    player1 = args.player1bot
+    player2 = args.player2bot
+    number_of_matches = args.number_of_matches
+    headless = args.headless or args.confidence is not None or args.jobs > 1
+    if args.confidence is not None and not (0.5 < args.confidence < 1.0 and 0.0 < args.margin < 0.5):
+        parser.error("--confidence must be between 0.5 and 1 and --margin between 0 and 0.5")
+
+    matches = []
+    for i in range(1, number_of_matches+1):
+        if i % 2 == 0:
+            matches.append(Match(player1, player2))
         else:
-            player_2_wins += 1
-    elif ecode == 2:  # Player 2 wins
-        print(match.player2 + " wins")
-        if match.player2 == player2:
-            player_2_wins += 1
+            matches.append(Match(player2, player1))
+
+    # Matches are played in batches, each one a whole number of seat swapped pairs so neither bot gets the
+    # advantage of a starting side when the test stops after a batch.
+    batch_size = len(matches)
+    pool = None
+    if args.jobs > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(args.jobs, battlebotsworkers.pool_context(),
+                                                    battlebotsworkers.init_worker)
+    if args.confidence is not None:
+        batch_size = max(2, args.jobs + args.jobs % 2)
+
+    player_1_wins = 0
+    player_2_wins = 0
+    draws = 0
+    winner = 0
+    matches_played = 0
+    while matches_played < len(matches) and winner == 0:
+        batch = matches[matches_played:matches_played + batch_size]
+        play_headless = functools.partial(battlebotsworkers.play_headless_match, bot_processes=args.bot_processes)
+        if pool is not None:
+            ecodes = pool.map(play_headless, [match.player1 for match in batch], [match.player2 for match in batch])
+        elif headless:
+            ecodes = map(play_headless, [match.player1 for match in batch], [match.player2 for match in batch])
         else:
-            player_1_wins += 1
-    elif ecode == 3:  # Draw
-        print("draw")
-        draws += 1
+            ecodes = map(functools.partial(play_match, bot_processes=args.bot_processes), batch)
+
+        for match, ecode in zip(batch, ecodes):
+            if ecode == 1:  # Player 1 wins
+                print(match.player1 + " wins")
+                if match.player1 == player1:
+                    player_1_wins += 1
+                else:
+                    player_2_wins += 1
+            elif ecode == 2:  # Player 2 wins
+                print(match.player2 + " wins")
+                if match.player2 == player2:
+                    player_2_wins += 1
+                else:
+                    player_1_wins += 1
+            elif ecode == 3:  # Draw
+                print("draw")
+                draws += 1
+        matches_played += len(batch)
+
+        if args.confidence is not None:
+            winner = sprt_winner(player_1_wins, player_2_wins, args.confidence, args.margin)
+
+    if pool is not None:
+        pool.shutdown()
+
+    print("Results - %s wins: %d, %s wins: %d, Draws: %d" % (player1, player_1_wins, player2, player_2_wins, draws))
+    if args.confidence is not None:
+        if winner == 0:
+            print("No winner settled at %g confidence after %d matches" % (args.confidence, matches_played))
+        else:
+            print("%s is the better bot at %g confidence, settled after %d of %d matches" %
+                  (player1 if winner == 1 else player2, args.confidence, matches_played, number_of_matches))
+
 
-print("Results - %s wins: %d, %s wins: %d, Draws: %d" % (player1, player_1_wins, player2, player_2_wins, draws))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import battlebotspublic
+class MyBot(battlebotspublic.PlayerBot):
+    def __init__(self, config):
+        self.config = config
+        self.n = 0
+    def get_name(self):
+        return "Chaser"
+    def take_turn(self, info):
+        d, dist = battlebotspublic.PlayerBot.get_enemy_direction_and_distance(info.enemy_x, info.enemy_y, info.my_x, info.my_y)
+        self.n += 1
+        return battlebotspublic.TurnAction((d + 30) % 360, 150 if dist > 150 else 60, d, self.n % 3 != 0, self.n % 7 == 0)
@@ -0,0 +1,9 @@
+import battlebotspublic
+class MyBot(battlebotspublic.PlayerBot):
+    def __init__(self, config):
+        self.config = config
+    def get_name(self):
+        return "Rammer"
+    def take_turn(self, info):
+        d, dist = battlebotspublic.PlayerBot.get_enemy_direction_and_distance(info.enemy_x, info.enemy_y, info.my_x, info.my_y)
+        return battlebotspublic.TurnAction(d, 150, d, False, dist < 200)
@@ -0,0 +1,11 @@
+import battlebotspublic
+class MyBot(battlebotspublic.PlayerBot):
+    def __init__(self, config):
+        self.config = config
+        self.n = 0
+    def get_name(self):
+        return "Spammer"
+    def take_turn(self, info):
+        d, dist = battlebotspublic.PlayerBot.get_enemy_direction_and_distance(info.enemy_x, info.enemy_y, info.my_x, info.my_y)
+        self.n += 1
+        return battlebotspublic.TurnAction((self.n * 37) % 360, 120, (d + (self.n % 5 - 2) * 4) % 360, True, info.time_left < 20)
@@ -0,0 +1,111 @@
+import os
+import sys
+import pygame
+import battlebots
+import battlebotsconfig
+import battlebotsengine
+import battlebotsreplay
+from battlebotsargs import ArgumentParser
+
+# Plays back a match recorded with battlebots.py --record (or roundrobin.py --replays), no bot code needed.
+# Keys: SPACE - pause, LEFT / RIGHT - back / forward 5 seconds, UP / DOWN - faster / slower, HOME - restart, ESC - quit
+SEEK_SECONDS = 5
+
+
+def print_actions(replay):
+    tick_rate = replay.config.match.tick_rate
+    print("%8s  %-40s  %-40s" % ("time", replay.header['player_1_name'], replay.header['player_2_name']))
+    for tick, action1, action2 in replay.actions():
+        columns = []
+        for action in [action1, action2]:
+            columns.append("dir %6.1f speed %5.1f fire %6.1f%s%s" %
+                           (action['direction'], action['speed'], action['fire_direction'],
+                            " P" if action['fire_phaser'] else "", " T" if action['fire_torpedo'] else ""))
+        print("%8.2f  %-40s  %-40s" % (tick / tick_rate, columns[0], columns[1]))
+
+
+def export_frames(screen, replay, directory, start_tick):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for tick in range(start_tick, len(replay)):
+        screen.fill(battlebots.black)
+        battlebots.draw_match(screen, replay.frame(tick))
+        pygame.image.save(screen, os.path.join(directory, "frame%06d.png" % tick))
+    print("Exported %d frames to %s" % (len(replay) - start_tick, directory))
+
+
+def main():
+    parser = ArgumentParser(description="Play back a recorded Battle Bots match.")
+    parser.add_argument("replay_file")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 2 is twice as fast (default 1)")
+    parser.add_argument("--start", type=float, default=0.0, help="start this many seconds into the recording")
+    parser.add_argument("--export", metavar="DIR", help="save every frame as a PNG in DIR instead of playing")
+    parser.add_argument("--actions", action="store_true", help="print every turn's TurnActions and exit")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be more than 0")
+
+    # The display is opened before loading the images so they're converted to its pixel format, then resized to the
+    # recorded arena once the replay is loaded.
+    screen = None
+    default_config = battlebotsconfig.Config()
+    if not args.actions:
+        pygame.init()
+        pygame.display.set_caption('Battle Bots Replay')
+        screen = pygame.display.set_mode((default_config.arena.width, default_config.arena.height))
+    images = battlebotsengine.load_images(default_config)
+    try:
+        replay = battlebotsreplay.Replay(args.replay_file, images)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    config = replay.config
+    if args.actions:
+        print_actions(replay)
+        sys.exit(0)
+
+    if screen.get_size() != (config.arena.width, config.arena.height):
+        screen = pygame.display.set_mode((config.arena.width, config.arena.height))
+    tick_rate = config.match.tick_rate
+    last_tick = len(replay) - 1
+    position = min(max(0, int(args.start * tick_rate)), last_tick)
+    if args.export is not None:
+        export_frames(screen, replay, args.export, position)
+        sys.exit(0)
+
+    print("%s vs %s, %d seconds" % (replay.header['player_1_name'], replay.header['player_2_name'],
+                                     len(replay) // tick_rate))
+    speed = args.speed
+    paused = False
+    done = False
+    clock = pygame.time.Clock()
+    # The position is kept as a float so slow speeds move less than a tick a frame
+    tick = float(position)
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                done = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    done = True
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    tick = max(0.0, tick - SEEK_SECONDS * tick_rate)
+                elif event.key == pygame.K_RIGHT:
+                    tick = min(float(last_tick), tick + SEEK_SECONDS * tick_rate)
+                elif event.key == pygame.K_HOME:
+                    tick = 0.0
+                elif event.key == pygame.K_UP:
+                    speed = min([s for s in battlebots.SPEEDS if s > speed] or [speed])
+                elif event.key == pygame.K_DOWN:
+                    speed = max([s for s in battlebots.SPEEDS if s < speed] or [speed])
+
+        battlebots.render(screen, replay.frame(int(tick)))
+        pygame.display.set_caption('Battle Bots Replay - %gx%s' % (speed, " (paused)" if paused else ""))
+        clock.tick(tick_rate)
+        if not paused:
+            tick = min(float(last_tick), tick + speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,17 @@
 # Copyright (c) Jason Taylor.
 
 import os
-import sys
+import json
 import time
+import argparse
+import functools
 import subprocess
+import concurrent.futures
 from collections import namedtuple
+import battlebotsprofile
+import battlebotsschedule
+import battlebotsserver
+import battlebotsworkers
 
 Match = namedtuple('Match', ['player1', 'player2'])
 
@@ -20,22 +27,57 @@ class Data:
         return self.wins * 2 + self.draws;
 
 
+# Write a whole file at once, anyone reading it (or a crash part way through) sees either the old or the new file.
+def replace_file(file_name, contents):
+    temp_file_name = file_name + ".tmp"
+    temp_file = open(temp_file_name, "w")
+    temp_file.write(contents)
+    temp_file.close()
+    os.replace(temp_file_name, file_name)
+
+
 def write_data_file(data_to_write):
-    data_file = open("data.txt", "w")
+    lines = []
     for key, val in data_to_write.items():
-        data_file.write(key + " " + str(val.wins) + " " + str(val.draws) + " " + str(val.losses) + "\n")
-    data_file.close()
+        lines.append(key + " " + str(val.wins) + " " + str(val.draws) + " " + str(val.losses) + "\n")
+    replace_file("data.txt", "".join(lines))
 
 
-def read_data_file():
-    data_from_file = dict()
-    data_file = open("data.txt", "r")
-    lines = data_file.readlines()
-    data_file.close()
+# The journal has a line for each match played: "<player1> <player2> <exit code> <UTC time>". Lines are only ever
+# appended and each one is on disk before the next match is recorded, so after a crash the journal holds every match
+# that finished and at worst a torn last line, which is ignored (the match is played again).
+def read_journal(file_name):
+    results = dict()
+    if not os.path.exists(file_name):
+        return results
+    journal_file = open(file_name, "r")
+    lines = journal_file.readlines()
+    journal_file.close()
     for line in lines:
-        splits = line.split(' ')
-        data_from_file[splits[0]] = Data(int(splits[1]), int(splits[2]), int(splits[3]))
-    return data_from_file
+        splits = line.split()
+        if not line.endswith("\n") or len(splits) != 4 or splits[2] not in ("1", "2", "3"):
+            continue
+        # A match is only ever counted once
+        results.setdefault(Match(splits[0], splits[1]), int(splits[2]))
+    return results
+
+
+# Open the journal to add to it, cutting off a torn last line first so the next record starts on a line of its own
+def open_journal(file_name):
+    if os.path.exists(file_name):
+        journal_file = open(file_name, "rb+")
+        contents = journal_file.read()
+        if not contents.endswith(b"\n"):
+            journal_file.truncate(contents.rfind(b"\n") + 1)
+        journal_file.close()
+    return open(file_name, "a")
+
+
+def append_journal(journal_file, match, ecode):
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    journal_file.write("%s %s %d %s\n" % (match.player1, match.player2, ecode, timestamp))
+    journal_file.flush()
+    os.fsync(journal_file.fileno())
 
 
 def generate_results_html(results):
@@ -70,70 +112,261 @@ def generate_results_html(results):
   </body>
 </html>
     """
-    results_file = open("results.html", "w")
-    results_file.write(above_html + "\n")
-    for key, val in results.items():
+    lines = [above_html + "\n"]
+    for key, val in sorted(results.items(), key=lambda item: (-item[1].calculate_points(), -item[1].wins, item[0])):
         str = "<tr><th score=\"row\">%s</th><td>%d</td><td>%d</td><td>%d</td><td>%d</td></tr>" % \
               (key, val.calculate_points(), val.wins, val.draws, val.losses)
-        results_file.write(str + "\n")
-
-    results_file.write(below_html + "\n")
-    results_file.close()
-
-
-bots = []
-for f in os.listdir("./bots"):
-    if os.path.isdir(f) is not True and not f.startswith(".") and not f.endswith(".png"):
-        name, ext = os.path.splitext(f)
-        bots.append(name)
-bots.sort()
-
-matches = []
-match_number = 1
-for i in range(0, len(bots)):
-    first_bot = bots[i]
-    for j in range(i+1, len(bots)):
-        second_bot = bots[j]
-        matches.append(Match(first_bot, second_bot))
-        match_number += 1
-        matches.append(Match(second_bot, first_bot))
-        match_number += 1
-
-data = dict()
-for bot in bots:
-    data[bot] = Data(0, 0, 0)
-
-skip = 0
-if len(sys.argv) == 2:
-    data = read_data_file()
-    skip = int(sys.argv[1])
-
-matches_completed = 0
-for match in matches:
-    if skip > 0:
-        skip -= 1
-        matches_completed += 1
-        continue
-
-    print("Match " + str(matches_completed + 1) + ": " + match.player1 + " vs " + match.player2)
-    ecode = subprocess.call(["python", "battlebots.py", "bots." + match.player1, "bots." + match.player2],
-                            stdout=subprocess.DEVNULL)
+        lines.append(str + "\n")
+
+    lines.append(below_html + "\n")
+    replace_file("results.html", "".join(lines))
+
+
+# Where a match's replay is saved when recording replays, None when not recording
+def replay_file_name(replay_directory, match):
+    if replay_directory is None:
+        return None
+    return os.path.join(replay_directory, match.player1 + "_vs_" + match.player2 + ".bbr")
+
+
+# Where a match's profile is saved when profiling, None when not profiling
+def profile_file_name(profile_directory, match):
+    if profile_directory is None:
+        return None
+    return os.path.join(profile_directory, match.player1 + "_vs_" + match.player2 + ".json")
+
+
+# Add up the profiles of every match in the league that has one and save the total as league_profile.json
+def write_league_profile(profile_directory, matches):
+    league_profile = battlebotsprofile.LeagueProfile()
+    for match in matches:
+        file_name = profile_file_name(profile_directory, match)
+        if os.path.exists(file_name):
+            profile_file = open(file_name, "r")
+            league_profile.add(json.load(profile_file), match.player1, match.player2)
+            profile_file.close()
+    league_profile.save(os.path.join(profile_directory, "league_profile.json"))
+    league_profile.print_summary()
+
+
+# Play a match in this process, returns the battlebots.py exit code (1 - player 1 wins, 2 - player 2 wins, 3 - draw)
+def play_headless_match(match, replay_directory=None, bot_processes=False, profile_directory=None):
+    return battlebotsworkers.play_headless_match("bots." + match.player1, "bots." + match.player2,
+                                                 replay_file=replay_file_name(replay_directory, match),
+                                                 bot_processes=bot_processes,
+                                                 profile_file=profile_file_name(profile_directory, match))
+
+
+# Play a match on screen by starting battlebots.py, returns its exit code
+def play_match(match, replay_directory=None, bot_processes=False, profile_directory=None):
+    command = ["python", "battlebots.py", "bots." + match.player1, "bots." + match.player2]
+    if replay_directory is not None:
+        command += ["--record", replay_file_name(replay_directory, match)]
+    if bot_processes:
+        command.append("--bot-processes")
+    if profile_directory is not None:
+        command += ["--profile", profile_file_name(profile_directory, match)]
+    return subprocess.call(command, stdout=subprocess.DEVNULL)
+
+
+def add_result(data, match, ecode):
     if ecode == 1:  # Player 1 wins
-        print(match.player1 + " wins")
         data[match.player1].wins += 1
         data[match.player2].losses += 1
     elif ecode == 2:  # Player 2 wins
-        print(match.player2 + " wins")
         data[match.player2].wins += 1
         data[match.player1].losses += 1
     elif ecode == 3:  # Draw
-        print("draw")
         data[match.player1].draws += 1
         data[match.player2].draws += 1
 
+
+def record_result(data, match, ecode):
+    if ecode == 1:
+        print(match.player1 + " wins")
+    elif ecode == 2:
+        print(match.player2 + " wins")
+    elif ecode == 3:
+        print("draw")
+    add_result(data, match, ecode)
+
+
+# Every bot against every other bot, both ways round
+def all_matches(bots):
+    matches = []
+    for i in range(0, len(bots)):
+        first_bot = bots[i]
+        for j in range(i+1, len(bots)):
+            second_bot = bots[j]
+            matches.append(Match(first_bot, second_bot))
+            matches.append(Match(second_bot, first_bot))
+    return matches
+
+
+# The matches still to play, a round at a time. A round robin is a single round of every match not played yet, Swiss
+# and adaptive rounds are worked out from the results so far as they're needed. Matches already in played (resuming
+# a tournament) count towards the rounds.
+def scheduled_rounds(schedule, bots, data, ratings, played, rounds):
+    if schedule == "roundrobin":
+        yield [match for match in all_matches(bots) if match not in played]
+        return
+    rounds_played = len(played) // max(1, len(bots) // 2)
+    while rounds_played < rounds:
+        if schedule == "swiss":
+            points = {bot: data[bot].calculate_points() for bot in bots}
+            pairings = battlebotsschedule.swiss_pairings(bots, points, ratings, played)
+        else:
+            pairings = battlebotsschedule.adaptive_pairings(bots, ratings, played)
+        if len(pairings) == 0:
+            return
+        yield [Match(player1, player2) for player1, player2 in pairings]
+        rounds_played += 1
+
+
+# Play matches with the pool, in this process or by starting battlebots.py for each, returns (match, exit code) pairs
+# as the matches finish
+def play_matches(matches, pool, headless, match_options):
+    if pool is not None:
+        play = functools.partial(play_headless_match, **match_options)
+        futures = {pool.submit(play, match): match for match in matches}
+        return ((futures[future], future.result()) for future in concurrent.futures.as_completed(futures))
+    elif headless:
+        return zip(matches, map(functools.partial(play_headless_match, **match_options), matches))
+    return zip(matches, map(functools.partial(play_match, **match_options), matches))
+
+
+def print_ranking(data, ratings):
+    print("%4s %-24s %6s %5s %5s %6s %14s" % ("rank", "bot", "points", "wins", "draws", "losses", "rating"))
+    for rank, bot in enumerate(ratings.ranking()):
+        print("%4d %-24s %6d %5d %5d %6d %8.0f +/-%3.0f" % (rank + 1, bot, data[bot].calculate_points(), data[bot].wins,
+                                                          data[bot].draws, data[bot].losses, ratings.rating[bot],
+                                                          2 * ratings.deviation[bot]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a tournament between the bots in ./bots.")
+    parser.add_argument("--schedule", choices=["roundrobin", "swiss", "adaptive"], default="roundrobin",
+                        help="roundrobin (default) plays every bot against every other bot both ways round. swiss "
+                             "pairs bots on the same points each round, adaptive pairs the bots whose ranking is "
+                             "least certain; both rank a big pool in far fewer matches")
+    parser.add_argument("--rounds", type=int,
+                        help="number of swiss or adaptive rounds, each bot plays about one match a round "
+                             "(default 2 log2 of the number of bots)")
+    parser.add_argument("--journal", metavar="FILE", default="journal.txt",
+                        help="file the result of each match is added to as it finishes (default journal.txt), a "
+                             "tournament that was stopped carries on with the matches that aren't in it yet")
+    parser.add_argument("--new", action="store_true",
+                        help="start a new tournament, the old journal is kept as FILE.old")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the matches in this process without a display, as fast as possible")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes to play matches in, implies --headless")
+    parser.add_argument("--replays", metavar="DIR",
+                        help="record every match to DIR (as <player1>_vs_<player2>.bbr), watch them with replay.py")
+    parser.add_argument("--bot-processes", action="store_true",
+                        help="run each bot in its own process with config.ini's TurnTimeout to take each turn, so a "
+                             "bot stuck in a loop can't hold up the tournament")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile every match to DIR (as <player1>_vs_<player2>.json) and add them up in "
+                             "DIR/league_profile.json, to find slow bots and where the engine spends its time")
+    parser.add_argument("--serve", metavar="PORT", type=int,
+                        help="serve live standings and a crosstable at http://localhost:PORT/, updated the moment "
+                             "each match ends (results.html is then only written at the end)")
+    parser.add_argument("--serve-host", metavar="HOST", default="localhost",
+                        help="address to serve on, 0.0.0.0 to let other machines watch (default localhost)")
+    args = parser.parse_args()
+    for directory in [args.replays, args.profile]:
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    bots = []
+    for f in os.listdir("./bots"):
+        if os.path.isdir(f) is not True and not f.startswith(".") and not f.endswith(".png"):
+            name, ext = os.path.splitext(f)
+            bots.append(name)
+    bots.sort()
+
+    rounds = args.rounds
+    if rounds is None:
+        rounds = battlebotsschedule.default_rounds(len(bots))
+
+    if args.new and os.path.exists(args.journal):
+        os.replace(args.journal, args.journal + ".old")
+
+    # Standings start from the matches already in the journal (of bots that are still in ./bots), only the rest are
+    # played. Matches are known by who played who, so adding, removing or renaming bots doesn't mix up results.
+    data = dict()
+    for bot in bots:
+        data[bot] = Data(0, 0, 0)
+    ratings = battlebotsschedule.Ratings(bots)
+    played = {match: ecode for match, ecode in read_journal(args.journal).items()
+              if match.player1 in data and match.player2 in data}
+    server = None
+    if args.serve is not None:
+        server = battlebotsserver.StandingsServer(bots, args.serve, args.serve_host)
+    for match, ecode in played.items():
+        add_result(data, match, ecode)
+        ratings.add_result(match.player1, match.player2, ecode)
+        if server is not None:
+            server.add_result(match.player1, match.player2, ecode)
+    if server is not None:
+        server.start()
+        print("Live standings at " + server.url())
+    matches_completed = len(played)
+    if matches_completed > 0:
+        print("Resuming from " + args.journal + ", " + str(matches_completed) + " matches already played.")
     write_data_file(data)
     generate_results_html(data)
-    time.sleep(3)
-    matches_completed += 1
 
-print("Done, completed " + str(matches_completed) + " matches.")
+    pool = None
+    match_options = {'replay_directory': args.replays, 'bot_processes': args.bot_processes,
+                     'profile_directory': args.profile}
+    if args.jobs > 1:
+        # Results are recorded as each match finishes, only this process ever writes the journal, data.txt and
+        # results.html. (The workers of a ProcessPoolExecutor, unlike a multiprocessing.Pool's, can start processes
+        # for --bot-processes.) Workers load the config and images as they start and keep them, and their bot
+        # processes, for all of their matches.
+        pool = concurrent.futures.ProcessPoolExecutor(args.jobs, battlebotsworkers.pool_context(),
+                                                    battlebotsworkers.init_worker)
+
+    journal_file = open_journal(args.journal)
+    for round_matches in scheduled_rounds(args.schedule, bots, data, ratings, played, rounds):
+        for match, ecode in play_matches(round_matches, pool, args.headless, match_options):
+            print("Match " + str(matches_completed + 1) + ": " + match.player1 + " vs " + match.player2)
+            record_result(data, match, ecode)
+            # A match without a result (battlebots.py failed) isn't journaled, it's played again next time
+            if ecode in (1, 2, 3):
+                append_journal(journal_file, match, ecode)
+                played[match] = ecode
+                ratings.add_result(match.player1, match.player2, ecode)
+                if server is not None:
+                    server.add_result(match.player1, match.player2, ecode)
+
+            write_data_file(data)
+            if server is None:
+                generate_results_html(data)
+            if pool is None and not args.headless:
+                time.sleep(3)
+            matches_completed += 1
+    journal_file.close()
+
+    if pool is not None:
+        pool.shutdown()
+
+    if args.profile is not None:
+        write_league_profile(args.profile, list(played))
+
+    if args.schedule != "roundrobin":
+        print_ranking(data, ratings)
+    print("Done, completed " + str(matches_completed) + " matches.")
+    if server is not None:
+        generate_results_html(data)
+        try:
+            input("Still serving the final standings at " + server.url() + ", press Enter to stop.")
+        except (EOFError, KeyboardInterrupt):
+            pass
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
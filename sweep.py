@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import argparse
+import functools
+import itertools
+import concurrent.futures
+from collections import namedtuple
+import battlebotsconfig
+import battlebotsworkers
+
+# Balance sweeps: plays bot pairings under every combination of a grid of config.ini setting values and prints a win
+# rate table for each grid point, no need to edit config.ini between runs. The matches are spread over a pool of
+# worker processes. Results can be saved as JSON (--output), rewritten as each grid point finishes. A match that fails
+# doesn't stop the sweep, it's recorded as an error at its grid point.
+# Usage: sweep.py --grid PLAYER.PhaserCharge=0.25,0.5,1 TORPEDO.Damage=3,5 [--pairings samplebot1:samplebot2 ...]
+#                 [--matches N] [--jobs N] [--bot-processes] [--output FILE]
+
+# A match to play: grid point number, its config overrides and the bots (player 1 first)
+Job = namedtuple('Job', ['point', 'overrides', 'player1', 'player2'])
+
+# Play the jobs, yielding (index of the job, exit code, error) as each match finishes, in any order with a pool. error
+# is None, or why the match couldn't be played (the exit code is then None).
+def play_jobs(jobs, bot_processes=False, pool=None):
+    play = functools.partial(battlebotsworkers.play_headless_match, bot_processes=bot_processes)
+    if pool is None:
+        for i, job in enumerate(jobs):
+            try:
+                yield i, play(job.player1, job.player2, job.overrides), None
+            except Exception as e:
+                yield i, None, "%s: %s" % (type(e).__name__, e)
+        return
+    futures = {pool.submit(play, job.player1, job.player2, job.overrides): i for i, job in enumerate(jobs)}
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            yield futures[future], future.result(), None
+        except Exception as e:
+            yield futures[future], None, "%s: %s" % (type(e).__name__, e)
+
+
+# The grid's settings and each one's values from "SECTION.Name=value1,value2,..." strings
+def parse_grid(settings):
+    grid = []
+    for setting in settings:
+        name, separator, values = setting.partition("=")
+        if separator == "" or "." not in name or values == "":
+            raise ValueError("Expected SECTION.Name=value1,value2,..., not %s" % setting)
+        grid.append((name, values.split(",")))
+    return grid
+
+
+# Every combination of the grid's values, as lists of "SECTION.Name=value" strings
+def grid_points(grid):
+    names = [name for name, values in grid]
+    return [[name + "=" + value for name, value in zip(names, combination)]
+            for combination in itertools.product(*[values for name, values in grid])]
+
+
+# Pairings from "bot1:bot2" strings, or every pair of bots in ./bots
+def parse_pairings(pairings):
+    if pairings is None:
+        bots = sorted(os.path.splitext(f)[0] for f in os.listdir("./bots")
+                      if not os.path.isdir(os.path.join("./bots", f)) and not f.startswith(".") and f.endswith(".py"))
+        return [("bots." + bot1, "bots." + bot2) for bot1, bot2 in itertools.combinations(bots, 2)]
+    parsed = []
+    for pairing in pairings:
+        bot1, separator, bot2 = pairing.partition(":")
+        if separator == "" or bot1 == "" or bot2 == "":
+            raise ValueError("Expected bot1:bot2, not %s" % pairing)
+        parsed.append((bot1, bot2))
+    return parsed
+
+
+# The matches of a grid point, each pairing plays number_of_matches matches with the bots taking turns as player 1
+def point_jobs(point, overrides, pairings, number_of_matches):
+    jobs = []
+    for bot1, bot2 in pairings:
+        for i in range(number_of_matches):
+            if i % 2 == 0:
+                jobs.append(Job(point, overrides, bot1, bot2))
+            else:
+                jobs.append(Job(point, overrides, bot2, bot1))
+    return jobs
+
+
+# Wins, losses and draws of each pairing at a grid point and each bot's win rate (a draw counting as half a win).
+# jobs are the point's matches in point_jobs() order, ecodes their results (None for a failed match) and errors why
+# the failed matches failed.
+def point_results(settings, pairings, jobs, ecodes, errors, number_of_matches):
+    tally = []
+    for k, (bot1, bot2) in enumerate(pairings):
+        wins1 = wins2 = draws = 0
+        for i in range(k * number_of_matches, (k + 1) * number_of_matches):
+            if ecodes[i] == 3:
+                draws += 1
+            elif ecodes[i] in (1, 2):
+                winner = jobs[i].player1 if ecodes[i] == 1 else jobs[i].player2
+                if winner == bot1:
+                    wins1 += 1
+                else:
+                    wins2 += 1
+        tally.append(((bot1, bot2), (wins1, wins2, draws)))
+
+    scores = dict()
+    for (bot1, bot2), (wins1, wins2, draws) in tally:
+        for bot, wins in [(bot1, wins1), (bot2, wins2)]:
+            score = scores.setdefault(bot, [0.0, 0])
+            score[0] += wins + draws * 0.5
+            score[1] += wins1 + wins2 + draws
+    return {'settings': settings,
+            'pairings': [{'bot1': bot1, 'bot2': bot2, 'bot1_wins': wins1, 'bot2_wins': wins2, 'draws': draws}
+                         for (bot1, bot2), (wins1, wins2, draws) in tally],
+            'win_rates': {bot: points / games if games else None for bot, (points, games) in scores.items()},
+            'errors': errors}
+
+
+def print_point(results):
+    print(" ".join(results['settings']))
+    for pairing in results['pairings']:
+        games = pairing['bot1_wins'] + pairing['bot2_wins'] + pairing['draws']
+        if games == 0:
+            print("  %-24s %-24s no results" % (pairing['bot1'], pairing['bot2']))
+            continue
+        print("  %-24s %5.1f%%  %-24s %5.1f%%  draws %5.1f%%" %
+              (pairing['bot1'], 100.0 * pairing['bot1_wins'] / games, pairing['bot2'],
+               100.0 * pairing['bot2_wins'] / games, 100.0 * pairing['draws'] / games))
+    if len(results['errors']) > 0:
+        print("  %d matches failed" % len(results['errors']))
+    sys.stdout.flush()
+
+
+# Win rate of each bot (columns) at each grid point (rows)
+def print_win_rates(all_results):
+    bots = sorted({bot for results in all_results for bot in results['win_rates']})
+    width = max([len("grid point")] + [len(" ".join(results['settings'])) for results in all_results])
+    print("Win rates (draws count half):")
+    column = max([6] + [len(bot) for bot in bots])
+    print("%-*s %s" % (width, "grid point", " ".join("%*s" % (column, bot) for bot in bots)))
+    for results in all_results:
+        rates = [results['win_rates'].get(bot) for bot in bots]
+        print("%-*s %s" % (width, " ".join(results['settings']),
+                           " ".join("%*s" % (column, "-" if rate is None else "%.1f%%" % (100.0 * rate))
+                                    for rate in rates)))
+
+
+def save_results(file_name, results):
+    temp_file_name = file_name + ".tmp"
+    output_file = open(temp_file_name, "w")
+    json.dump(results, output_file, indent=2)
+    output_file.close()
+    os.replace(temp_file_name, file_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play bot pairings under a grid of config.ini setting values.")
+    parser.add_argument("--grid", nargs="+", required=True, metavar="SECTION.Name=VALUES",
+                        help="settings to sweep and their values, ex: PLAYER.PhaserCharge=0.25,0.5,1")
+    parser.add_argument("--pairings", nargs="+", metavar="BOT1:BOT2",
+                        help="bot modules to play against each other (default every pair of bots in ./bots)")
+    parser.add_argument("--matches", type=int, default=10,
+                        help="matches for each pairing at each grid point, the bots take turns as player 1")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes to play matches in (default one per CPU)")
+    parser.add_argument("--bot-processes", action="store_true",
+                        help="run each bot in its own process with config.ini's TurnTimeout to take each turn")
+    parser.add_argument("--output", metavar="FILE", help="save the results as JSON")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+        pairings = parse_pairings(args.pairings)
+        points = grid_points(grid)
+        all_overrides = [battlebotsconfig.parse_overrides(settings) for settings in points]
+        # Catch misspelled settings before playing anything
+        for overrides in all_overrides:
+            battlebotsconfig.Config(overrides)
+    except ValueError as e:
+        parser.error(str(e))
+    if len(pairings) == 0:
+        parser.error("no pairings to play")
+
+    jobs = [point_jobs(point, overrides, pairings, args.matches) for point, overrides in enumerate(all_overrides)]
+    print("Sweeping %d grid points, %d matches each" % (len(points), len(jobs[0])))
+    pool = None
+    if args.jobs > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(args.jobs, battlebotsworkers.pool_context())
+
+    # Every grid point has the same number of matches, a point is done (printed and saved) when its last one is
+    point_size = len(jobs[0])
+    ecodes = [[None] * point_size for point_matches in jobs]
+    errors = [[] for point_matches in jobs]
+    remaining = [point_size] * len(jobs)
+    finished = dict()
+    output = {'grid': dict(grid), 'matches': args.matches, 'points': []}
+    for i, ecode, error in play_jobs(list(itertools.chain(*jobs)), args.bot_processes, pool):
+        point = i // point_size
+        ecodes[point][i % point_size] = ecode
+        if error is not None:
+            job = jobs[point][i % point_size]
+            print("%s vs %s at %s failed: %s" % (job.player1, job.player2, " ".join(points[point]), error))
+            errors[point].append({'player1': job.player1, 'player2': job.player2, 'error': error})
+        remaining[point] -= 1
+        if remaining[point] == 0:
+            finished[point] = point_results(points[point], pairings, jobs[point], ecodes[point], errors[point],
+                                            args.matches)
+            print_point(finished[point])
+            output['points'] = [finished[done] for done in sorted(finished)]
+            if args.output is not None:
+                save_results(args.output, output)
+
+    if pool is not None:
+        pool.shutdown()
+    print_win_rates(output['points'])
+
+
+if __name__ == "__main__":
+    main()
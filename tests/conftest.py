@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Matches are played without a display or sound
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+# config.ini, the images and the sample bots are all found relative to the working directory
+@pytest.fixture(autouse=True)
+def repo_directory(monkeypatch):
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,39 @@
+import os
+import pygame
+import pytest
+import battlebotsassets
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    battlebotsassets.clear_image_cache()
+    yield
+    battlebotsassets.clear_image_cache()
+
+
+def save_image(file_name, width, mtime):
+    pygame.image.save(pygame.Surface((width, 10)), file_name)
+    os.utime(file_name, (mtime, mtime))
+
+
+def test_load_image_cached(tmp_path):
+    file_name = str(tmp_path / "ship.png")
+    save_image(file_name, 10, 1000)
+    image = battlebotsassets.load_image(file_name)
+    assert battlebotsassets.load_image(file_name) is image
+    assert len(battlebotsassets.image_cache) == 1
+
+
+# A changed file is loaded again and replaces the old image in the cache
+def test_load_image_replaces_changed_file(tmp_path):
+    file_name = str(tmp_path / "ship.png")
+    save_image(file_name, 10, 1000)
+    old_image = battlebotsassets.load_image(file_name)
+    for mtime in range(1001, 1011):
+        save_image(file_name, mtime - 990, mtime)
+        image = battlebotsassets.load_image(file_name)
+        assert image is not old_image
+        assert image.get_width() == mtime - 990
+        assert battlebotsassets.load_image(file_name) is image
+        old_image = image
+    assert len(battlebotsassets.image_cache) == 1
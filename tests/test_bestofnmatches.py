@@ -0,0 +1,37 @@
+import math
+import pytest
+import bestofnmatches
+
+
+# Lead in decisive matches needed to settle a winner: the first lead whose log likelihood ratio reaches the bound
+def settling_lead(confidence, margin):
+    bound = math.log(confidence / (1.0 - confidence))
+    return math.ceil(bound / math.log((0.5 + margin) / (0.5 - margin)))
+
+
+@pytest.mark.parametrize('confidence, margin', [(0.95, 0.2), (0.99, 0.2), (0.95, 0.1), (0.8, 0.3)])
+def test_sprt_stops_at_bounds(confidence, margin):
+    lead = settling_lead(confidence, margin)
+    assert bestofnmatches.sprt_winner(lead, 0, confidence, margin) == 1
+    assert bestofnmatches.sprt_winner(0, lead, confidence, margin) == 2
+    assert bestofnmatches.sprt_winner(lead + 5, 5, confidence, margin) == 1
+    assert bestofnmatches.sprt_winner(5, lead + 5, confidence, margin) == 2
+
+
+@pytest.mark.parametrize('confidence, margin', [(0.95, 0.2), (0.99, 0.2), (0.95, 0.1), (0.8, 0.3)])
+def test_sprt_undecided_inside_bounds(confidence, margin):
+    lead = settling_lead(confidence, margin)
+    assert bestofnmatches.sprt_winner(0, 0, confidence, margin) == 0
+    assert bestofnmatches.sprt_winner(lead - 1, 0, confidence, margin) == 0
+    assert bestofnmatches.sprt_winner(0, lead - 1, confidence, margin) == 0
+    assert bestofnmatches.sprt_winner(lead + 9, 10, confidence, margin) == 0
+
+
+def test_sprt_known_values():
+    # 95% confidence and a 70/30 split: log(19) / log(7/3) = 3.47, so a lead of 4 settles it
+    assert bestofnmatches.sprt_winner(3, 0, 0.95, 0.2) == 0
+    assert bestofnmatches.sprt_winner(4, 0, 0.95, 0.2) == 1
+    assert bestofnmatches.sprt_winner(20, 24, 0.95, 0.2) == 2
+    # Higher confidence needs a longer lead
+    assert bestofnmatches.sprt_winner(4, 0, 0.99, 0.2) == 0
+    assert bestofnmatches.sprt_winner(6, 0, 0.99, 0.2) == 1
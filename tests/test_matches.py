@@ -0,0 +1,133 @@
+import pytest
+import battlebotsbatch
+import battlebotsconfig
+import battlebotsengine
+import battlebotspublic
+import benchmark
+from benchmark import Scenario
+from battlebotsengine import MatchResult, States
+
+# Headless matches checked against saved results. Every mode of playing a match (Python lists or --projectile-store,
+# Match or BatchMatch) has to give the same result, discrete and swept collisions can differ. A result changing means
+# the rules changed, if that was on purpose play the match again and save the new result here.
+
+
+# Heads for the enemy's side, firing a phaser on two turns out of three and a torpedo every seventh turn
+class ChaserBot(battlebotspublic.PlayerBot):
+    def __init__(self, config):
+        battlebotspublic.PlayerBot.__init__(self, config)
+        self.turns = 0
+
+    def get_name(self):
+        return "Chaser"
+
+    def take_turn(self, info):
+        direction, distance = battlebotspublic.PlayerBot.get_enemy_direction_and_distance(info.enemy_x, info.enemy_y,
+                                                                                          info.my_x, info.my_y)
+        self.turns += 1
+        return battlebotspublic.TurnAction((direction + 30) % 360, 150 if distance > 150 else 60, direction,
+                                           self.turns % 3 != 0, self.turns % 7 == 0)
+
+
+# Flies straight at the enemy, firing torpedoes once it's close
+class RammerBot(battlebotspublic.PlayerBot):
+    def get_name(self):
+        return "Rammer"
+
+    def take_turn(self, info):
+        direction, distance = battlebotspublic.PlayerBot.get_enemy_direction_and_distance(info.enemy_x, info.enemy_y,
+                                                                                          info.my_x, info.my_y)
+        return battlebotspublic.TurnAction(direction, 150, direction, False, distance < 200)
+
+
+SCENARIOS = {
+    'samplebots': benchmark.SCENARIOS['samplebots'],
+    'large_arena': benchmark.SCENARIOS['large_arena'],
+    'phaser_spam': benchmark.SCENARIOS['phaser_spam'],
+    'chaser_rammer': Scenario("ChaserBot against RammerBot", benchmark.default_config,
+                              lambda config: (ChaserBot(config), RammerBot(config))),
+    'chaser_samplebot2': Scenario("ChaserBot against samplebot2", benchmark.default_config,
+                                  lambda config: (ChaserBot(config), battlebotsengine.load_bot('samplebot2', config))),
+    'samplebot1_rammer': Scenario("samplebot1 against RammerBot", benchmark.default_config,
+                                  lambda config: (battlebotsengine.load_bot('samplebot1', config), RammerBot(config))),
+    'rammer_spam': Scenario("RammerBot against benchmark's SpamBot", benchmark.default_config,
+                            lambda config: (RammerBot(config), benchmark.SpamBot(config))),
+}
+
+# Result of each scenario by (scenario, tick rate, swept collisions), None being config.ini's tick rate. A swept
+# result is the same at every tick rate, while chaser_samplebot2 and samplebot1_rammer show discrete collisions
+# missing hits that swept ones catch.
+EXPECTED = {
+    ('samplebots', None, False): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('samplebots', None, True): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('samplebots', 12, True): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('large_arena', None, False): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('large_arena', None, True): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('large_arena', 12, True): MatchResult(States.draw, 'Daniel', 'Timmy', 10, 10, 63),
+    ('phaser_spam', None, False): MatchResult(States.draw, 'Spam', 'Spam', 1000000, 1000000, 23),
+    ('phaser_spam', None, True): MatchResult(States.draw, 'Spam', 'Spam', 1000000, 1000000, 23),
+    ('chaser_rammer', None, False): MatchResult(States.player_2_wins, 'Chaser', 'Rammer', 0, 6, 6),
+    ('chaser_rammer', None, True): MatchResult(States.player_2_wins, 'Chaser', 'Rammer', 0, 6, 6),
+    ('chaser_rammer', 12, True): MatchResult(States.player_2_wins, 'Chaser', 'Rammer', 0, 6, 6),
+    ('chaser_samplebot2', None, False): MatchResult(States.player_1_wins, 'Chaser', 'Timmy', 9, 0, 9),
+    ('chaser_samplebot2', None, True): MatchResult(States.draw, 'Chaser', 'Timmy', 0, 0, 9),
+    ('chaser_samplebot2', 12, True): MatchResult(States.draw, 'Chaser', 'Timmy', 0, 0, 9),
+    ('samplebot1_rammer', None, False): MatchResult(States.player_2_wins, 'Daniel', 'Rammer', 0, 2, 8),
+    ('samplebot1_rammer', None, True): MatchResult(States.player_1_wins, 'Daniel', 'Rammer', 5, 0, 8),
+    ('samplebot1_rammer', 4, True): MatchResult(States.player_1_wins, 'Daniel', 'Rammer', 5, 0, 8),
+    ('rammer_spam', None, False): MatchResult(States.player_1_wins, 'Rammer', 'Spam', 10, 0, 8),
+    ('rammer_spam', None, True): MatchResult(States.player_1_wins, 'Rammer', 'Spam', 10, 0, 8),
+    ('rammer_spam', 12, True): MatchResult(States.player_1_wins, 'Rammer', 'Spam', 10, 0, 8),
+}
+
+
+@pytest.fixture(scope='module')
+def images():
+    return battlebotsengine.load_images(battlebotsconfig.Config())
+
+
+def scenario_config(name, tick_rate):
+    config = SCENARIOS[name].setup_config(battlebotsconfig.Config())
+    if tick_rate is not None:
+        battlebotsengine.set_tick_rate(config, tick_rate)
+    return config
+
+
+@pytest.mark.parametrize('projectile_store', [False, True], ids=['lists', 'store'])
+@pytest.mark.parametrize('name, tick_rate, swept', list(EXPECTED), ids=str)
+def test_match(images, name, tick_rate, swept, projectile_store):
+    config = scenario_config(name, tick_rate)
+    player_1_ai, player_2_ai = SCENARIOS[name].make_bots(config)
+    match = battlebotsengine.Match(player_1_ai, player_2_ai, config, images, skip_countdown=True,
+                                   projectile_store=projectile_store, swept_collisions=swept)
+    try:
+        assert match.run() == EXPECTED[name, tick_rate, swept]
+    finally:
+        match.close()
+
+
+@pytest.mark.parametrize('name, tick_rate, swept', list(EXPECTED), ids=str)
+def test_batch_match(images, name, tick_rate, swept):
+    configs = [scenario_config(name, tick_rate) for match in range(2)]
+    player_1_bots, player_2_bots = zip(*[SCENARIOS[name].make_bots(config) for config in configs])
+    batch = battlebotsbatch.BatchMatch(player_1_bots, player_2_bots, configs, images, swept_collisions=swept)
+    assert batch.run() == [EXPECTED[name, tick_rate, swept]] * 2
+
+
+# A batch of different pairings, each has to finish the same as it would alone
+def test_batch_match_mixed(images):
+    names = ['chaser_rammer', 'chaser_samplebot2', 'samplebot1_rammer', 'rammer_spam']
+    for swept in (False, True):
+        configs = [scenario_config(name, None) for name in names]
+        player_1_bots, player_2_bots = zip(*[SCENARIOS[name].make_bots(config)
+                                             for name, config in zip(names, configs)])
+        batch = battlebotsbatch.BatchMatch(player_1_bots, player_2_bots, configs, images, swept_collisions=swept)
+        assert batch.run() == [EXPECTED[name, None, swept] for name in names]
+
+
+@pytest.mark.parametrize('projectile_store', [False, True], ids=['lists', 'store'])
+def test_run_match(images, projectile_store):
+    result = battlebotsengine.run_match('samplebot1', 'samplebot2', battlebotsconfig.Config(), images,
+                                        projectile_store=projectile_store)
+    assert result == EXPECTED['samplebots', None, False]
+    assert result.exit_value() == 3
@@ -0,0 +1,46 @@
+import pytest
+import battlebotsconfig
+import battlebotsengine
+import battlebotsreplay
+
+
+@pytest.fixture(scope='module')
+def images():
+    return battlebotsengine.load_images(battlebotsconfig.Config())
+
+
+def new_match(images):
+    config = battlebotsconfig.Config()
+    return battlebotsengine.Match(battlebotsengine.load_bot('samplebot1', config),
+                                  battlebotsengine.load_bot('samplebot2', config), config, images, skip_countdown=True)
+
+
+def test_replay_matches_recording(tmp_path, images):
+    replay_file = str(tmp_path / "match.bbr")
+    match = new_match(images)
+    recorder = battlebotsreplay.MatchRecorder(match)
+    for tick in range(100):
+        match.step()
+    recorder.save(replay_file)
+    replay = battlebotsreplay.Replay(replay_file, images)
+    assert len(replay) == 100
+    frame = replay.frame(len(replay) - 1)
+    assert (frame.player_1_ship.x, frame.player_1_ship.y) == pytest.approx((match.player_1_ship.x,
+                                                                            match.player_1_ship.y))
+    assert frame.player_1_ship.name == "Daniel" and frame.player_2_ship.name == "Timmy"
+
+
+# A recording saved before the match's first tick has nothing to play back
+def test_empty_replay_rejected(tmp_path, images):
+    replay_file = str(tmp_path / "empty.bbr")
+    battlebotsreplay.MatchRecorder(new_match(images)).save(replay_file)
+    with pytest.raises(ValueError, match="no recorded ticks"):
+        battlebotsreplay.Replay(replay_file, images)
+
+
+def test_not_a_replay(tmp_path, images):
+    replay_file = str(tmp_path / "journal.txt")
+    with open(replay_file, "w") as other_file:
+        other_file.write("chaser rammer 1 2026-10-18T12:00:00Z\n")
+    with pytest.raises(ValueError, match="not a battle bots replay"):
+        battlebotsreplay.Replay(replay_file, images)
@@ -0,0 +1,72 @@
+import roundrobin
+from roundrobin import Match
+
+
+def write(file_name, contents):
+    with open(file_name, "w") as journal_file:
+        journal_file.write(contents)
+
+
+def read(file_name):
+    with open(file_name) as journal_file:
+        return journal_file.read()
+
+
+def test_read_journal_missing_file(tmp_path):
+    assert roundrobin.read_journal(str(tmp_path / "journal.txt")) == {}
+
+
+# A crash while a line was being written leaves it torn, the match isn't counted and is played again
+def test_read_journal_torn_last_line(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    write(journal, "chaser rammer 1 2026-10-18T12:00:00Z\nrammer chaser 2 2026-10-18T12:0")
+    assert roundrobin.read_journal(journal) == {Match("chaser", "rammer"): 1}
+
+
+def test_read_journal_skips_bad_lines(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    write(journal, "chaser rammer 1 2026-10-18T12:00:00Z\n"
+                   "\n"
+                   "chaser spammer 7 2026-10-18T12:01:00Z\n"
+                   "rammer chaser\n"
+                   "rammer spammer 3 2026-10-18T12:02:00Z\n")
+    assert roundrobin.read_journal(journal) == {Match("chaser", "rammer"): 1, Match("rammer", "spammer"): 3}
+
+
+# A match is counted once, with its first result
+def test_read_journal_duplicate_entries(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    write(journal, "chaser rammer 1 2026-10-18T12:00:00Z\n"
+                   "chaser rammer 2 2026-10-18T12:01:00Z\n"
+                   "rammer chaser 3 2026-10-18T12:02:00Z\n")
+    assert roundrobin.read_journal(journal) == {Match("chaser", "rammer"): 1, Match("rammer", "chaser"): 3}
+
+
+def test_open_journal_cuts_torn_last_line(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    write(journal, "chaser rammer 1 2026-10-18T12:00:00Z\nrammer cha")
+    journal_file = roundrobin.open_journal(journal)
+    roundrobin.append_journal(journal_file, Match("rammer", "chaser"), 2)
+    journal_file.close()
+    lines = read(journal).splitlines()
+    assert lines[0] == "chaser rammer 1 2026-10-18T12:00:00Z"
+    assert lines[1].startswith("rammer chaser 2 ")
+    assert len(lines) == 2
+    assert roundrobin.read_journal(journal) == {Match("chaser", "rammer"): 1, Match("rammer", "chaser"): 2}
+
+
+def test_open_journal_torn_first_line(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    write(journal, "chaser ram")
+    journal_file = roundrobin.open_journal(journal)
+    journal_file.close()
+    assert read(journal) == ""
+
+
+def test_append_journal_new_file(tmp_path):
+    journal = str(tmp_path / "journal.txt")
+    journal_file = roundrobin.open_journal(journal)
+    roundrobin.append_journal(journal_file, Match("chaser", "rammer"), 3)
+    roundrobin.append_journal(journal_file, Match("rammer", "chaser"), 1)
+    journal_file.close()
+    assert roundrobin.read_journal(journal) == {Match("chaser", "rammer"): 3, Match("rammer", "chaser"): 1}
@@ -0,0 +1,90 @@
+import pytest
+import battlebotsschedule
+from battlebotsschedule import Ratings
+
+BOTS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf"]
+
+
+# Result of a match when the bot earlier in BOTS always wins
+def result(player1, player2):
+    return 1 if BOTS.index(player1) < BOTS.index(player2) else 2
+
+
+# Play rounds of a tournament until there are no pairings left, returns the rounds
+def play_tournament(bots, pairings):
+    ratings = Ratings(bots)
+    points = {bot: 0 for bot in bots}
+    played = dict()
+    rounds = []
+    while True:
+        matches = pairings(bots, points, ratings, played)
+        if len(matches) == 0:
+            return rounds, played
+        rounds.append(matches)
+        for player1, player2 in matches:
+            ecode = result(player1, player2)
+            played[player1, player2] = ecode
+            ratings.add_result(player1, player2, ecode)
+            points[player1 if ecode == 1 else player2] += 2
+
+
+def swiss(bots, points, ratings, played):
+    return battlebotsschedule.swiss_pairings(bots, points, ratings, played)
+
+
+def adaptive(bots, points, ratings, played):
+    return battlebotsschedule.adaptive_pairings(bots, ratings, played)
+
+
+@pytest.mark.parametrize('pairings', [swiss, adaptive])
+@pytest.mark.parametrize('number_of_bots', [2, 4, 5, 7])
+def test_no_repeated_pairings(pairings, number_of_bots):
+    bots = BOTS[:number_of_bots]
+    rounds, played = play_tournament(bots, pairings)
+    matches = [match for matches in rounds for match in matches]
+    assert len(matches) == len(set(matches))
+    # Every match both ways round gets played in the end
+    assert len(matches) == number_of_bots * (number_of_bots - 1)
+    for matches in rounds:
+        seated = [bot for match in matches for bot in match]
+        assert len(seated) == len(set(seated))
+
+
+# With an odd number of bots one sits each round out, one of those who have played the most
+@pytest.mark.parametrize('number_of_bots', [3, 5, 7])
+def test_swiss_bye(number_of_bots):
+    bots = BOTS[:number_of_bots]
+    ratings = Ratings(bots)
+    points = {bot: 0 for bot in bots}
+    played = dict()
+    byes = []
+    for round_number in range(number_of_bots):
+        matches = battlebotsschedule.swiss_pairings(bots, points, ratings, played)
+        assert len(matches) == number_of_bots // 2
+        games, as_player_1 = battlebotsschedule.games_played(bots, played)
+        seated = {bot for match in matches for bot in match}
+        assert len(seated) == number_of_bots - 1
+        bye = (set(bots) - seated).pop()
+        assert games[bye] == max(games.values())
+        byes.append(bye)
+        for player1, player2 in matches:
+            ecode = result(player1, player2)
+            played[player1, player2] = ecode
+            ratings.add_result(player1, player2, ecode)
+            points[player1 if ecode == 1 else player2] += 2
+    # Nobody sits out twice while another bot hasn't had a bye yet
+    assert sorted(byes) == sorted(bots)
+
+
+def test_swiss_first_round_pairs_neighbours():
+    bots = BOTS[:4]
+    points = {"alpha": 4, "bravo": 3, "charlie": 2, "delta": 1}
+    matches = battlebotsschedule.swiss_pairings(bots, points, Ratings(bots), dict())
+    assert matches == [("alpha", "bravo"), ("charlie", "delta")]
+
+
+def test_default_rounds():
+    assert battlebotsschedule.default_rounds(1) == 2
+    assert battlebotsschedule.default_rounds(2) == 2
+    assert battlebotsschedule.default_rounds(8) == 6
+    assert battlebotsschedule.default_rounds(9) == 8
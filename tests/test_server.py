@@ -0,0 +1,56 @@
+import json
+import random
+import battlebotsserver
+from battlebotsserver import Standings
+
+BOTS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+
+
+# What the page does with a delta: take each bot out of its old rank and put it in at its new one
+def apply_moves(order, delta):
+    for move in delta['moves']:
+        assert order.pop(move['old_rank']) == move['bot']
+        order.insert(move['new_rank'], move['bot'])
+
+
+def test_moves_keep_cached_order():
+    standings = Standings(BOTS)
+    order = standings.ranking()
+    generator = random.Random(0)
+    for i in range(200):
+        player1, player2 = generator.sample(BOTS, 2)
+        delta = standings.add_result(player1, player2, generator.choice([1, 2, 3]))
+        assert 'order' not in delta
+        assert [move['bot'] for move in delta['moves']] == [player1, player2]
+        apply_moves(order, delta)
+        assert order == standings.ranking()
+
+
+def test_delta_contents():
+    standings = Standings(BOTS)
+    delta = standings.add_result("foxtrot", "alpha", 1)
+    assert delta['bots'] == {'foxtrot': {'points': 2, 'wins': 1, 'draws': 0, 'losses': 0},
+                             'alpha': {'points': 0, 'wins': 0, 'draws': 0, 'losses': 1}}
+    assert delta['match'] == {'player1': 'foxtrot', 'player2': 'alpha', 'outcome': 1}
+    assert delta['moves'] == [{'bot': 'foxtrot', 'old_rank': 5, 'new_rank': 0},
+                              {'bot': 'alpha', 'old_rank': 1, 'new_rank': 1}]
+    # Losses don't count in the order, alpha is still first of the bots without points
+    assert standings.ranking() == ["foxtrot", "alpha", "bravo", "charlie", "delta", "echo"]
+
+
+def test_server_sends_deltas():
+    server = battlebotsserver.StandingsServer(BOTS, 0)
+    try:
+        messages = server.subscribe()
+        order = json.loads(server.snapshot_json())['order']
+        server.add_result("echo", "bravo", 3)
+        server.add_result("delta", "echo", 2)
+        for sequence in (1, 2):
+            message = messages.get(timeout=1).decode()
+            assert message.startswith("data: ") and message.endswith("\n\n")
+            delta = json.loads(message[len("data: "):])
+            assert delta['sequence'] == sequence
+            apply_moves(order, delta)
+        assert order == json.loads(server.snapshot_json())['order']
+    finally:
+        server.stop()